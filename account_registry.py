@@ -0,0 +1,98 @@
+# account_registry.py
+import hashlib
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def hash_account_id(account_id: str) -> str:
+    """使用 SHA-256 对 account_id 进行哈希处理，保护敏感信息"""
+    return hashlib.sha256(account_id.encode("utf-8")).hexdigest()
+
+
+def shard_of(hashed_id: str, total: int) -> int:
+    """账号所属的分片序号（从 1 开始），由账号哈希决定，与配置顺序和运行环境无关"""
+    return int(hashed_id[:16], 16) % total + 1
+
+
+class AccountEntry:
+    """已解析的单个账号：所属服务、账号配置及预先计算的哈希"""
+    __slots__ = ("service", "config", "account_id", "hashed_id")
+
+    def __init__(self, service, config: Dict[str, Any], hashed_id: str):
+        self.service = service
+        self.config = config
+        self.account_id = config.get("account_id", "未知账号")
+        self.hashed_id = hashed_id
+
+
+class AccountRegistry:
+    """
+    账号注册表，在启动时构建一次。
+    每个服务的账号配置只解析一次，每个账号的哈希只计算一次，
+    并维护 哈希 -> 账号 的索引，供提前退出检查、跳过逻辑和状态写入以 O(1) 查询。
+    """
+
+    def __init__(self):
+        self.entries: List[AccountEntry] = []
+        self.service_entries: Dict[str, List[AccountEntry]] = {}
+        self.service_errors: Dict[str, Exception] = {}
+        self._by_hash: Dict[str, AccountEntry] = {}
+        self._hash_cache: Dict[str, str] = {}
+
+    @classmethod
+    def build(cls, services: Iterable) -> "AccountRegistry":
+        """解析所有服务的账号配置，构建注册表"""
+        registry = cls()
+        for service in services:
+            registry.add_service(service)
+        return registry
+
+    def add_service(self, service):
+        """解析单个服务的账号配置并登记，解析失败时记录异常"""
+        name = service.service_name
+        self.service_entries[name] = []
+        try:
+            account_configs = service.get_account_configs()
+        except Exception as e:
+            logger.error("获取服务 %s 账号配置时出错: %s", name, e)
+            self.service_errors[name] = e
+            return
+
+        for config in account_configs or []:
+            entry = AccountEntry(service, config, self.hash_of(config.get("account_id", "未知账号")))
+            self.entries.append(entry)
+            self.service_entries[name].append(entry)
+            self._by_hash.setdefault(entry.hashed_id, entry)
+
+    def hash_of(self, account_id: str) -> str:
+        """返回账号的哈希，同一账号只计算一次"""
+        hashed_id = self._hash_cache.get(account_id)
+        if hashed_id is None:
+            hashed_id = hash_account_id(account_id)
+            self._hash_cache[account_id] = hashed_id
+        return hashed_id
+
+    def get(self, hashed_id: str) -> Optional[AccountEntry]:
+        """按哈希查找账号"""
+        return self._by_hash.get(hashed_id)
+
+    def hashes(self) -> Set[str]:
+        """所有已配置账号的哈希集合"""
+        return set(self._by_hash)
+
+    def all_successful(self, prior_status: Dict[str, Any], shard: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        判断所有已配置的账号是否都已在先前状态中记录为成功。
+        传入 shard=(i, N) 时只检查属于第 i 个分片的账号。
+        """
+        hashes = [hashed_id for hashed_id in self._by_hash
+                  if shard is None or shard_of(hashed_id, shard[1]) == shard[0]]
+        if not hashes:
+            return False
+        for hashed_id in hashes:
+            record = prior_status.get(hashed_id)
+            if not record or not record.get("success"):
+                return False
+        return True
@@ -1,130 +1,307 @@
 # -*- coding: utf-8 -*-
 # 该脚本通过 GitHub REST API 批量删除 GitHub 仓库中的工作流运行。
-# 每次删除之间会暂停指定秒数以避免速率限制，并在最后提供详细的执行摘要。
+# 默认逐个删除，每次删除之间会暂停指定秒数以避免速率限制；指定 --workers 大于 1 时并发删除，
+# 根据 GitHub 返回的限流响应头动态调整节奏。工作流运行按页惰性获取，边获取边删除，最后提供详细的执行摘要。
 # 需要安装 requests 库：pip install requests
 
 import os
 import sys
-import json
 import argparse
 import getpass
+import itertools
+import threading
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from http_transport import get_session, print_pool_stats
+from services.rate_limiter import TokenBucket
+from services.retry_policy import parse_retry_after
+from logger import get_logger, flush_logs, SUMMARY
 
+logger = get_logger(__name__)
 
-def get_workflow_runs(owner, repo, gh_token, count):
-    """
-    通过 GitHub API 获取指定仓库的工作流运行列表。
-    """
-    print(f"正在获取仓库 '{owner}/{repo}' 的工作流运行列表...")
-
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs"
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "Authorization": f"token {gh_token}"
-    }
-    params = {
-        "per_page": 100  # GitHub API 默认每页最大 100 个
-    }
-
-    all_runs = []
-    page = 1
-
-    while True:
-        params["page"] = page
-        try:
-            print(f"\n---> 正在调用获取 API: {api_url} (页码: {page})")
-            response = requests.get(api_url, headers=headers, params=params)
-
-            # 打印完整的 API 响应信息
-            print(f"    - API 响应状态码: {response.status_code}")
-            try:
-                print(f"    - API 响应内容: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
-            except json.JSONDecodeError:
-                print(f"    - API 响应内容（非 JSON）: {response.text}")
+# GitHub Actions 中会设置 GITHUB_API_URL，GitHub Enterprise 或本地桩服务器可通过 --api-url 指定
+DEFAULT_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
 
-            response.raise_for_status()  # 如果响应状态码不是 2xx，则引发异常
-            data = response.json()
+# 并发删除的默认配置。GitHub 的二级限流按每分钟点数计算，DELETE 请求每次计 5 点（上限 900 点/分钟），
+# 约合 3 次/秒，默认速率留出余量
+DEFAULT_DELETE_WORKERS = 4
+DEFAULT_DELETE_RATE = 2.0  # 单位：请求/秒
+SECONDARY_LIMIT_PAUSE = 60  # 二级限流未给出 Retry-After 时的暂停秒数，GitHub 文档建议至少等待一分钟
+MAX_DELETE_ATTEMPTS = 3  # 单个运行被限流或网络错误时的最大尝试次数
+REQUEST_TIMEOUT = 30
 
-            runs = data.get('workflow_runs', [])
-            if not runs:
-                break
+PER_PAGE = 100  # GitHub API 每页最多 100 个
+RUN_FIELDS = ('id', 'name', 'status', 'created_at')  # 删除和日志所需的字段，其余字段获取后即丢弃
 
-            all_runs.extend(runs)
 
-            # 如果指定了数量，且已获取足够多的数据，则停止分页
-            if count and len(all_runs) >= count:
-                break
+def _api_headers(gh_token):
+    return {
+        "Accept": "application/vnd.github.v3+json",
+        "Authorization": f"token {gh_token}"
+    }
 
-            # 如果没有下一页，则停止
-            if 'next' not in response.links:
-                break
 
-            page += 1
+def _int_header(response, name) -> Optional[int]:
+    try:
+        return int(response.headers[name])
+    except (KeyError, ValueError):
+        return None
 
-        except requests.exceptions.RequestException as e:
-            print("错误：获取工作流运行列表失败。请检查仓库名称或 GitHub Token 是否正确、或其权限是否足够。")
-            print("原始错误信息:", e)
-            return None
 
-    if not all_runs:
-        print("警告：未找到任何工作流运行。")
-        return []
+class GitHubRateGovernor:
+    """
+    根据 GitHub 的限流响应头调整并发删除的节奏，由所有工作线程共用。
+    - 二级限流（403/429 带 Retry-After，或正文提示 secondary rate limit）：令牌桶降速，并暂停 Retry-After 秒；
+    - 主限流：X-RateLimit-Remaining 不够完成剩余的删除时，把剩余额度均匀分摊到 X-RateLimit-Reset 之前，
+      额度耗尽时暂停到重置时间。
+    """
 
-    # 按创建时间降序排序
-    all_runs.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+    def __init__(self, rate: float, burst: int, pending: int):
+        self.bucket = TokenBucket("GitHub API", rate=rate, burst=burst, min_rate=min(0.2, rate))
+        self.pending = pending  # 尚未完成的删除数量
+        self._spacing = 0.0  # 主限流要求的最小请求间隔，单位：秒
+        self._next_at = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """发送请求前调用，必要时阻塞等待"""
+        wait = self.bucket.reserve()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now + wait, self._next_at, self._blocked_until)
+            if self._spacing:
+                self._next_at = slot + self._spacing
+        if slot > now:
+            time.sleep(slot - now)
+
+    def done(self):
+        """一个运行处理完毕（成功或放弃）"""
+        with self._lock:
+            self.pending -= 1
+
+    def observe(self, response) -> Optional[float]:
+        """根据响应头更新节奏；被限流时返回需要等待的秒数，否则返回 None"""
+        remaining = _int_header(response, "X-RateLimit-Remaining")
+        reset = _int_header(response, "X-RateLimit-Reset")
+        until_reset = max(0.0, reset - time.time()) + 1 if reset is not None else None
+
+        if response.status_code in (403, 429):
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None and remaining == 0 and until_reset is not None:
+                with self._lock:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + until_reset)
+                logger.warning("    GitHub API 额度已用完，暂停 %.0f 秒至额度重置。", until_reset)
+                return until_reset
+            if retry_after is None and (response.status_code == 429
+                                        or "secondary rate limit" in response.text.lower()):
+                retry_after = SECONDARY_LIMIT_PAUSE
+            if retry_after is not None:
+                # 同一次限流会让所有在途请求都收到 403/429，暂停期间只降速一次
+                with self._lock:
+                    now = time.monotonic()
+                    already_paused = now < self._blocked_until
+                    self._blocked_until = max(self._blocked_until, now + retry_after)
+                if not already_paused:
+                    self.bucket.penalize(retry_after)
+            return retry_after
+
+        if response.ok:
+            self.bucket.reward()
+        if remaining is not None and until_reset is not None:
+            with self._lock:
+                if remaining == 0:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + until_reset)
+                # 剩余额度不足时按额度均匀分摊，足够时不额外限制
+                spacing = until_reset / remaining if 0 < remaining < self.pending else 0.0
+                if spacing and not self._spacing:
+                    logger.warning("    GitHub API 剩余额度 %d 次，少于待删除的 %d 个，放慢至每 %.2f 秒一次。",
+                                   remaining, self.pending, spacing)
+                self._spacing = spacing
+        return None
+
+
+class WorkflowRunStream:
+    """
+    按创建时间倒序（GitHub 默认的最新在前）惰性获取工作流运行，每个运行只保留删除所需的字段。
+    构造时获取第一页，用于确认提示中的数量，并在删除开始前暴露 Token 或仓库错误；其余页在迭代时按需获取，
+    删除可以在后续页获取之前开始，指定 count 时取满即停止分页。
 
-    # 根据指定的数量进行截取
-    if count and count > 0:
-        all_runs = all_runs[:count]
+    分页采用 created<=上一页最早创建时间 的键集方式，而不是页码：删除会使后面的运行前移，按页码翻页会跳过运行。
+    与上一页最早创建时间相同的运行会再次返回，按 id 去重。
+    """
 
-    print(f"找到 {len(all_runs)} 个可供删除的工作流运行。")
-    return all_runs
+    def __init__(self, owner, repo, gh_token, count=None, api_url=DEFAULT_API_URL):
+        self.url = f"{api_url}/repos/{owner}/{repo}/actions/runs"
+        self.headers = _api_headers(gh_token)
+        self.count = count if count and count > 0 else None
+        self.per_page = min(PER_PAGE, self.count) if self.count else PER_PAGE
+        self.pages = 0
+        self.failed = False  # 迭代过程中获取某一页失败，后续的运行未处理
+        self.total_count, self._first_page = self._fetch_page()
+
+    @property
+    def expected(self) -> int:
+        """预计处理的运行数量"""
+        return min(self.total_count, self.count) if self.count else self.total_count
+
+    def _fetch_page(self, created_before=None):
+        """获取一页运行，返回 (仓库运行总数, 精简后的运行列表)"""
+        params = {"per_page": self.per_page}
+        if created_before:
+            params["created"] = f"<={created_before}"
+        self.pages += 1
+        logger.info("---> 正在调用获取 API: %s (第 %d 页%s)", self.url, self.pages,
+                    f", created<={created_before}" if created_before else "")
+        response = get_session().get(self.url, headers=self.headers, params=params, timeout=REQUEST_TIMEOUT)
+        logger.debug("    - API 响应状态码: %s", response.status_code)
+        if not response.ok:
+            # 只在失败时输出响应内容，成功的分页响应只记录摘要
+            logger.error("    - API 响应内容: %s", response.text)
+        response.raise_for_status()  # 如果响应状态码不是 2xx，则引发异常
+
+        data = response.json()
+        runs = [{field: run.get(field) for field in RUN_FIELDS} for run in data.get('workflow_runs', [])]
+        logger.debug("    - 本页 %d 个工作流运行，共 %s 个", len(runs), data.get('total_count'))
+        return data.get('total_count', 0), runs
+
+    def __iter__(self):
+        page, self._first_page = self._first_page, None
+        boundary, seen = None, set()
+        yielded = 0
+        while page:
+            fresh = False
+            for run in page:
+                if run['id'] in seen:
+                    continue
+                fresh = True
+                yield run
+                yielded += 1
+                if self.count and yielded >= self.count:
+                    return
+            # 不满一页说明已到末尾；整页都是已返回过的运行（同一时刻创建的运行超过一页）时同样停止，避免死循环
+            if len(page) < self.per_page or not fresh:
+                return
+
+            oldest = page[-1]['created_at']
+            if oldest != boundary:
+                boundary, seen = oldest, set()
+            seen.update(run['id'] for run in page if run['created_at'] == oldest)
+            try:
+                _, page = self._fetch_page(oldest)
+            except requests.exceptions.RequestException as e:
+                logger.error("错误：获取后续工作流运行失败，已停止分页。原始错误信息: %s", e)
+                self.failed = True
+                return
 
 
-def delete_workflow_runs(owner, repo, gh_token, runs_to_delete, delay):
+def delete_workflow_runs(owner, repo, gh_token, runs_to_delete, total, delay, api_url=DEFAULT_API_URL):
     """
-    批量删除工作流运行，并在每次调用之间暂停。
+    逐个删除工作流运行，并在每次调用之间暂停。runs_to_delete 可以是惰性的迭代器，total 为预计数量。
     """
-    total_runs = len(runs_to_delete)
+    processed = 0
     success_count = 0
     failure_count = 0
 
-    print(f"\n开始批量删除... (共 {total_runs} 个，每次间隔 {delay} 秒)")
+    logger.log(SUMMARY, "\n开始批量删除... (约 %d 个，每次间隔 %s 秒)", total, delay)
+
+    for run in runs_to_delete:
+        # 暂停以避免速率限制，第一个之前不暂停
+        if processed:
+            time.sleep(delay)
+        processed += 1
 
-    for i, run in enumerate(runs_to_delete):
         run_id = run['id']
-        delete_url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs/{run_id}"
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"token {gh_token}"
-        }
+        delete_url = f"{api_url}/repos/{owner}/{repo}/actions/runs/{run_id}"
+        headers = _api_headers(gh_token)
 
-        print(
-            f"\n---> [{i + 1}/{total_runs}] 正在删除工作流运行 ID: {run_id} (名称: {run['name']}, 状态: {run['status']})...")
+        logger.info("---> [%d/%d] 正在删除工作流运行 ID: %s (名称: %s, 状态: %s)...",
+                    processed, total, run_id, run['name'], run['status'])
 
         try:
-            response = requests.delete(delete_url, headers=headers)
-
-            # 打印完整的 API 响应信息
-            print(f"    - API 响应状态码: {response.status_code}")
-            print(f"    - API 响应内容: {response.text}")
+            response = get_session().delete(delete_url, headers=headers, timeout=REQUEST_TIMEOUT)
+            logger.debug("    - API 响应状态码: %s", response.status_code)
+            if not response.ok:
+                logger.error("    - API 响应内容: %s", response.text)
 
             response.raise_for_status()
-            print("    -> 删除成功！")
+            logger.info("    -> 删除成功！")
             success_count += 1
         except requests.exceptions.RequestException as e:
-            print(f"    -> 删除失败！错误信息：{e}")
+            logger.error("    -> 删除失败！错误信息：%s", e)
             failure_count += 1
 
-        # 暂停以避免速率限制，如果不是最后一个则暂停
-        if i < total_runs - 1:
-            time.sleep(delay)
+    logger.log(SUMMARY, "\n--- 批量删除完成 ---\n总计处理数量: %d\n成功删除数量: %d\n失败数量: %d",
+               processed, success_count, failure_count)
+    print_pool_stats()
 
-    print("\n--- 批量删除完成 ---")
-    print(f"总计处理数量: {total_runs}")
-    print(f"成功删除数量: {success_count}")
-    print(f"失败数量: {failure_count}")
+
+def delete_workflow_runs_concurrent(owner, repo, gh_token, runs_to_delete, total, workers, rate,
+                                    api_url=DEFAULT_API_URL):
+    """
+    并发删除工作流运行：有界线程池共用连接池会话，由 GitHubRateGovernor 根据限流响应头调整节奏，
+    被限流或网络错误的运行在等待后重试。
+    runs_to_delete 在主线程中按需迭代，在途的运行不超过 workers 的两倍，后续页的获取与删除并行进行。
+    """
+    headers = _api_headers(gh_token)
+    # 突发量为 1：并发只用于重叠网络延迟，请求按速率均匀发出，避免暂停结束后各线程同时发送再次触发限流
+    governor = GitHubRateGovernor(rate, burst=1, pending=total)
+    progress = itertools.count(1)
+    slots = threading.BoundedSemaphore(workers * 2)
+    results = {True: 0, False: 0}
+    results_lock = threading.Lock()
+
+    logger.log(SUMMARY, "\n开始并发删除... (约 %d 个，并发 %d，初始速率 %.1f 次/秒)", total, workers, rate)
+
+    def delete_one(run) -> bool:
+        delete_url = f"{api_url}/repos/{owner}/{repo}/actions/runs/{run['id']}"
+        try:
+            for attempt in range(1, MAX_DELETE_ATTEMPTS + 1):
+                governor.acquire()
+                try:
+                    response = get_session().delete(delete_url, headers=headers, timeout=REQUEST_TIMEOUT)
+                except requests.exceptions.RequestException as e:
+                    logger.warning("    - 删除 %s 时网络错误（第 %d 次）：%s", run['id'], attempt, e)
+                    continue
+
+                retry_after = governor.observe(response)
+                logger.debug("    - 删除 %s: API 响应状态码 %s", run['id'], response.status_code)
+                if response.ok:
+                    logger.info("---> [%d/%d] 已删除工作流运行 ID: %s (名称: %s, 状态: %s)",
+                                next(progress), total, run['id'], run['name'], run['status'])
+                    return True
+                if retry_after is None:
+                    logger.error("---> [%d/%d] 删除工作流运行 ID: %s 失败！状态码 %s，响应内容: %s",
+                                 next(progress), total, run['id'], response.status_code, response.text)
+                    return False
+                logger.warning("    - 删除 %s 被限流（第 %d 次），%.0f 秒后重试", run['id'], attempt, retry_after)
+
+            logger.error("---> [%d/%d] 删除工作流运行 ID: %s 失败！已尝试 %d 次",
+                         next(progress), total, run['id'], MAX_DELETE_ATTEMPTS)
+            return False
+        finally:
+            governor.done()
+
+    def on_done(future):
+        try:
+            success = not future.exception() and future.result()
+            if future.exception():
+                logger.error("    - 删除任务异常：%s", future.exception())
+            with results_lock:
+                results[bool(success)] += 1
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gh-delete") as pool:
+        for run in runs_to_delete:
+            slots.acquire()
+            pool.submit(delete_one, run).add_done_callback(on_done)
+
+    logger.log(SUMMARY, "\n--- 批量删除完成 ---\n总计处理数量: %d\n成功删除数量: %d\n失败数量: %d",
+               results[True] + results[False], results[True], results[False])
+    print_pool_stats()
 
 
 def main(args=None):
@@ -143,6 +320,14 @@ def main(args=None):
         parser.add_argument('-f', '--force', action='store_true',
                             help="如果指定，脚本将跳过用户确认步骤，直接执行删除操作。")
         parser.add_argument('-d', '--delay', type=int, default=3, help="每次 API 调用之间的延迟秒数，默认值是3秒。")
+        parser.add_argument('-w', '--workers', type=int, default=1,
+                            help=f"并发删除的线程数，大于 1 时启用并发模式并忽略 --delay，"
+                                 f"根据 GitHub 限流响应头动态调整节奏（建议 {DEFAULT_DELETE_WORKERS}），默认值是1（逐个删除）。")
+        parser.add_argument('--rate', type=float, default=DEFAULT_DELETE_RATE,
+                            help=f"并发模式下的初始删除速率（次/秒），被限流时自动降低，默认值是{DEFAULT_DELETE_RATE}。")
+        parser.add_argument('--api-url', type=str, default=DEFAULT_API_URL,
+                            help="GitHub API 地址，默认取环境变量 GITHUB_API_URL 或 https://api.github.com，"
+                                 "可指向 GitHub Enterprise 或本地桩服务器。")
         args = parser.parse_args()
 
     # 1. 检查必备参数
@@ -173,28 +358,42 @@ def main(args=None):
             print("错误：未提供 Token。操作已取消。")
             sys.exit(1)
 
-    # 3. 获取工作流运行列表
-    runs_to_delete = get_workflow_runs(args.owner, args.repo, gh_token, args.count)
-
-    if runs_to_delete is None:
+    # 3. 获取第一页工作流运行，其余页在删除过程中按需获取
+    api_url = args.api_url.rstrip('/')
+    logger.log(SUMMARY, "正在获取仓库 '%s/%s' 的工作流运行列表...", args.owner, args.repo)
+    try:
+        runs_to_delete = WorkflowRunStream(args.owner, args.repo, gh_token, args.count, api_url)
+    except requests.exceptions.RequestException as e:
+        logger.error("错误：获取工作流运行列表失败。请检查仓库名称或 GitHub Token 是否正确、或其权限是否足够。")
+        logger.error("原始错误信息: %s", e)
         sys.exit(1)
 
-    if not runs_to_delete:
+    total = runs_to_delete.expected
+    if not total:
+        flush_logs()
         print("没有找到要删除的工作流运行。")
         sys.exit(0)
+    logger.log(SUMMARY, "仓库共有 %d 个工作流运行，本次将删除最近的 %d 个。", runs_to_delete.total_count, total)
 
     # 4. 安全确认
     if not args.force:
+        flush_logs()  # 提示之前写出缓冲中的日志
         print("\n警告：此操作不可逆！")
-        plural = "s" if len(runs_to_delete) > 1 else ""
         response = input(
-            f"你确定要删除仓库 '{args.owner}/{args.repo}' 中的所有 ({len(runs_to_delete)} 个) 工作流运行吗？\n输入 'yes' 确认删除: ")
+            f"你确定要删除仓库 '{args.owner}/{args.repo}' 中的所有 ({total} 个) 工作流运行吗？\n输入 'yes' 确认删除: ")
         if response.lower() != 'yes':
             print("操作已取消。")
             sys.exit(0)
 
-    # 5. 批量删除
-    delete_workflow_runs(args.owner, args.repo, gh_token, runs_to_delete, args.delay)
+    # 5. 边获取边删除
+    if args.workers > 1:
+        delete_workflow_runs_concurrent(args.owner, args.repo, gh_token, runs_to_delete, total,
+                                        args.workers, args.rate, api_url)
+    else:
+        delete_workflow_runs(args.owner, args.repo, gh_token, runs_to_delete, total, args.delay, api_url)
+
+    if runs_to_delete.failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
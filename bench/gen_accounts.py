@@ -0,0 +1,52 @@
+# bench/gen_accounts.py
+# 生成压测用的合成账号 cookie，格式与 GR_COOKIE / IKUUU_COOKIE 一致，每个账号的标识互不相同。
+# 也可单独运行输出环境变量：python bench/gen_accounts.py --glados 1000 --ikuuu 1000
+import argparse
+import hashlib
+
+
+def _token(prefix: str, index: int) -> str:
+    """确定性的伪随机串，保证同一序号每次生成相同的 cookie"""
+    return hashlib.sha256(f"{prefix}-{index}".encode("utf-8")).hexdigest()
+
+
+def glados_cookies(count: int) -> str:
+    """GLaDOS 账号标识取 koa:sess.sig= 之后的 10 个字符"""
+    return '||'.join(
+        f"koa:sess={_token('sess', i)[:40]}; koa:sess.sig={_token('sig', i)[:27]}"
+        for i in range(count)
+    )
+
+
+def ikuuu_cookies(count: int) -> str:
+    """iKuuu 账号标识取 cookie 的前 10 个字符"""
+    return '||'.join(
+        f"uid{i:07d}; email=bench{i}%40example.com; key={_token('key', i)[:32]}"
+        for i in range(count)
+    )
+
+
+def account_env(glados: int, ikuuu: int, base_url: str) -> dict:
+    """生成指向桩服务器的环境变量，数量为 0 的服务不会被启用"""
+    env = {}
+    if glados:
+        env['GR_COOKIE'] = glados_cookies(glados)
+        env['GLADOS_BASE_URL'] = base_url
+    if ikuuu:
+        env['IKUUU_COOKIE'] = ikuuu_cookies(ikuuu)
+        env['IKUUU_BASE_URL'] = base_url
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成压测用的合成账号")
+    parser.add_argument('--glados', type=int, default=100, help="GLaDOS 账号数量")
+    parser.add_argument('--ikuuu', type=int, default=100, help="iKuuu 账号数量")
+    parser.add_argument('--base-url', type=str, default="http://127.0.0.1:18080", help="桩服务器地址")
+    args = parser.parse_args()
+    for key, value in account_env(args.glados, args.ikuuu, args.base_url).items():
+        print(f'export {key}="{value}"')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# bench/github_stub.py
+# 模拟 GitHub REST API 工作流运行接口的本地桩服务器，用于测试 batch_del_workflows.py：
+# GET /repos/{owner}/{repo}/actions/runs（按创建时间倒序分页，带 Link 头，支持 created=<=时间 过滤）
+# 和 DELETE .../actions/runs/{id}。每三个运行共用一个创建时间，用于验证按创建时间分页时的去重。
+# 每个响应都带有 X-RateLimit-* 头；可配置主限流额度和二级限流（每秒 DELETE 上限，超出返回 403 + Retry-After）。
+# 用法示例：
+#   python bench/github_stub.py --runs 1000 --secondary-rate 5
+#   python batch_del_workflows.py --api-url http://127.0.0.1:18081 -t x -f -w 8
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+from typing import Dict, Any, List
+from urllib.parse import urlparse, parse_qs
+
+from stub_server import StubHandler
+
+RUNS_PATH = re.compile(r'^/repos/[^/]+/[^/]+/actions/runs(?:/(\d+))?$')
+
+
+class GitHubStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, runs: int, latency: float, rate_limit: int, rate_window: int,
+                 secondary_rate: float, retry_after: int):
+        super().__init__(address, GitHubStubHandler)
+        self.latency = latency  # 响应延迟，单位：秒
+        self.rate_limit = rate_limit  # 主限流：每个窗口的请求额度
+        self.rate_window = rate_window  # 主限流窗口，单位：秒
+        self.secondary_rate = secondary_rate  # 二级限流：每秒 DELETE 上限，0 表示不限制
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.used = 0
+        self.reset_at = int(time.time()) + rate_window
+        self.recent_deletes = deque()
+
+        # 运行按 id 倒序保存，与 GitHub 的默认排序（最新在前）一致
+        newest = datetime.utcnow().replace(microsecond=0)
+        self.runs: List[Dict[str, Any]] = [
+            {'id': 100000 + index, 'created_at': (newest - timedelta(seconds=(runs - index) // 3)).isoformat() + 'Z'}
+            for index in range(runs, 0, -1)
+        ]
+
+    def record(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def consume_quota(self) -> Dict[str, str]:
+        """领取一次主限流额度，返回 X-RateLimit-* 响应头"""
+        with self.lock:
+            now = time.time()
+            if now >= self.reset_at:
+                self.used = 0
+                self.reset_at = int(now) + self.rate_window
+            self.used += 1
+            remaining = max(0, self.rate_limit - self.used)
+            return {
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Remaining': str(remaining),
+                'X-RateLimit-Used': str(min(self.used, self.rate_limit)),
+                'X-RateLimit-Reset': str(self.reset_at),
+                'X-Stub-Exhausted': '1' if self.used > self.rate_limit else '',
+            }
+
+    def secondary_limited(self) -> bool:
+        """最近一秒内的 DELETE 次数超过上限时触发二级限流"""
+        if not self.secondary_rate:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            while self.recent_deletes and now - self.recent_deletes[0] >= 1.0:
+                self.recent_deletes.popleft()
+            if len(self.recent_deletes) >= self.secondary_rate:
+                return True
+            self.recent_deletes.append(now)
+            return False
+
+
+class GitHubStubHandler(StubHandler):
+    server: GitHubStubServer
+
+    def _handle(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/__stats':
+            with self.server.lock:
+                self._send_json({**self.server.stats, 'runs_left': len(self.server.runs)})
+            return
+
+        server = self.server
+        time.sleep(server.latency)
+        headers = server.consume_quota()
+        exhausted = headers.pop('X-Stub-Exhausted')
+        match = RUNS_PATH.match(parsed.path)
+        if not match:
+            server.record('not_found')
+            self._send(404, json.dumps({'message': 'Not Found'}), headers=headers)
+        elif exhausted:
+            server.record('primary_limited')
+            self._send(403, json.dumps({'message': 'API rate limit exceeded'}), headers=headers)
+        elif self.command == 'DELETE' and match.group(1):
+            self._delete(int(match.group(1)), headers)
+        elif self.command == 'GET' and not match.group(1):
+            self._list(parse_qs(parsed.query), headers)
+        else:
+            server.record('not_found')
+            self._send(404, json.dumps({'message': 'Not Found'}), headers=headers)
+
+    def _delete(self, run_id: int, headers: Dict[str, str]):
+        server = self.server
+        if server.secondary_limited():
+            server.record('secondary_limited')
+            headers['Retry-After'] = str(server.retry_after)
+            self._send(403, json.dumps({'message': 'You have exceeded a secondary rate limit.'}), headers=headers)
+            return
+        with server.lock:
+            index = next((i for i, run in enumerate(server.runs) if run['id'] == run_id), None)
+            if index is not None:
+                del server.runs[index]
+        if index is None:
+            server.record('delete_missing')
+            self._send(404, json.dumps({'message': 'Not Found'}), headers=headers)
+        else:
+            server.record('deleted')
+            self._send(204, '', headers=headers)
+
+    def _list(self, query: Dict[str, List[str]], headers: Dict[str, str]):
+        server = self.server
+        per_page = min(100, int(query.get('per_page', ['30'])[0]))
+        page = max(1, int(query.get('page', ['1'])[0]))
+        created = query.get('created', [''])[0]
+        with server.lock:
+            runs = server.runs
+            if created.startswith('<='):
+                runs = [run for run in runs if run['created_at'] <= created[2:]]
+            total = len(runs)
+            selected = runs[(page - 1) * per_page:page * per_page]
+        server.record('list')
+
+        # 模拟真实响应中体积较大的运行对象
+        runs = [{
+            'id': run['id'],
+            'name': 'CI',
+            'status': 'completed',
+            'conclusion': 'success',
+            'created_at': run['created_at'],
+            'updated_at': run['created_at'],
+            'head_commit': {'message': 'x' * 512, 'author': {'name': 'bench', 'email': 'bench@example.com'}},
+            'repository': {'full_name': 'bench/repo', 'description': 'y' * 512},
+        } for run in selected]
+        if page * per_page < total:
+            base = f"http://{self.headers.get('Host')}{urlparse(self.path).path}"
+            headers['Link'] = f'<{base}?per_page={per_page}&page={page + 1}>; rel="next"'
+        self._send(200, json.dumps({'total_count': total, 'workflow_runs': runs}), headers=headers)
+
+    do_GET = _handle
+    do_DELETE = _handle
+
+
+def start_github_stub(port: int = 0, **options) -> GitHubStubServer:
+    """在后台线程中启动桩服务器，port 为 0 时自动分配端口"""
+    server = GitHubStubServer(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, name="github-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub 工作流运行接口桩服务器")
+    parser.add_argument('--port', type=int, default=18081, help="监听端口，默认 18081")
+    parser.add_argument('--runs', type=int, default=1000, help="初始工作流运行数量，默认 1000")
+    parser.add_argument('--latency', type=float, default=50, help="响应延迟，单位：毫秒，默认 50")
+    parser.add_argument('--rate-limit', type=int, default=5000, help="主限流每个窗口的请求额度，默认 5000")
+    parser.add_argument('--rate-window', type=int, default=3600, help="主限流窗口秒数，默认 3600")
+    parser.add_argument('--secondary-rate', type=float, default=0,
+                        help="二级限流：每秒 DELETE 上限，超出返回 403 + Retry-After，默认 0（不限制）")
+    parser.add_argument('--retry-after', type=int, default=2, help="二级限流响应的 Retry-After 秒数，默认 2")
+    args = parser.parse_args()
+
+    server = start_github_stub(args.port, runs=args.runs, latency=args.latency / 1000,
+                               rate_limit=args.rate_limit, rate_window=args.rate_window,
+                               secondary_rate=args.secondary_rate, retry_after=args.retry_after)
+    print(f"GitHub 桩服务器已启动: http://127.0.0.1:{server.server_address[1]}（GET /__stats 查看统计）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
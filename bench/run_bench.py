@@ -0,0 +1,138 @@
+# bench/run_bench.py
+# 端到端压测：启动本地桩服务器，生成合成账号，在临时目录中以子进程运行完整的 main.py 流程，
+# 统计总耗时、账号吞吐、请求吞吐、子进程峰值内存以及签到结果分布。
+# 用法示例：python bench/run_bench.py --glados 1000 --ikuuu 1000 --latency 50 --max-workers 16
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, Any, Optional
+
+from stub_server import start_stub_server, add_stub_arguments, config_from_args
+from gen_accounts import account_env
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计峰值内存
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _peak_child_rss_mb() -> Optional[float]:
+    """已结束子进程中的最大常驻内存，单位：MB（Linux 下 ru_maxrss 单位为 KB，macOS 为字节）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _summarize_status(status_file: str) -> Dict[str, int]:
+    """统计 status.json 中的成功/失败账号数"""
+    if not os.path.exists(status_file):
+        return {}
+    with open(status_file, 'r', encoding='utf-8') as f:
+        status = json.load(f)
+    counter = Counter('success' if record.get('success') else 'failed' for record in status.values())
+    return dict(counter)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    server = start_stub_server(config_from_args(args))
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    env = {
+        key: value for key, value in os.environ.items()
+        # 不向真实渠道推送，也不读取真实账号
+        if key not in ('SERVERCHAN_KEY', 'PUSHPLUS_TOKEN', 'TG_BOT_TOKEN', 'TG_CHAT_ID',
+                       'GR_COOKIE', 'IKUUU_COOKIE', 'GLADOS_BASE_URL', 'IKUUU_BASE_URL')
+    }
+    env.update(account_env(args.glados, args.ikuuu, base_url))
+    env.update({
+        'RUN_ENV': 'prod',
+        'EXECUTION_MODE': args.mode,
+        'PYTHONPATH': REPO_ROOT,
+    })
+    if args.max_workers:
+        env['MAX_WORKERS'] = str(args.max_workers)
+        env.setdefault('HTTP_POOL_MAXSIZE', str(args.max_workers))
+    if args.no_rate_limit:
+        env['RATE_LIMIT_ENABLED'] = '0'
+
+    with tempfile.TemporaryDirectory(prefix="checkin-bench-") as workdir:
+        log_path = os.path.join(workdir, 'main.log')
+        started = time.perf_counter()
+        with open(log_path, 'w', encoding='utf-8') as log:
+            returncode = subprocess.call(
+                [sys.executable, os.path.join(REPO_ROOT, 'main.py')],
+                cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+        wall_time = time.perf_counter() - started
+        outcomes = _summarize_status(os.path.join(workdir, 'status.json'))
+        if returncode != 0 or args.keep_log:
+            with open(log_path, 'r', encoding='utf-8') as log:
+                tail = log.readlines()[-20:]
+            print(''.join(tail))
+
+    stats = server.snapshot()
+    server.shutdown()
+
+    accounts = args.glados + args.ikuuu
+    requests_total = stats.get('requests', 0)
+    return {
+        'accounts': accounts,
+        'mode': args.mode,
+        'max_workers': args.max_workers or 'default',
+        'rate_limit': not args.no_rate_limit,
+        'returncode': returncode,
+        'wall_time': round(wall_time, 3),
+        'accounts_per_sec': round(accounts / wall_time, 2) if wall_time else None,
+        'requests': requests_total,
+        'requests_per_sec': round(requests_total / wall_time, 2) if wall_time else None,
+        'peak_rss_mb': round(_peak_child_rss_mb(), 1) if resource is not None else None,
+        'outcomes': outcomes,
+        'responses': {key: value for key, value in sorted(stats.items()) if ':' in key},
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print("\n=== 压测结果 ===")
+    print(f"账号数:       {report['accounts']} (模式 {report['mode']}, 并发 {report['max_workers']}, "
+          f"限流 {'开启' if report['rate_limit'] else '关闭'})")
+    print(f"总耗时:       {report['wall_time']:.2f} 秒")
+    print(f"账号吞吐:     {report['accounts_per_sec']} 个/秒")
+    print(f"请求数:       {report['requests']}")
+    print(f"请求吞吐:     {report['requests_per_sec']} 次/秒")
+    peak = report['peak_rss_mb']
+    print(f"峰值内存:     {f'{peak} MB' if peak is not None else '不支持统计'}")
+    print(f"签到结果:     {report['outcomes']}")
+    print("桩服务器响应:")
+    for key, value in report['responses'].items():
+        print(f"  - {key}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基于本地桩服务器的端到端压测")
+    parser.add_argument('--glados', type=int, default=500, help="GLaDOS 合成账号数量，默认 500")
+    parser.add_argument('--ikuuu', type=int, default=500, help="iKuuu 合成账号数量，默认 500")
+    parser.add_argument('--mode', choices=('thread', 'async'), default='thread', help="执行模式，默认 thread")
+    parser.add_argument('--max-workers', type=int, default=0, help="全局并发数，默认使用程序默认值")
+    parser.add_argument('--no-rate-limit', action='store_true', help="关闭按服务的请求限流，测量执行器的极限吞吐")
+    parser.add_argument('--output', type=str, default=None, help="将结果以 JSON 追加写入该文件")
+    parser.add_argument('--keep-log', action='store_true', help="输出 main.py 日志的最后 20 行")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
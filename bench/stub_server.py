@@ -0,0 +1,204 @@
+# bench/stub_server.py
+# 压测用的本地桩服务器，模拟 GLaDOS 的 /api/user/checkin、/api/user/status 和 iKuuu 的 /user/checkin。
+# 可配置响应延迟、5xx 错误率、重复签到、cookie 过期页面和 429 限流的比例，并统计各类响应数量。
+# 也可单独运行：python bench/stub_server.py --port 18080 --latency 50
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any
+
+EXPIRED_HTML = "<html><head><title>登录</title></head><body>请先登录</body></html>"
+
+
+class StubConfig:
+    """桩服务器的响应行为配置，各比例为 0~1 的概率"""
+
+    def __init__(self,
+                 latency: float = 0.05,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 repeat_rate: float = 0.0,
+                 expired_rate: float = 0.0,
+                 throttle_rate: float = 0.0,
+                 retry_after: int = 1,
+                 seed: int = None):
+        self.latency = latency  # 基础响应延迟，单位：秒
+        self.jitter = jitter  # 延迟随机浮动比例
+        self.error_rate = error_rate  # 返回 500 的比例
+        self.repeat_rate = repeat_rate  # 返回“已签到”的比例
+        self.expired_rate = expired_rate  # 返回 cookie 过期的比例
+        self.throttle_rate = throttle_rate  # 返回 429 的比例
+        self.retry_after = retry_after  # 429 响应的 Retry-After 秒数
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def roll(self) -> str:
+        """按配置的比例抽取本次响应的类型"""
+        with self.lock:
+            value = self.random.random()
+        for outcome, rate in (('error', self.error_rate),
+                              ('throttle', self.throttle_rate),
+                              ('expired', self.expired_rate),
+                              ('repeat', self.repeat_rate)):
+            if value < rate:
+                return outcome
+            value -= rate
+        return 'ok'
+
+    def delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self.lock:
+            return max(0.0, self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, config: StubConfig):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    def record(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.stats_lock:
+            return dict(self.stats)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和正文缓冲后一次写出，避免分两个 TCP 包发送时触发延迟确认带来的额外 40ms
+    wbufsize = 64 * 1024
+    server: StubServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = 'application/json', headers: Dict[str, str] = None):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, data: Dict[str, Any]):
+        self._send(200, json.dumps(data, ensure_ascii=False))
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        path = self.path.split('?')[0]
+        if path == '/__stats':
+            self._send_json(self.server.snapshot())
+            return
+
+        config = self.server.config
+        time.sleep(config.delay())
+        self.server.record('requests')
+
+        if path == '/':
+            self.server.record('probe')
+            self._send(200, 'ok', 'text/plain')
+            return
+        if path not in ('/api/user/checkin', '/api/user/status', '/user/checkin'):
+            self.server.record('not_found')
+            self._send(404, 'not found', 'text/plain')
+            return
+
+        outcome = config.roll() if path != '/api/user/status' else 'ok'
+        self.server.record(f"{path}:{outcome}")
+        if outcome == 'error':
+            self._send(500, 'internal server error', 'text/plain')
+        elif outcome == 'throttle':
+            self._send(429, 'too many requests', 'text/plain', {'Retry-After': str(config.retry_after)})
+        elif path == '/api/user/status':
+            self._send_json({'code': 0, 'data': {'email': 'bench@example.com', 'leftDays': '42.000000'}})
+        elif path == '/api/user/checkin':
+            self._glados_checkin(outcome)
+        else:
+            self._ikuuu_checkin(outcome)
+
+    def _glados_checkin(self, outcome: str):
+        if outcome == 'repeat':
+            self._send_json({'code': 1, 'message': 'Checkin Repeats! Please Try Tomorrow'})
+        elif outcome == 'expired':
+            self._send_json({'code': -2, 'message': 'please login'})
+        else:
+            self._send_json({'code': 0, 'message': 'Checkin! Got 1 Points'})
+
+    def _ikuuu_checkin(self, outcome: str):
+        if outcome == 'repeat':
+            self._send_json({'ret': 0, 'msg': '您似乎已经签到过了...'})
+        elif outcome == 'expired':
+            self._send(200, EXPIRED_HTML, 'text/html; charset=utf-8')
+        else:
+            self._send_json({'ret': 1, 'msg': '你获得了 1024 MB流量'})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+def start_stub_server(config: StubConfig, port: int = 0) -> StubServer:
+    """在后台线程中启动桩服务器，port 为 0 时自动分配端口"""
+    server = StubServer(('127.0.0.1', port), config)
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """桩服务器行为相关的命令行参数，供单独运行和压测脚本共用"""
+    parser.add_argument('--latency', type=float, default=50, help="响应延迟，单位：毫秒，默认 50")
+    parser.add_argument('--jitter', type=float, default=0.2, help="延迟随机浮动比例，默认 0.2")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回 500 的比例")
+    parser.add_argument('--repeat-rate', type=float, default=0.0, help="返回“已签到”的比例")
+    parser.add_argument('--expired-rate', type=float, default=0.0, help="返回 cookie 过期的比例")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="返回 429 的比例")
+    parser.add_argument('--retry-after', type=int, default=1, help="429 响应的 Retry-After 秒数，默认 1")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子，用于复现结果")
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency=args.latency / 1000,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        repeat_rate=args.repeat_rate,
+        expired_rate=args.expired_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GLaDOS / iKuuu 签到接口桩服务器")
+    parser.add_argument('--port', type=int, default=18080, help="监听端口，默认 18080")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_stub_server(config_from_args(args), args.port)
+    print(f"桩服务器已启动: http://127.0.0.1:{server.server_address[1]}（GET /__stats 查看统计）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
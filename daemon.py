@@ -0,0 +1,380 @@
+# daemon.py
+# 常驻模式：进程长期运行，服务实例和连接池保持复用，由内置调度器在每日时间窗口内为每个账号
+# 随机安排签到时间，失败的账号在当天稍后自动重试；状态保存在内存中并通过 status_manager 持久化。
+# 当日所有账号的调度完成后发送一份当日汇总报告。
+# 发送 SIGUSR1 信号或请求本地控制端口可立即执行所有待签到账号。
+import argparse
+import calendar
+import heapq
+import itertools
+import json
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+
+from status_manager import read_prior_status, beijing_now
+from account_registry import AccountRegistry, AccountEntry
+from result_sinks import SinkFanout, StatusSink, HistorySink, ReportSink, MetricsSink
+from notification_outbox import deliver, RUN_ID
+import metrics
+from logger import get_logger, flush_logs, SUMMARY
+
+if TYPE_CHECKING:
+    from services.base_service import CheckinResult
+
+logger = get_logger(__name__)
+
+# 每日签到时间窗口（北京时间），可通过环境变量 DAEMON_WINDOW 覆盖
+DEFAULT_WINDOW = "08:00-12:00"
+# 失败账号的重试间隔，可通过环境变量 DAEMON_RETRY_INTERVAL 覆盖，单位：秒
+DEFAULT_RETRY_INTERVAL = 3600
+# 每个账号每天最多执行的轮次（包括首次），可通过环境变量 DAEMON_MAX_DAILY_RUNS 覆盖
+DEFAULT_MAX_DAILY_RUNS = 4
+# 窗口已过时启动，待签到账号在该秒数内随机执行
+LATE_START_JITTER = 60
+# 调度循环的最长休眠时间，用于及时发现跨天，单位：秒
+MAX_SLEEP = 300
+
+BEIJING_OFFSET = 8 * 3600
+
+
+def _beijing_timestamp(day: datetime, minutes: int) -> float:
+    """北京时间某日零点后 minutes 分钟对应的时间戳"""
+    midnight = calendar.timegm((day.year, day.month, day.day, 0, 0, 0))
+    return midnight - BEIJING_OFFSET + minutes * 60
+
+
+def _format_beijing(timestamp: float) -> str:
+    return (datetime.utcfromtimestamp(timestamp) + timedelta(hours=8)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_window(value: str) -> Tuple[int, int]:
+    """解析 HH:MM-HH:MM 格式的时间窗口，返回 (开始分钟, 结束分钟)"""
+    try:
+        start, end = value.split('-')
+        start_h, start_m = (int(part) for part in start.strip().split(':'))
+        end_h, end_m = (int(part) for part in end.strip().split(':'))
+        start_minutes, end_minutes = start_h * 60 + start_m, end_h * 60 + end_m
+        if not 0 <= start_minutes < end_minutes <= 24 * 60:
+            raise ValueError
+        return start_minutes, end_minutes
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"时间窗口格式应为 HH:MM-HH:MM，且开始早于结束，实际为: {value}")
+
+
+def _get_number_env(name: str, default: float) -> float:
+    raw = os.environ.get(name, '').strip()
+    try:
+        return float(raw) if raw else default
+    except ValueError:
+        logger.warning("%s 配置无效: %s，使用默认值 %s", name, raw, default)
+        return default
+
+
+class CheckinDaemon:
+    """
+    常驻签到调度器。
+    调度队列为 (到期时间戳, 序号, 账号哈希) 的小顶堆，到期的账号合并为一批交给执行器并发签到，
+    每批结束后写出 status.json；当日结果按账号汇总，当日调度全部完成时发送一份报告。
+    """
+
+    def __init__(self,
+                 window: Tuple[int, int],
+                 retry_interval: float,
+                 max_daily_runs: int):
+        from main import get_enabled_services
+        from services.request_tracer import install_tracer_from_env
+
+        self.window = window
+        self.retry_interval = retry_interval
+        self.max_daily_runs = max(1, max_daily_runs)
+
+        install_tracer_from_env()
+        self.services = get_enabled_services()
+        self.registry = AccountRegistry.build(self.services)
+        for name, error in self.registry.service_errors.items():
+            logger.error("服务 %s 执行异常: %s", name, error)
+        # 账号在当日报告中的位置，与配置顺序一致
+        self.slots: Dict[str, int] = {entry.hashed_id: slot for slot, entry in enumerate(self.registry.entries)}
+
+        self.day: Optional[str] = None  # 当前调度日（北京时间）
+        self.status_sink: Optional[StatusSink] = None
+        self.runs: Dict[str, int] = {}  # 当天各账号已执行的轮次
+        self.day_results: Dict[int, "CheckinResult"] = {}  # 当日尚未发送报告的各账号最新结果
+        self.schedule: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._run_now = False
+        self._stopping = False
+
+    # ---- 外部控制 ----
+
+    def trigger(self):
+        """立即执行所有待签到账号（可在信号处理函数或其他线程中调用）"""
+        self._run_now = True
+        self._wakeup.set()
+
+    def stop(self):
+        """当前批次结束后退出"""
+        self._stopping = True
+        self._wakeup.set()
+
+    def snapshot(self) -> Dict:
+        """当前调度状态，账号只以哈希标识"""
+        with self._lock:
+            next_due = self.schedule[0][0] if self.schedule else None
+            return {
+                'day': self.day,
+                'pending': len(self.schedule),
+                'next_run': _format_beijing(next_due) if next_due else None,
+                'status': dict(self.status_sink.status) if self.status_sink else {},
+            }
+
+    # ---- 调度 ----
+
+    def _push(self, due: float, hashed_id: str):
+        heapq.heappush(self.schedule, (due, next(self._seq), hashed_id))
+
+    def _plan_day(self, prior_status: Dict[str, dict]):
+        """为新的一天安排所有账号的签到时间：窗口内随机分布，已成功的账号跳过"""
+        now = time.time()
+        today = beijing_now()
+        window_start = _beijing_timestamp(today, self.window[0])
+        window_end = _beijing_timestamp(today, self.window[1])
+
+        self.status_sink = StatusSink(self.registry.hash_of)
+        self.status_sink.status.update(prior_status)
+        self.runs = {}
+        self.schedule = []
+
+        planned = 0
+        for entry in self.registry.entries:
+            record = prior_status.get(entry.hashed_id)
+            if record and record.get("success") is True:
+                continue
+            if now < window_end:
+                due = random.uniform(max(now, window_start), window_end)
+            else:
+                due = now + random.uniform(0, LATE_START_JITTER)
+            self._push(due, entry.hashed_id)
+            planned += 1
+
+        logger.log(SUMMARY, "\n=== %s 已安排 %d 个账号的签到，%d 个账号今日已成功 ===",
+                   self.day, planned, len(self.registry.entries) - planned)
+
+    def _roll_day(self):
+        """北京时间跨天时重新安排调度；启动时首次调用会读取已有的当日状态"""
+        day = beijing_now().strftime('%Y-%m-%d')
+        if day == self.day:
+            return
+        first_run = self.day is None
+        if not first_run:
+            # 前一天仍有未发送的结果（例如停止在重试等待期间）时先发送
+            self._notify_day()
+        with self._lock:
+            self.day = day
+            prior_status = {}
+            if first_run:
+                # status.json 中的记录可能来自前一天，只保留签到日期为今天（北京时间）的记录
+                prior = read_prior_status()
+                if isinstance(prior, dict):
+                    prior_status = {
+                        hashed_id: record for hashed_id, record in prior.items()
+                        if isinstance(record, dict) and str(record.get("checkin_time", "")).startswith(day)
+                    }
+            self._plan_day(prior_status)
+
+    def _pop_due(self) -> List[AccountEntry]:
+        """取出所有到期的账号；收到立即执行请求时取出全部待签到账号"""
+        now = time.time()
+        force = self._run_now
+        self._run_now = False
+        due = []
+        with self._lock:
+            while self.schedule and (force or self.schedule[0][0] <= now):
+                _, _, hashed_id = heapq.heappop(self.schedule)
+                entry = self.registry.get(hashed_id)
+                if entry is not None:
+                    due.append(entry)
+        if force and not due:
+            logger.log(SUMMARY, "收到立即执行请求，但今日没有待签到的账号。")
+        return due
+
+    def _next_wait(self) -> float:
+        with self._lock:
+            wait = self.schedule[0][0] - time.time() if self.schedule else MAX_SLEEP
+        return max(0.0, min(wait, MAX_SLEEP))
+
+    # ---- 执行 ----
+
+    def _run_batch(self, entries: List[AccountEntry]):
+        from runner import create_runner
+        from history_store import get_history_db_path
+
+        logger.log(SUMMARY, "\n=== %s 开始签到 %d 个账号 ===", beijing_now().strftime('%H:%M:%S'), len(entries))
+        sinks = [self.status_sink]
+        if get_history_db_path():
+            sinks.append(HistorySink(self.registry.hash_of))
+        sinks.append(MetricsSink())
+        batch_sink = SinkFanout(sinks)
+
+        failed: List[AccountEntry] = []
+
+        def on_result(index, result):
+            with self._lock:
+                batch_sink.on_result(index, result)
+                # 重试后的结果覆盖同一账号之前的结果
+                self.day_results[self.slots[entries[index].hashed_id]] = result
+            if not result.success:
+                failed.append(entries[index])
+
+        with metrics.timer('checkin'):
+            create_runner().run([(entry.service, entry.config) for entry in entries], on_result=on_result)
+        with self._lock:
+            batch_sink.close()
+
+        # 失败的账号在当天稍后重试，超过每日轮次上限或已跨天则不再安排
+        day_end = _beijing_timestamp(beijing_now(), 24 * 60)
+        with self._lock:
+            for entry in entries:
+                self.runs[entry.hashed_id] = self.runs.get(entry.hashed_id, 0) + 1
+            for entry in failed:
+                due = time.time() + self.retry_interval * random.uniform(0.9, 1.1)
+                if self.runs[entry.hashed_id] < self.max_daily_runs and due < day_end:
+                    self._push(due, entry.hashed_id)
+                    logger.warning("%s 账号 %s 签到失败，将于北京时间 %s 重试。", entry.service.service_name,
+                                   entry.service._desensitize_account_id(entry.account_id), _format_beijing(due))
+
+        # 常驻进程的指标为启动以来的累计值，每个批次结束后刷新指标文件
+        metrics.write_metrics()
+
+    def _notify_day(self):
+        """发送当日汇总报告：当日调度全部完成、跨天或停止时调用，没有新结果时不发送"""
+        with self._lock:
+            results, self.day_results = self.day_results, {}
+            day = self.day
+        if not results:
+            return
+        from notifications import send_notification
+
+        report_sink = ReportSink()
+        for slot in sorted(results):
+            report_sink.on_result(slot, results[slot])
+        report_sink.close()
+
+        logger.log(SUMMARY, "\n=== 开始发送 %s 的签到报告 ===", day)
+        with metrics.timer('notification'):
+            deliver(report_sink.title, report_sink.report, send_notification, run_key=f"daemon-{day}-{RUN_ID}")
+        logger.log(SUMMARY, "=== 通知流程结束 ===")
+
+    def serve_forever(self):
+        """调度主循环，直到收到停止信号"""
+        if not self.registry.entries:
+            logger.error("没有任何账号配置，常驻模式退出。")
+            return
+        while not self._stopping:
+            self._roll_day()
+            entries = self._pop_due()
+            if entries:
+                self._run_batch(entries)
+                with self._lock:
+                    drained = not self.schedule
+                if drained:
+                    self._notify_day()
+                continue
+            flush_logs()  # 休眠前写出本批次缓冲的日志
+            self._wakeup.wait(self._next_wait())
+            self._wakeup.clear()
+        self._notify_day()
+        logger.log(SUMMARY, "常驻模式已停止。")
+
+
+def start_control_server(daemon: CheckinDaemon, port: int) -> ThreadingHTTPServer:
+    """
+    启动仅监听本机的控制端口：
+    - POST /run    立即执行所有待签到账号
+    - GET  /status 查看调度状态
+    - GET  /metrics Prometheus 文本格式的运行指标
+    """
+
+    class ControlHandler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, payload: Dict):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != '/run':
+                self._reply(404, {'error': 'not found'})
+                return
+            daemon.trigger()
+            self._reply(202, {'message': '已触发立即执行'})
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                body = metrics.METRICS.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if self.path != '/status':
+                self._reply(404, {'error': 'not found'})
+                return
+            self._reply(200, daemon.snapshot())
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), ControlHandler)
+    threading.Thread(target=server.serve_forever, name="daemon-control", daemon=True).start()
+    logger.log(SUMMARY, "控制端口已启动: http://127.0.0.1:%d（POST /run 立即执行，GET /status 查看状态，GET /metrics 查看指标）", port)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自动签到常驻模式")
+    parser.add_argument('--window', type=parse_window,
+                        default=os.environ.get('DAEMON_WINDOW', DEFAULT_WINDOW),
+                        help=f"每日签到时间窗口（北京时间），格式 HH:MM-HH:MM，默认 {DEFAULT_WINDOW}")
+    parser.add_argument('--retry-interval', type=float,
+                        default=_get_number_env('DAEMON_RETRY_INTERVAL', DEFAULT_RETRY_INTERVAL),
+                        help=f"失败账号的重试间隔秒数，默认 {DEFAULT_RETRY_INTERVAL}")
+    parser.add_argument('--max-daily-runs', type=int,
+                        default=int(_get_number_env('DAEMON_MAX_DAILY_RUNS', DEFAULT_MAX_DAILY_RUNS)),
+                        help=f"每个账号每天最多执行的轮次，默认 {DEFAULT_MAX_DAILY_RUNS}")
+    parser.add_argument('--control-port', type=int,
+                        default=int(_get_number_env('DAEMON_CONTROL_PORT', 0)),
+                        help="本机控制端口，0 表示不启用（默认）")
+    parser.add_argument('--run-now', action='store_true', help="启动后立即执行所有待签到账号")
+    args = parser.parse_args()
+
+    logger.log(SUMMARY, "自动签到常驻模式启动\n")
+    daemon = CheckinDaemon(args.window, args.retry_interval, args.max_daily_runs)
+
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: daemon.trigger())
+        logger.log(SUMMARY, "发送 SIGUSR1 信号可立即执行: kill -USR1 %d", os.getpid())
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: daemon.stop())
+
+    if args.control_port:
+        start_control_server(daemon, args.control_port)
+    if args.run_now:
+        daemon.trigger()
+
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# history_store.py
+# 可选的 SQLite 签到历史存储，以及用于查询失败连续天数、成功率和剩余天数预测的命令行工具。
+# 设置环境变量 CHECKIN_HISTORY_DB 为数据库文件路径即可启用，仅依赖标准库。
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional, Callable
+from logger import get_logger
+from status_manager import beijing_now
+
+logger = get_logger(__name__)
+
+HISTORY_DB_ENV = "CHECKIN_HISTORY_DB"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkin_history (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id        TEXT    NOT NULL,
+    account_hash  TEXT    NOT NULL,
+    service_name  TEXT    NOT NULL,
+    checkin_date  TEXT    NOT NULL,
+    checkin_time  TEXT,
+    success       INTEGER NOT NULL,
+    message       TEXT,
+    duration      REAL,
+    left_days     INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_history_account_date ON checkin_history (account_hash, checkin_date);
+CREATE INDEX IF NOT EXISTS idx_history_service_date ON checkin_history (service_name, checkin_date);
+"""
+
+
+def get_history_db_path() -> Optional[str]:
+    """读取历史数据库路径，未配置时返回 None 表示不启用"""
+    return os.environ.get(HISTORY_DB_ENV, "").strip() or None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(str(value).split(".")[0])
+    except (TypeError, ValueError):
+        return None
+
+
+class HistoryStore:
+    """签到历史存储，每次运行的所有记录在同一个事务中批量写入"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record_run(self, results: Iterable, hash_func: Callable[[str], str]) -> int:
+        """
+        批量写入一次运行的签到结果。
+        从 status.json 跳过的账号（data 中带有 skipped 标志）和服务级异常不会写入，避免重复统计。
+
+        :param results: CheckinResult 序列
+        :param hash_func: 账号标识到哈希的映射函数
+        :return: 写入的记录数
+        """
+        run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+        rows = []
+        for result in results:
+            if result is None or result.account_id == "服务异常" or result.data.get("skipped"):
+                continue
+            checkin_time = result.checkin_time or ""
+            rows.append((
+                run_id,
+                hash_func(result.account_id),
+                result.service_name,
+                checkin_time[:10] or beijing_now().strftime("%Y-%m-%d"),
+                checkin_time,
+                1 if result.success else 0,
+                result.message,
+                getattr(result, "duration", None),
+                _to_int(result.data.get("left_days")),
+            ))
+
+        with self.conn:  # 单个事务提交
+            self.conn.executemany(
+                "INSERT INTO checkin_history (run_id, account_hash, service_name, checkin_date, checkin_time, "
+                "success, message, duration, left_days) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def failure_streaks(self, min_streak: int = 1) -> List[Dict[str, Any]]:
+        """统计每个账号截至最近一天连续失败的天数（同一天内任意一次成功即视为当天成功）"""
+        cursor = self.conn.execute(
+            "SELECT account_hash, service_name, checkin_date, MAX(success) FROM checkin_history "
+            "GROUP BY account_hash, service_name, checkin_date "
+            "ORDER BY account_hash, checkin_date DESC"
+        )
+        streaks: Dict[tuple, Dict[str, Any]] = {}
+        for account_hash, service_name, checkin_date, day_success in cursor:
+            key = (account_hash, service_name)
+            item = streaks.get(key)
+            if item is None:
+                item = streaks[key] = {
+                    "account_hash": account_hash,
+                    "service_name": service_name,
+                    "streak": 0,
+                    "last_date": checkin_date,
+                    "open": True,
+                }
+            if item["open"]:
+                if day_success:
+                    item["open"] = False
+                else:
+                    item["streak"] += 1
+
+        result = []
+        for item in streaks.values():
+            if item["streak"] >= min_streak:
+                del item["open"]
+                result.append(item)
+        result.sort(key=lambda x: x["streak"], reverse=True)
+        return result
+
+    def success_rates(self, days: int = 30) -> List[Dict[str, Any]]:
+        """按服务统计最近 days 天的签到成功率和平均耗时"""
+        since = (beijing_now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        cursor = self.conn.execute(
+            "SELECT service_name, COUNT(*), SUM(success), AVG(duration) FROM checkin_history "
+            "WHERE checkin_date >= ? GROUP BY service_name ORDER BY service_name",
+            (since,),
+        )
+        return [
+            {
+                "service_name": service_name,
+                "attempts": total,
+                "success": success or 0,
+                "rate": (success or 0) / total if total else 0.0,
+                "avg_duration": avg_duration,
+            }
+            for service_name, total, success, avg_duration in cursor
+        ]
+
+    def days_remaining(self) -> List[Dict[str, Any]]:
+        """
+        根据每个账号最近一次记录的剩余天数，推算到期日期；
+        同时用最早一次记录计算每日消耗速度，便于发现剩余天数异常变化。
+        """
+        cursor = self.conn.execute(
+            "SELECT account_hash, service_name, MIN(checkin_date), MAX(checkin_date) FROM checkin_history "
+            "WHERE left_days IS NOT NULL GROUP BY account_hash, service_name"
+        )
+        projections = []
+        for account_hash, service_name, first_date, last_date in cursor.fetchall():
+            first_left = self._left_days_on(account_hash, first_date)
+            last_left = self._left_days_on(account_hash, last_date)
+            elapsed = (datetime.strptime(last_date, "%Y-%m-%d") - datetime.strptime(first_date, "%Y-%m-%d")).days
+            burn_rate = (first_left - last_left) / elapsed if elapsed > 0 else None
+            expiry = datetime.strptime(last_date, "%Y-%m-%d") + timedelta(days=last_left)
+            projections.append({
+                "account_hash": account_hash,
+                "service_name": service_name,
+                "last_date": last_date,
+                "left_days": last_left,
+                "burn_rate": burn_rate,
+                "projected_expiry": expiry.strftime("%Y-%m-%d"),
+            })
+        projections.sort(key=lambda x: x["projected_expiry"])
+        return projections
+
+    def _left_days_on(self, account_hash: str, checkin_date: str) -> int:
+        row = self.conn.execute(
+            "SELECT left_days FROM checkin_history WHERE account_hash = ? AND checkin_date = ? "
+            "AND left_days IS NOT NULL ORDER BY id DESC LIMIT 1",
+            (account_hash, checkin_date),
+        ).fetchone()
+        return row[0]
+
+
+def record_results(results: Iterable, hash_func: Callable[[str], str]):
+    """若配置了 CHECKIN_HISTORY_DB，则将本次运行结果写入历史数据库"""
+    db_path = get_history_db_path()
+    if not db_path:
+        return
+    try:
+        store = HistoryStore(db_path)
+        try:
+            count = store.record_run(results, hash_func)
+        finally:
+            store.close()
+        logger.info("已写入 %d 条签到历史到 '%s'", count, db_path)
+    except sqlite3.Error as e:
+        logger.error("写入签到历史失败: %s", e)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="查询签到历史数据库。")
+    parser.add_argument('--db', type=str, default=get_history_db_path(),
+                        help=f"SQLite 数据库路径，默认读取环境变量 {HISTORY_DB_ENV}。")
+    subparsers = parser.add_subparsers(dest='command')
+    streaks_parser = subparsers.add_parser('streaks', help="列出连续签到失败的账号。")
+    streaks_parser.add_argument('-m', '--min', type=int, default=1, help="最少连续失败天数，默认值是1。")
+    rates_parser = subparsers.add_parser('rates', help="按服务统计签到成功率。")
+    rates_parser.add_argument('-d', '--days', type=int, default=30, help="统计最近多少天，默认值是30。")
+    subparsers.add_parser('projection', help="根据剩余天数推算到期日期。")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    命令行入口。
+
+    :param argv: 命令行参数，默认读取 sys.argv
+    """
+    args = parse_args(argv)
+
+    if not args.db or not os.path.exists(args.db):
+        print("错误：未找到历史数据库，请通过 --db 或环境变量 CHECKIN_HISTORY_DB 指定。")
+        sys.exit(1)
+
+    store = HistoryStore(args.db)
+    try:
+        if args.command == 'streaks':
+            rows = store.failure_streaks(args.min)
+            print(f"连续失败的账号 ({len(rows)} 个):")
+            for row in rows:
+                print(f"  {row['service_name']:<8} {row['account_hash'][:12]}  "
+                      f"连续失败 {row['streak']} 天 (最近: {row['last_date']})")
+        elif args.command == 'rates':
+            print(f"最近 {args.days} 天各服务签到成功率:")
+            for row in store.success_rates(args.days):
+                avg = f"{row['avg_duration']:.2f}s" if row['avg_duration'] is not None else "-"
+                print(f"  {row['service_name']:<8} {row['success']}/{row['attempts']} "
+                      f"({row['rate']:.1%})  平均耗时 {avg}")
+        elif args.command == 'projection':
+            print("剩余天数预测:")
+            for row in store.days_remaining():
+                rate = f"{row['burn_rate']:.2f}/天" if row['burn_rate'] is not None else "-"
+                print(f"  {row['service_name']:<8} {row['account_hash'][:12]}  剩余 {row['left_days']} 天  "
+                      f"消耗 {rate}  预计到期 {row['projected_expiry']}")
+        else:
+            print("请指定子命令：streaks / rates / projection")
+            sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# http_transport.py
+# 进程级共享的 HTTP 传输层：所有签到服务、通知渠道和工作流清理脚本共用一个连接池会话，
+# 同一主机的连接保持 keep-alive 并在不同服务/线程间复用，同时统计新建与复用的连接数。
+# 开启请求计时时，连接层还会记录 DNS 解析、建立连接、TLS 握手和收到响应头的时间点。
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+try:
+    from urllib3.exceptions import NameResolutionError
+except ImportError:  # urllib3 1.x（requests < 2.30）没有该异常，连接阶段不计时，沿用 urllib3 原有实现
+    NameResolutionError = None
+
+import metrics
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+# 连接池默认配置，可通过环境变量覆盖
+DEFAULT_POOL_CONNECTIONS = 10  # 缓存的主机连接池数量
+DEFAULT_POOL_MAXSIZE = 16  # 每个主机保留的最大连接数，应不小于并发线程数
+
+_stats_lock = threading.Lock()
+_requests_by_host: Dict[str, int] = defaultdict(int)
+_connections_by_host: Dict[str, int] = defaultdict(int)
+
+_session = None
+_session_lock = threading.Lock()
+
+# 当前线程正在计时的请求的时间点（time.perf_counter），未开启计时时为 None
+_timing_local = threading.local()
+
+
+def start_request_timing() -> Dict[str, float]:
+    """
+    为当前线程接下来发出的请求开启计时，返回由连接层填写的时间点字典：
+    dns_start/dns_end、connect_start/connect_end、tls_end、request_start、response_start。
+    复用已有连接时不会出现 DNS 和连接相关的时间点。
+    """
+    marks = {}
+    _timing_local.marks = marks
+    return marks
+
+
+def stop_request_timing():
+    """结束当前线程的请求计时"""
+    _timing_local.marks = None
+
+
+def _timing_marks():
+    return getattr(_timing_local, 'marks', None)
+
+
+class _TimedConnectionMixin:
+    """在开启计时时记录连接各阶段的时间点，未开启时不做任何额外处理"""
+
+    def _new_conn(self):
+        marks = _timing_marks()
+        if marks is None or NameResolutionError is None or not hasattr(self, '_dns_host'):
+            return super()._new_conn()
+
+        # 先单独解析主机名以测量 DNS 耗时，再按解析顺序依次连接各地址（与 urllib3 的行为一致），
+        # 每个地址只尝试一次，全部失败时抛出最后一个错误，不再按主机名重新连接
+        marks['dns_start'] = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        marks['dns_end'] = marks['connect_start'] = time.perf_counter()
+
+        dns_host = self._dns_host
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+                    continue
+                marks['connect_end'] = time.perf_counter()
+                return sock
+        finally:
+            self._dns_host = dns_host
+        raise error
+
+    def request(self, *args, **kwargs):
+        marks = _timing_marks()
+        if marks is not None:
+            marks.setdefault('request_start', time.perf_counter())
+        return super().request(*args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        marks = _timing_marks()
+        if marks is not None:
+            marks['response_start'] = time.perf_counter()
+        return response
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        super().connect()
+        marks = _timing_marks()
+        if marks is not None and 'connect_end' in marks:
+            marks['tls_end'] = time.perf_counter()
+
+
+def _record_new_connection(host: str):
+    with _stats_lock:
+        _connections_by_host[host] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+    def _new_conn(self):
+        _record_new_connection(self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+    def _new_conn(self):
+        _record_new_connection(self.host)
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """统计请求数、新建连接数以及请求耗时、状态码和响应字节数的 HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        host = requests.utils.urlparse(request.url).hostname or ''
+        with _stats_lock:
+            _requests_by_host[host] += 1
+        stream = kwargs.get('stream', args[0] if args else False)
+        started = time.perf_counter()
+        try:
+            response = super().send(request, *args, **kwargs)
+            # 非流式请求由会话在返回前读取响应体，这里提前读取以便计入耗时和字节数
+            response_bytes = 0 if stream else len(response.content or b'')
+        except Exception as e:
+            metrics.inc('http_errors_total', host=host, error=type(e).__name__)
+            raise
+        metrics.record_http(host, response.status_code, time.perf_counter() - started, response_bytes)
+        return response
+
+
+def _get_int_env(name: str, default: int) -> int:
+    raw = os.environ.get(name, '').strip()
+    try:
+        return max(1, int(raw)) if raw else default
+    except ValueError:
+        logger.warning("%s 配置无效: %s，使用默认值 %s", name, raw, default)
+        return default
+
+
+def create_session() -> requests.Session:
+    """创建带有连接池配置的会话，不保存服务端下发的 cookie，避免不同账号之间串用"""
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = PooledHTTPAdapter(
+        pool_connections=_get_int_env('HTTP_POOL_CONNECTIONS', DEFAULT_POOL_CONNECTIONS),
+        pool_maxsize=_get_int_env('HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取进程级共享会话，首次调用时创建"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    连接池统计：请求总数、新建连接数、复用连接数，以及按主机的明细。
+    复用数 = 请求数 - 新建连接数。
+    """
+    with _stats_lock:
+        per_host = {
+            host: {
+                'requests': count,
+                'connections_opened': _connections_by_host.get(host, 0),
+                'connections_reused': max(0, count - _connections_by_host.get(host, 0)),
+            }
+            for host, count in _requests_by_host.items()
+        }
+    total_requests = sum(item['requests'] for item in per_host.values())
+    total_opened = sum(item['connections_opened'] for item in per_host.values())
+    return {
+        'requests': total_requests,
+        'connections_opened': total_opened,
+        'connections_reused': max(0, total_requests - total_opened),
+        'per_host': per_host,
+    }
+
+
+def print_pool_stats():
+    """打印连接池统计"""
+    stats = get_pool_stats()
+    if not stats['requests']:
+        return
+    logger.log(SUMMARY, "HTTP 连接池: 请求 %d 次, 新建连接 %d 个, 复用 %d 次",
+               stats['requests'], stats['connections_opened'], stats['connections_reused'])
+    for host, item in stats['per_host'].items():
+        logger.info("  - %s: 请求 %d, 新建 %d, 复用 %d",
+                    host, item['requests'], item['connections_opened'], item['connections_reused'])
@@ -0,0 +1,146 @@
+# logger.py
+# 日志层：基于标准库 logging，提供日志级别、惰性格式化（logger.info("... %s", arg)）、
+# 文本或 JSON Lines 输出，以及只输出摘要和错误的静默模式。
+# 日志先写入内存缓冲，缓冲满、遇到 SUMMARY 及以上级别或距上次输出超过刷新间隔时批量写出，
+# 后台线程按刷新间隔定时写出滞留的日志，
+# 进程退出时由 logging.shutdown 写出剩余日志。仅依赖标准库，可在启动预检阶段使用。
+#
+# 环境变量：
+#   LOG_LEVEL     日志级别 DEBUG / INFO / SUMMARY / WARNING / ERROR，默认 INFO
+#   LOG_QUIET     设置为 1 时等同于 LOG_LEVEL=SUMMARY，只输出各阶段摘要、警告和错误
+#   LOG_FORMAT    text（默认）或 json，json 时每行一条 JSON 记录
+#   LOG_BUFFER    缓冲的日志条数，默认 200，设置为 0 时不缓冲
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import MemoryHandler
+
+# 摘要级别：各阶段开始/完成、汇总统计等，静默模式下仍然输出
+SUMMARY = 25
+logging.addLevelName(SUMMARY, 'SUMMARY')
+
+ROOT_LOGGER_NAME = 'checkin'
+DEFAULT_BUFFER_CAPACITY = 200
+FLUSH_INTERVAL = 1.0  # 缓冲日志最长滞留时间，单位：秒
+
+# LogRecord 的标准属性，其余属性视为通过 extra 传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON，extra 中的字段（如 service、account）作为顶层键"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage().strip(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BufferedHandler(MemoryHandler):
+    """
+    内存缓冲的日志处理器：除容量和级别外，距上次输出超过 flush_interval 秒时同样写出。
+    后台守护线程按刷新间隔定时检查，没有新日志到来时缓冲中的日志也不会长时间滞留。
+    """
+
+    def __init__(self, capacity: int, flush_level: int, target: logging.Handler, flush_interval: float):
+        super().__init__(capacity, flushLevel=flush_level, target=target)
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="log-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            if self.buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return super().shouldFlush(record) or time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self):
+        super().flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self._closed.set()
+        super().close()
+
+
+def _env_level() -> int:
+    if os.environ.get('LOG_QUIET', '').strip().lower() in ('1', 'true', 'yes'):
+        return SUMMARY
+    raw = os.environ.get('LOG_LEVEL', '').strip().upper()
+    if not raw:
+        return logging.INFO
+    level = logging.getLevelName(raw)
+    if not isinstance(level, int):
+        sys.stdout.write(f"LOG_LEVEL 配置无效: {raw}，使用默认值 INFO\n")
+        return logging.INFO
+    return level
+
+
+def _env_buffer_capacity() -> int:
+    raw = os.environ.get('LOG_BUFFER', '').strip()
+    try:
+        return max(0, int(raw)) if raw else DEFAULT_BUFFER_CAPACITY
+    except ValueError:
+        return DEFAULT_BUFFER_CAPACITY
+
+
+def setup_logging(force: bool = False):
+    """根据环境变量配置日志输出，重复调用时只在 force=True 时重新配置"""
+    global _configured
+    with _setup_lock:
+        if _configured and not force:
+            return
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+
+        # 与原有输出保持一致，全部写入标准输出，避免与标准错误交错
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if os.environ.get('LOG_FORMAT', '').strip().lower() == 'json':
+            stream_handler.setFormatter(JsonLinesFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter('%(message)s'))
+
+        capacity = _env_buffer_capacity()
+        if capacity > 0:
+            handler = BufferedHandler(capacity, SUMMARY, stream_handler, FLUSH_INTERVAL)
+        else:
+            handler = stream_handler
+        root.addHandler(handler)
+        root.setLevel(_env_level())
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块日志器，首次调用时按环境变量完成配置"""
+    if not _configured:
+        setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def flush_logs():
+    """立即写出缓冲中的日志，例如在直接使用 print 输出之前"""
+    for handler in logging.getLogger(ROOT_LOGGER_NAME).handlers:
+        handler.flush()
@@ -1,58 +1,67 @@
 # main.py
+import argparse
+import atexit
 import os
-import hashlib
-from typing import List, Tuple
-from datetime import datetime
-from services.base_service import CheckinService, CheckinResult
-from services.glados_service import GLaDOSService
-from services.ikuuu_service import IkuuuService
-from notifications import send_notification
-from status_manager import read_prior_status, write_current_status
-
-
-def _hash_account_id(account_id: str) -> str:
-    """使用 SHA-256 对 account_id 进行哈希处理，保护敏感信息"""
-    return hashlib.sha256(account_id.encode("utf-8")).hexdigest()
-
-
-def get_enabled_services() -> List[CheckinService]:
+import time
+from typing import List, Tuple, TYPE_CHECKING
+from status_manager import read_prior_status, beijing_now
+from account_registry import AccountRegistry
+from preflight import all_accounts_done
+from result_sinks import SinkFanout, StatusSink, HistorySink, ReportSink, ShardReportSink, MetricsSink
+from report_renderer import ReportRenderer
+from notification_outbox import NotificationOutbox, deliver, has_pending_notifications
+from shard import parse_shard, shard_of, shard_file_names
+import metrics
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+# requests、各服务及通知模块在预检确认有任务需要执行后才导入，见 __main__
+if TYPE_CHECKING:
+    from services.base_service import CheckinService, CheckinResult
+
+
+def get_enabled_services() -> List["CheckinService"]:
     """
     检测环境变量，初始化所有已启用的服务。
     """
-    services: List[CheckinService] = []
-    print("=== 开始检测并加载服务 ===\n")
+    from services.glados_service import GLaDOSService
+    from services.ikuuu_service import IkuuuService
+
+    services: List["CheckinService"] = []
+    logger.log(SUMMARY, "=== 开始检测并加载服务 ===\n")
 
     # 检测 GLaDOS 服务
     glados_cookie = os.environ.get("GR_COOKIE")
     if glados_cookie:
-        print("检测到 GR_COOKIE, 启用 GLaDOS 服务。")
+        logger.info("检测到 GR_COOKIE, 启用 GLaDOS 服务。")
         try:
             services.append(GLaDOSService())
         except Exception as e:
-            print(f"GLaDOS 服务初始化失败: {e}")
+            logger.error("GLaDOS 服务初始化失败: %s", e)
     else:
-        print("未检测到 GR_COOKIE, 跳过 GLaDOS 服务。")
+        logger.info("未检测到 GR_COOKIE, 跳过 GLaDOS 服务。")
 
     # 检测 iKuuu 服务
     ikuuu_cookie = os.environ.get("IKUUU_COOKIE")
     if ikuuu_cookie:
-        print("检测到 IKUUU_COOKIE, 启用 iKuuu 服务。")
+        logger.info("检测到 IKUUU_COOKIE, 启用 iKuuu 服务。")
         try:
             services.append(IkuuuService())
         except Exception as e:
-            print(f"iKuuu 服务初始化失败: {e}")
+            logger.error("iKuuu 服务初始化失败: %s", e)
     else:
-        print("未检测到 IKUUU_COOKIE, 跳过 iKuuu 服务。")
+        logger.info("未检测到 IKUUU_COOKIE, 跳过 iKuuu 服务。")
 
     # 未来可在此处添加更多服务的检测...
     # if os.environ.get("NEW_SITE_CONFIG"):
     #     services.append(NewSiteService())
 
-    print(f"\n=== 服务加载完成，共启用 {len(services)} 个服务 ===\n")
+    logger.log(SUMMARY, "\n=== 服务加载完成，共启用 %d 个服务 ===\n", len(services))
     return services
 
 
-def format_results_for_notification(all_results: List[CheckinResult]) -> str:
+def format_results_for_notification(all_results: List["CheckinResult"]) -> str:
     """
     格式化所有结果为通知内容
     """
@@ -108,79 +117,29 @@ def format_results_for_notification(all_results: List[CheckinResult]) -> str:
     return "\n".join(report_lines)
 
 
-def format_results_for_serverchan(all_results: List[CheckinResult]) -> Tuple[str, str]:
+def format_results_for_serverchan(all_results: List["CheckinResult"]) -> Tuple[str, str]:
     """
     极简对齐版签到结果格式化
     返回: (title, final_report)
     title格式: "自动签到 总数/成功/失败"
     正文使用 ✓ 和 ✗ 符号
+    列宽与统计在一次遍历中完成，见 report_renderer.ReportRenderer
     """
-    if not all_results:
-        return "自动签到 0/0/0", "无签到任务"
-
-    # 计算各列最大宽度
-    max_service_len = min(
-        10, max(len(r.service_name) for r in all_results)
-    )  # 限制最大10字符
-    max_account_len = min(
-        10, max(len(r.account_id) for r in all_results)
-    )  # 限制最大10字符
-    max_message_len = min(
-        15, max(len(r.message) for r in all_results)
-    )  # 限制最大15字符
-
-    lines = []
-    for result in all_results:
-        # 处理账号显示
-        account = (
-            (result.account_id[:10] + "..")
-            if len(result.account_id) > 10
-            else result.account_id
-        )
-        if result.service_name == "GLaDOS":
-            account = result.account_id[:10]  # GLaDOS只显示前10字符
-
-        # 处理service_name和message的长度限制
-        service_name = (
-            (result.service_name[:10] + "..")
-            if len(result.service_name) > 10
-            else result.service_name
-        )
-        message = (
-            (result.message[:15] + "..") if len(result.message) > 15 else result.message
-        )
-
-        # 构建状态和数据部分 - 使用 ✓ 和 ✗ 符号
-        status = "✓" if result.success else "✗"
-        data = ""
-        if result.data:
-            if result.service_name == "GLaDOS" and "left_days" in result.data:
-                data = f"{result.data['left_days']}天\n"
-            elif result.service_name == "iKuuu":
-                pass  # iKuuu用量信息已无法获取
-
-        # 对齐格式化
-        line = (
-            f"\n{service_name.ljust(max_service_len)} "
-            f"{account.ljust(max_account_len)} "
-            f"{status} {data} "
-            f"{message.ljust(max_message_len)}"
-        )
-        lines.append(line)
-
-    # 统计信息
-    total = len(all_results)
-    success = sum(1 for r in all_results if r.success)
-    fail = total - success
-
-    # 添加统计到报告内容
-    lines.append(f"\n统计: 总数 {total} | 成功 {success} | 失败 {fail}")
-    detail_report = "\n".join(lines)
-
-    # 生成标题（格式：签到 总数/成功/失败）
-    title = f"自动签到 {total}/{success}/{fail}"
-
-    return title, detail_report
+    renderer = ReportRenderer()
+    for index, result in enumerate(all_results):
+        renderer.add(index, result)
+    return renderer.render()
+
+
+def flush_pending_notifications():
+    """
+    补发发件箱中先前运行遗留的通知。
+    仅在确有到期消息时才导入通知模块，不影响无任务时的快速退出。
+    """
+    if has_pending_notifications():
+        from notifications import send_notification
+        logger.log(SUMMARY, "\n=== 补发发件箱中的通知 ===")
+        NotificationOutbox().flush(send_notification)
 
 
 def set_env():
@@ -204,140 +163,209 @@ def set_env():
     )
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="自动签到程序")
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help="分片执行，只处理按账号哈希划分后第 i 个分片（共 N 个）的账号，"
+                             "结果写入分片文件，不发送通知")
+    parser.add_argument('--merge-shards', action='store_true',
+                        help="合并所有分片结果为一个 status.json，并发送一条汇总通知")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     run_env = os.environ.get("RUN_ENV", "").strip().lower()
     if run_env != "prod":
-        print("检测到非Github Action环境，执行 set_env() 加载本地测试环境变量。\n")
+        logger.info("检测到非Github Action环境，执行 set_env() 加载本地测试环境变量。\n")
         set_env()        
     else:
-        print("检测到Github Action环境，跳过本地测试环境变量注入。\n")
-    print("自动签到程序启动\n")
+        logger.info("检测到Github Action环境，跳过本地测试环境变量注入。\n")
+    logger.log(SUMMARY, "自动签到程序启动\n")
+
+    # 合并模式：汇总各分片的状态和报告，发送一条通知后退出
+    if args.merge_shards:
+        from shard import merge_shards
+        merged = merge_shards()
+        if merged:
+            from notifications import send_notification
+            logger.log(SUMMARY, "\n=== 开始发送统一通知 ===")
+            deliver(merged[0], merged[1], send_notification)
+            logger.log(SUMMARY, "=== 通知流程结束 ===")
+        exit()
+
+    # 分片模式下只处理本分片的账号，状态和报告写入分片文件，由合并步骤统一通知
+    shard_index, shard_total = args.shard or (1, 1)
+    shard_files = shard_file_names(shard_index, shard_total) if args.shard else None
+    if args.shard:
+        logger.log(SUMMARY, "分片模式：处理第 %d/%d 个分片的账号\n", shard_index, shard_total)
 
-    # 默认启用增量签到模式，尝试读取历史状态
-    previously_successful_accounts = read_prior_status()
+    # 退出时（包括提前退出）输出运行指标，分片模式下各分片写入独立的指标文件
+    atexit.register(metrics.write_metrics,
+                    f"metrics.shard-{shard_index}-of-{shard_total}.json" if args.shard else None)
+    preflight_started = time.perf_counter()
+
+    # 默认启用增量签到模式，尝试读取历史状态；
+    # 分片模式下多个进程共享 status.json，只读取不压缩，压缩由 --merge-shards 完成
+    previously_successful_accounts = read_prior_status(compact=not args.shard)
 
     # 检查 status.json 格式，如果不符合新格式则发出警告并清空
     if previously_successful_accounts:
         # 随机取一个值进行检查
         first_value = next(iter(previously_successful_accounts.values()))
         if not isinstance(first_value, dict):
-            print("\n警告：检测到旧版 status.json 文件格式。")
-            print("本次将执行所有签到任务，并在结束后自动生成新版格式文件。")
-            print("如下次运行仍看到此警告，请手动删除 status.json 文件。\n")
+            logger.warning("\n警告：检测到旧版 status.json 文件格式。\n"
+                           "本次将执行所有签到任务，并在结束后自动生成新版格式文件。\n"
+                           "如下次运行仍看到此警告，请手动删除 status.json 文件。\n")
             previously_successful_accounts = {}
 
-    # 1. 加载所有启用的服务
-    all_services = get_enabled_services()
+    # 同一分片先前中断时，其状态分片中已完成的账号同样跳过
+    if shard_files and isinstance(previously_successful_accounts, dict):
+        previously_successful_accounts.update(read_prior_status(shard_files['status'], shard_files['journal']))
+
+    # 预检：仅依赖标准库，所有账号今日均已成功时在导入 requests 和实例化服务之前直接退出
+    preflight_done = all_accounts_done(previously_successful_accounts, args.shard)
+    metrics.observe('preflight', time.perf_counter() - preflight_started)
+    if preflight_done:
+        logger.log(SUMMARY, "\n=== 所有已配置的账号今日均已成功签到，无需重复执行。 ===")
+        logger.log(SUMMARY, "程序退出，本次不发送通知。")
+        if not shard_files:
+            flush_pending_notifications()
+        exit()  # 提前退出，节约资源和通知
+
+    # 确有任务需要执行，再导入服务、执行器和通知模块
+    from services.base_service import CheckinResult
+    from runner import create_runner
+    from http_transport import print_pool_stats
+    from notifications import send_notification
+    from services.request_tracer import install_tracer_from_env
+
+    # 设置了 REQUEST_TRACE_FILE 时记录每个请求的各阶段耗时
+    install_tracer_from_env()
+
+    # 1. 加载所有启用的服务，并在启动时一次性解析所有账号配置并计算哈希
+    with metrics.timer('config_parse'):
+        all_services = get_enabled_services()
+        registry = AccountRegistry.build(all_services)
 
     # 检查是否所有账号今日已签到成功
     if previously_successful_accounts and all_services:
-        all_configured_accounts_hashed = set()
-        for service in all_services:
-            try:
-                account_configs = service.get_account_configs()
-                for config in account_configs:
-                    # 确保我们得到一个有效的 account_id
-                    if account_id := config.get("account_id"):
-                        all_configured_accounts_hashed.add(_hash_account_id(account_id))
-            except Exception as e:
-                print(f"获取服务 {service.service_name} 账号配置时出错: {e}")
-
-        # 获取先前已成功签到的账号哈希集合
-        successful_hashes = {
-            h
-            for h, data in previously_successful_accounts.items()
-            if data.get("success")
-        }
-
-        if all_configured_accounts_hashed and all_configured_accounts_hashed.issubset(
-            successful_hashes
-        ):
-            print("\n=== 所有已配置的账号今日均已成功签到，无需重复执行。 ===")
-            print("程序退出，本次不发送通知。")
+        if registry.all_successful(previously_successful_accounts, args.shard):
+            logger.log(SUMMARY, "\n=== 所有已配置的账号今日均已成功签到，无需重复执行。 ===")
+            logger.log(SUMMARY, "程序退出，本次不发送通知。")
+            if not shard_files:
+                flush_pending_notifications()
             exit()  # 提前退出，节约资源和通知
 
     if not all_services:
-        print("没有任何服务被启用，程序退出。")
+        logger.error("没有任何服务被启用，程序退出。")
         exit()
 
     else:
-        all_results: List[CheckinResult] = []
+        # 结果完成后立即流式交给各个 sink：状态日志/status.json、签到历史、报告渲染
+        report_sink = ReportSink()
+        if shard_files:
+            sinks = [
+                StatusSink(registry.hash_of, shard_files['status'], shard_files['journal']),
+                ShardReportSink(registry.hash_of, shard_files['report']),
+            ]
+        else:
+            sinks = [StatusSink(registry.hash_of), report_sink]
+        from history_store import get_history_db_path  # sqlite3 只在确有任务执行时导入
+        if get_history_db_path():
+            sinks.append(HistorySink(registry.hash_of))
+        sinks.append(MetricsSink())
+        result_sink = SinkFanout(sinks)
+
+        # 按服务和账号顺序分配报告位置，并发执行后仍按此顺序输出报告
+        next_slot = 0
+        pending_jobs = []
+        pending_slots = []
 
         # 2. 执行所有服务的签到流程
         for service in all_services:
-            try:
-                # 获取服务的账号配置
-                account_configs = service.get_account_configs()
-                if not account_configs:
-                    print(f"服务 {service.service_name} 未找到任何账号配置。")
+            if service.service_name in registry.service_errors:
+                # 服务级异常只由第一个分片报告，避免合并后重复
+                if shard_index != 1:
+                    next_slot += 1
                     continue
-
-                service_results = []
-                for config in account_configs:
-                    account_id = config.get("account_id", "未知账号")
-                    hashed_id = _hash_account_id(account_id)
-
-                    # 检查此账号是否在之前已成功
-                    previous_record = previously_successful_accounts.get(hashed_id)
-                    if previous_record and previous_record.get("success") is True:
-                        print(f"账号 {account_id} 在当日已成功签到，本次将跳过。")
-                        # 从之前的记录创建模拟结果，以保留原始数据
-                        mock_result = CheckinResult(
-                            service_name=previous_record.get(
-                                "service_name", service.service_name
-                            ),
-                            account_id=account_id,
-                            success=True,
-                            message=previous_record.get("message"),  # 保留原始消息
-                            checkin_time=previous_record.get("checkin_time"),
-                            data={
-                                **previous_record.get("data", {}),
-                                "skipped": True,
-                            },  # 合并并添加跳过标志
-                        )
-                        service_results.append(mock_result)
-                    else:
-                        # 正常执行签到
-                        result = service.process_single_account(config)
-                        service_results.append(result)
-
-                all_results.extend(service_results)
-
-            except Exception as e:
-                print(f"服务 {service.service_name} 执行异常: {e}")
+                e = registry.service_errors[service.service_name]
+                logger.error("服务 %s 执行异常: %s", service.service_name, e)
                 error_result = CheckinResult(
                     service_name=service.service_name,
                     account_id="服务异常",
                     success=False,
                     message=f"服务执行异常: {str(e)}",
-                    checkin_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    checkin_time=beijing_now().strftime("%Y-%m-%d %H:%M:%S"),
                     data={},
                 )
-                all_results.append(error_result)
-
-        # 更新当日签到状态 - 新逻辑
-        print("\n=== 更新当日签到状态 ===")
-        current_checkin_status = {}
-        for result in all_results:
-            # 确保 account_id 有效，避免为“服务异常”等情况生成哈希
-            if result.account_id != "服务异常":
-                hashed_id = _hash_account_id(result.account_id)
-                status_record = {
-                    "service_name": result.service_name,
-                    "success": result.success,
-                    "message": result.message,
-                    "checkin_time": result.checkin_time,
-                }
-                current_checkin_status[hashed_id] = status_record
-
-        write_current_status(current_checkin_status)
+                result_sink.on_result(next_slot, error_result)
+                next_slot += 1
+                continue
+
+            entries = registry.service_entries.get(service.service_name)
+            if not entries:
+                logger.warning("服务 %s 未找到任何账号配置。", service.service_name)
+                continue
+
+            for entry in entries:
+                # 不属于本分片的账号只占用报告位置，保证各分片的报告顺序一致
+                if shard_of(entry.hashed_id, shard_total) != shard_index:
+                    next_slot += 1
+                    continue
+
+                # 检查此账号是否在之前已成功
+                previous_record = previously_successful_accounts.get(entry.hashed_id)
+                if previous_record and previous_record.get("success") is True:
+                    logger.info("%s 账号 %s 在当日已成功签到，本次将跳过。",
+                                service.service_name, service._desensitize_account_id(entry.account_id))
+                    # 从之前的记录创建模拟结果，以保留原始数据
+                    mock_result = CheckinResult(
+                        service_name=previous_record.get(
+                            "service_name", service.service_name
+                        ),
+                        account_id=entry.account_id,
+                        success=True,
+                        message=previous_record.get("message"),  # 保留原始消息
+                        checkin_time=previous_record.get("checkin_time"),
+                        data={
+                            **previous_record.get("data", {}),
+                            "skipped": True,
+                        },  # 合并并添加跳过标志
+                    )
+                    result_sink.on_result(next_slot, mock_result)
+                else:
+                    # 加入待执行队列，稍后并发签到
+                    pending_slots.append(next_slot)
+                    pending_jobs.append((service, entry.config))
+                next_slot += 1
+
+        # 并发执行所有待签到账号，每个账号完成后立即交给 sink 处理
+        with metrics.timer('checkin'):
+            create_runner().run(
+                pending_jobs,
+                on_result=lambda index, result: result_sink.on_result(pending_slots[index], result),
+            )
+
+        # 写出完整的 status.json、提交签到历史并渲染报告
+        result_sink.close()
+
+        if shard_files:
+            logger.log(SUMMARY, "\n分片 %d/%d 执行完毕，请在所有分片完成后运行 --merge-shards 合并结果并发送通知。",
+                       shard_index, shard_total)
+            print_pool_stats()
+            exit()
 
         # 3. 格式化结果
-        notification_title, final_report = format_results_for_serverchan(all_results)
+        notification_title, final_report = report_sink.title, report_sink.report
 
     # 4. 发送统一通知
-    print("\n=== 开始发送统一通知 ===")
-    send_notification(notification_title, final_report)
-    print("=== 通知流程结束 ===")
+    # 先写入发件箱文件再推送，推送失败或中途退出的通知会保留到下次运行重试，相同内容不会重复发送
+    logger.log(SUMMARY, "\n=== 开始发送统一通知 ===")
+    with metrics.timer('notification'):
+        deliver(notification_title, final_report, send_notification)
+    logger.log(SUMMARY, "=== 通知流程结束 ===")
+
+    print_pool_stats()
 
-    print(f"\n所有任务执行完毕。")
+    logger.log(SUMMARY, "\n所有任务执行完毕。")
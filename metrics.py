@@ -0,0 +1,161 @@
+# metrics.py
+# 运行指标：记录各阶段耗时（预检、配置解析、登录、每次签到尝试、用量获取、状态写入、各通知渠道等）
+# 以及按主机的请求数、响应字节数、错误数和重试次数，运行结束时输出 JSON 文件和 Prometheus 文本格式文件。
+# 仅依赖标准库，可在启动预检阶段使用。
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Tuple, Iterator
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+DEFAULT_METRICS_FILE = "metrics.json"
+METRIC_PREFIX = "checkin"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Metrics:
+    """线程安全的指标收集器：阶段耗时汇总（次数/总耗时/最大耗时）和计数器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases: Dict[Tuple[str, LabelKey], Dict[str, float]] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.started_at = time.time()
+
+    def observe(self, phase: str, seconds: float, **labels):
+        """记录一次阶段耗时"""
+        key = (phase, _label_key(labels))
+        with self._lock:
+            stats = self._phases.get(key)
+            if stats is None:
+                stats = self._phases[key] = {'count': 0, 'total': 0.0, 'max': 0.0}
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    @contextmanager
+    def timer(self, phase: str, **labels) -> Iterator[None]:
+        """计时上下文，代码块抛出异常时同样记录耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started, **labels)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器累加"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = [
+                {'phase': phase, 'labels': dict(labels), 'count': stats['count'],
+                 'total': round(stats['total'], 6), 'max': round(stats['max'], 6)}
+                for (phase, labels), stats in self._phases.items()
+            ]
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).strftime('%Y-%m-%d %H:%M:%S'),
+            'elapsed': round(time.time() - self.started_at, 6),
+            'phases': sorted(phases, key=lambda item: (item['phase'], sorted(item['labels'].items()))),
+            'counters': sorted(counters, key=lambda item: (item['name'], sorted(item['labels'].items()))),
+        }
+
+    def to_prometheus(self) -> str:
+        """生成 Prometheus 文本格式：阶段耗时为 summary（_sum/_count）加 _max 仪表，计数器为 counter"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_run_elapsed_seconds 本次运行的总耗时",
+            f"# TYPE {METRIC_PREFIX}_run_elapsed_seconds gauge",
+            f"{METRIC_PREFIX}_run_elapsed_seconds {snapshot['elapsed']}",
+        ]
+
+        if snapshot['phases']:
+            name = f"{METRIC_PREFIX}_phase_seconds"
+            lines.append(f"# HELP {name} 各阶段耗时")
+            lines.append(f"# TYPE {name} summary")
+            for item in snapshot['phases']:
+                labels = _format_labels({'phase': item['phase'], **item['labels']})
+                lines.append(f"{name}_sum{labels} {item['total']}")
+                lines.append(f"{name}_count{labels} {item['count']}")
+            lines.append(f"# HELP {name}_max 各阶段单次最大耗时")
+            lines.append(f"# TYPE {name}_max gauge")
+            for item in snapshot['phases']:
+                labels = _format_labels({'phase': item['phase'], **item['labels']})
+                lines.append(f"{name}_max{labels} {item['max']}")
+
+        declared = set()
+        for item in snapshot['counters']:
+            name = f"{METRIC_PREFIX}_{item['name']}"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(item['labels'])} {item['value']}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+# 进程级共享的指标收集器
+METRICS = Metrics()
+
+
+def observe(phase: str, seconds: float, **labels):
+    METRICS.observe(phase, seconds, **labels)
+
+
+def timer(phase: str, **labels):
+    return METRICS.timer(phase, **labels)
+
+
+def inc(name: str, value: float = 1, **labels):
+    METRICS.inc(name, value, **labels)
+
+
+def record_http(host: str, status: Any, seconds: float, response_bytes: int):
+    """记录一次 HTTP 请求：按主机和状态码计数，并累计耗时和响应字节数"""
+    METRICS.inc('http_requests_total', host=host, status=status)
+    METRICS.inc('http_response_bytes_total', response_bytes, host=host)
+    METRICS.observe('http_request', seconds, host=host)
+
+
+def write_metrics(json_file: str = None):
+    """
+    输出指标文件：JSON 文件及同名的 .prom 文件。
+    文件名默认取环境变量 METRICS_FILE（默认 metrics.json），设置 METRICS_ENABLED=0 时不输出。
+    """
+    if os.environ.get('METRICS_ENABLED', '').strip().lower() in ('0', 'false', 'no'):
+        return
+    json_file = json_file or os.environ.get('METRICS_FILE', '').strip() or DEFAULT_METRICS_FILE
+    prom_file = os.path.splitext(json_file)[0] + ".prom"
+    try:
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(METRICS.snapshot(), f, ensure_ascii=False, indent=4)
+        with open(prom_file, 'w', encoding='utf-8') as f:
+            f.write(METRICS.to_prometheus())
+        logger.log(SUMMARY, "运行指标已写入 '%s' 和 '%s'。", json_file, prom_file)
+    except IOError as e:
+        logger.error("Error writing metrics: %s", e)
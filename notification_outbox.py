@@ -0,0 +1,142 @@
+# notification_outbox.py
+# 通知发件箱：推送失败的报告持久化到 status.json 旁的 outbox.json，下次运行时按退避策略重试，
+# 并按 运行标识 + 内容 的哈希去重，保证同一次运行的同一份报告不会被重复推送（例如重新运行合并步骤），
+# 而之后的运行即使报告内容相同也会正常推送。仅依赖标准库，推送函数由调用方传入。
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, Any, List
+from status_manager import STATUS_FILE_NAME
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+OUTBOX_FILE_NAME = os.path.join(os.path.dirname(STATUS_FILE_NAME), "outbox.json")
+
+# 重试退避：首次 60 秒，之后每次翻倍，最长 1 小时
+RETRY_BASE_DELAY = 60
+RETRY_MAX_DELAY = 3600
+# 超过最大尝试次数或存放时间的消息将被丢弃
+MAX_ATTEMPTS = 10
+MAX_AGE = 2 * 24 * 3600
+# 已发送记录的保留时间，用于去重
+SENT_RETENTION = 3 * 24 * 3600
+
+# 本次运行的标识：GitHub Actions 中为 GITHUB_RUN_ID（同一工作流运行的各分片、合并步骤及其重试共用），
+# 其他环境下每个进程各不相同
+RUN_ID = os.environ.get("GITHUB_RUN_ID", "").strip() or f"local-{os.getpid()}-{int(time.time())}"
+
+
+def _content_hash(title: str, content: str, run_key: str) -> str:
+    return hashlib.sha256(f"{run_key}\n{title}\n{content}".encode("utf-8")).hexdigest()
+
+
+class NotificationOutbox:
+    """持久化的通知发件箱"""
+
+    def __init__(self, path: str = OUTBOX_FILE_NAME):
+        self.path = path
+        self.pending: List[Dict[str, Any]] = []
+        self.sent: Dict[str, float] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.pending = data.get('pending', [])
+            self.sent = data.get('sent', {})
+        except (json.JSONDecodeError, IOError, AttributeError) as e:
+            logger.error("Error reading '%s': %s", self.path, e)
+
+    def save(self):
+        """原子写入发件箱文件，没有任何内容时删除文件"""
+        now = time.time()
+        self.sent = {h: t for h, t in self.sent.items() if now - t < SENT_RETENTION}
+        try:
+            if not self.pending and not self.sent:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_name = self.path + ".tmp"
+            with open(tmp_name, 'w', encoding='utf-8') as f:
+                json.dump({'pending': self.pending, 'sent': self.sent}, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_name, self.path)
+        except IOError as e:
+            logger.error("Error writing '%s': %s", self.path, e)
+
+    def has_due(self) -> bool:
+        """是否有已到重试时间的待发送消息"""
+        now = time.time()
+        return any(item.get('next_attempt_at', 0) <= now for item in self.pending)
+
+    def enqueue(self, title: str, content: str, run_key: str = None) -> bool:
+        """
+        将报告放入发件箱并立即写入文件，推送过程中进程中断或超时退出时，下次运行仍会补发。
+        同一运行标识下已发送或已在队列中的相同内容会被忽略。
+
+        :param run_key: 报告所属的运行标识，默认为本次运行的 RUN_ID；常驻模式下按批次或日期区分
+        :return: 是否新加入了队列
+        """
+        content_hash = _content_hash(title, content, run_key or RUN_ID)
+        if content_hash in self.sent or any(item['hash'] == content_hash for item in self.pending):
+            logger.log(SUMMARY, "相同内容的通知已发送或已在发件箱中，跳过。")
+            return False
+        self.pending.append({
+            'hash': content_hash,
+            'title': title,
+            'content': content,
+            'created_at': time.time(),
+            'attempts': 0,
+            'next_attempt_at': 0,
+        })
+        self.save()
+        return True
+
+    def flush(self, send_func: Callable[[str, str], Dict[str, Dict[str, Any]]]):
+        """
+        依次发送所有已到期的消息，并保存发件箱。
+
+        :param send_func: 推送函数，签名同 notifications.send_notification，返回各渠道结果
+        """
+        now = time.time()
+        remaining = []
+        for item in self.pending:
+            if now - item['created_at'] > MAX_AGE or item['attempts'] >= MAX_ATTEMPTS:
+                logger.error("通知 %s 多次推送失败，已放弃。", item['title'])
+                continue
+            if item.get('next_attempt_at', 0) > now:
+                remaining.append(item)
+                continue
+
+            outcomes = send_func(item['title'], item['content'])
+            if not outcomes:
+                # 未配置任何通知渠道，无需保留
+                continue
+            if any(outcome.get('success') for outcome in outcomes.values()):
+                self.sent[item['hash']] = time.time()
+                continue
+
+            item['attempts'] += 1
+            delay = min(RETRY_BASE_DELAY * (2 ** (item['attempts'] - 1)), RETRY_MAX_DELAY)
+            item['next_attempt_at'] = time.time() + delay
+            logger.warning("通知 %s 推送失败，已保存到发件箱，%s 秒后可重试。", item['title'], delay)
+            remaining.append(item)
+        self.pending = remaining
+        self.save()
+
+
+def deliver(title: str, content: str, send_func: Callable[[str, str], Dict[str, Dict[str, Any]]],
+            run_key: str = None):
+    """将报告加入发件箱并立即尝试发送所有到期消息（包括先前运行遗留的消息）"""
+    outbox = NotificationOutbox()
+    outbox.enqueue(title, content, run_key)
+    outbox.flush(send_func)
+
+
+def has_pending_notifications() -> bool:
+    """发件箱中是否有到期待发送的消息，供启动预检判断是否需要加载通知模块"""
+    return os.path.exists(OUTBOX_FILE_NAME) and NotificationOutbox().has_due()
@@ -1,39 +1,91 @@
 # notifications.py
+import logging
 import os
-import requests
+import threading
+import time
 from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable
+from report_renderer import split_message
+from http_transport import get_session
+import metrics
+from logger import get_logger, SUMMARY
 
+logger = get_logger(__name__)
 
-def _push_sct(sckey: str, title: str, content: str) -> bool:
+# 单次请求超时，单位：秒
+REQUEST_TIMEOUT = 30
+# 所有渠道推送的总时限，可通过环境变量 NOTIFY_DEADLINE 覆盖，单位：秒
+DEFAULT_NOTIFY_DEADLINE = 45
+
+def _get_notify_deadline() -> float:
+    raw = os.environ.get('NOTIFY_DEADLINE', '').strip()
+    try:
+        return float(raw) if raw else DEFAULT_NOTIFY_DEADLINE
+    except ValueError:
+        logger.warning("NOTIFY_DEADLINE 配置无效: %s，使用默认值 %s", raw, DEFAULT_NOTIFY_DEADLINE)
+        return DEFAULT_NOTIFY_DEADLINE
+
+# 各渠道单条消息的长度限制，超出时按行切分为多条依次发送
+_CHANNEL_LIMITS = {
+    'ServerChan': {'max_bytes': 32 * 1024},
+    'PushPlus': {'max_chars': 20000},
+    'Telegram': {'max_chars': 4096},
+}
+# 为分片序号 "(i/n)\n" 预留的长度
+_CHUNK_HEADER_RESERVE = 16
+
+
+def _split_for_channel(channel: str, content: str) -> List[str]:
+    """按渠道限制切分消息，多于一片时在每片开头标注序号"""
+    limits = {key: value - _CHUNK_HEADER_RESERVE for key, value in _CHANNEL_LIMITS[channel].items()}
+    chunks = split_message(content, **limits)
+    if len(chunks) == 1:
+        return chunks
+    return [f"({i}/{len(chunks)})\n{chunk}" for i, chunk in enumerate(chunks, 1)]
+
+
+def _send_chunks(channel: str, content: str, sender: Callable[[str], bool]) -> bool:
+    """按顺序发送所有分片，全部成功才视为推送成功"""
+    chunks = _split_for_channel(channel, content)
+    if len(chunks) > 1:
+        logger.info("%s 消息超出长度限制，拆分为 %d 条发送。", channel, len(chunks))
+    for chunk in chunks:
+        if not sender(chunk):
+            return False
+    return True
+
+
+def _push_sct(sckey: str, title: str, content: str, timeout: float = REQUEST_TIMEOUT) -> bool:
     """ServerChan推送"""
     url = f"https://sctapi.ftqq.com/{sckey}.send"
     data = {'title': title, 'desp': content}
     try:
-        response = requests.post(url, data=data, timeout=30)
+        response = get_session().post(url, data=data, timeout=timeout)
         return response.json().get("code") == 0
     except Exception as e:
-        print(f"ServerChan 推送异常: {e}")
+        logger.error("ServerChan 推送异常: %s", e)
         return False
 
 
-def _push_plus(token: str, title: str, content: str) -> bool:
+def _push_plus(token: str, title: str, content: str, timeout: float = REQUEST_TIMEOUT) -> bool:
     """PushPlus推送"""
     url = "http://www.pushplus.plus/send"
     headers = {'Content-Type': 'application/json'}
     data = {"token": token, 'title': title, 'content': content, "template": "markdown"}
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = get_session().post(url, json=data, headers=headers, timeout=timeout)
         return response.json().get('code') == 200
     except Exception as e:
-        print(f"PushPlus 推送异常: {e}")
+        logger.error("PushPlus 推送异常: %s", e)
         return False
 
-def _push_tg(bot_token: str, chat_id: str, content: str) -> bool:
+def _push_tg(bot_token: str, chat_id: str, content: str, timeout: float = REQUEST_TIMEOUT) -> bool:
     """
     Telegram推送
     :param bot_token: Telegram Bot 的 Token（由 @BotFather 生成）
     :param chat_id: 接收消息的tg userid（你的用户 ID，数字字符串，通过 @userinfobot 查询得到）
     :param content: 要推送的内容
+    :param timeout: 请求超时秒数
     :return: 推送成功返回 True，失败返回 False
     """
     url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
@@ -44,19 +96,27 @@ def _push_tg(bot_token: str, chat_id: str, content: str) -> bool:
         'parse_mode': 'Markdown'
     }
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = get_session().post(url, json=payload, headers=headers, timeout=timeout)
+        if response.status_code == 400:
+            # 分片可能截断了 *…* 或 `…` 等 Markdown 标记导致解析失败，改为纯文本重发
+            logger.warning("Telegram 无法解析 Markdown，改为纯文本重发: %s", response.text)
+            payload.pop('parse_mode')
+            response = get_session().post(url, json=payload, headers=headers, timeout=timeout)
         if response.status_code == 200:
             return True
         else:
-            print(f"Telegram 推送失败: {response.text}")
+            logger.error("Telegram 推送失败: %s", response.text)
             return False
     except Exception as e:
-        print(f"Telegram 推送异常: {e}")
+        logger.error("Telegram 推送异常: %s", e)
         return False
 
-def send_notification(title: str, content: str):
+def send_notification(title: str, content: str) -> Dict[str, Dict[str, Any]]:
     """
     根据环境变量配置自动选择并发送通知。
+    所有已配置的渠道并发推送，并受 NOTIFY_DEADLINE 总时限约束。
+
+    :return: 各渠道的推送结果，例如 {'Telegram': {'success': True, 'latency': 0.8, 'status': '成功'}}
     """
     # 添加时间戳
     now_bj = datetime.utcnow() + timedelta(hours=8)
@@ -70,36 +130,66 @@ def send_notification(title: str, content: str):
     tg_chat_id = os.environ.get('TG_CHAT_ID')
 
     if not any([serverchan_key, pushplus_token, tg_bot_token and tg_chat_id]):
-        print("未配置任何通知方式，跳过推送。")
-        return
+        logger.log(SUMMARY, "未配置任何通知方式，跳过推送。")
+        return {}
 
-    push_success = False
+    deadline = _get_notify_deadline()
+    deadline_at = time.monotonic() + deadline
 
-    if serverchan_key:
-        print("检测到 SERVERCHAN_KEY，尝试通过 ServerChan 推送...")
-        if _push_sct(serverchan_key, title, full_content):
-            print("ServerChan 推送成功。")
-            push_success = True
-        else:
-            print("ServerChan 推送失败。")
+    def _bounded(push: Callable[[str, float], bool]) -> Callable[[str], bool]:
+        """单次请求超时不超过剩余的总时限，时限耗尽后不再发送后续分片"""
+        def sender(chunk: str) -> bool:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                return False
+            return push(chunk, min(REQUEST_TIMEOUT, remaining))
+        return sender
 
+    channels = {}
+    if serverchan_key:
+        logger.info("检测到 SERVERCHAN_KEY，尝试通过 ServerChan 推送...")
+        channels['ServerChan'] = _bounded(lambda chunk, timeout: _push_sct(serverchan_key, title, chunk, timeout))
     if pushplus_token:
-        print("检测到 PUSHPLUS_TOKEN，尝试通过 PushPlus 推送...")
-        if _push_plus(pushplus_token, title, full_content):
-            print("PushPlus 推送成功。")
-            push_success = True
-        else:
-            print("PushPlus 推送失败。")
-
+        logger.info("检测到 PUSHPLUS_TOKEN，尝试通过 PushPlus 推送...")
+        channels['PushPlus'] = _bounded(lambda chunk, timeout: _push_plus(pushplus_token, title, chunk, timeout))
     if tg_bot_token and tg_chat_id:
-        print("检测到 TG_BOT_TOKEN 和 TG_CHAT_ID，尝试通过 Telegram 推送...")
-        if _push_tg(tg_bot_token, tg_chat_id, full_content):
-            print("Telegram 推送成功。")
-            push_success = True
-        else:
-            print("Telegram 推送失败。")
+        logger.info("检测到 TG_BOT_TOKEN 和 TG_CHAT_ID，尝试通过 Telegram 推送...")
+        channels['Telegram'] = _bounded(lambda chunk, timeout: _push_tg(tg_bot_token, tg_chat_id, chunk, timeout))
+
+    started = time.monotonic()
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def _timed_send(channel: str, sender: Callable[[str], bool]):
+        try:
+            success = _send_chunks(channel, full_content, sender)
+            status = '成功' if success else '失败'
+        except Exception as e:
+            success, status = False, f'异常: {e}'
+        results[channel] = {'success': success, 'latency': time.monotonic() - started, 'status': status}
+
+    # 各渠道在守护线程中并发推送，超过总时限仍未完成的渠道视为超时，
+    # 守护线程不会在解释器退出时被等待，因此慢渠道不会拖住进程
+    threads = [threading.Thread(target=_timed_send, args=(name, sender), name=f"notify-{name}", daemon=True)
+               for name, sender in channels.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(0.0, deadline_at - time.monotonic()))
+
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    for name in channels:
+        outcome = results.get(name)
+        outcomes[name] = dict(outcome) if outcome else {
+            'success': False, 'latency': time.monotonic() - started, 'status': '超时'}
+
+    for name, outcome in outcomes.items():
+        logger.log(SUMMARY if outcome['success'] else logging.WARNING,
+                   "%s 推送%s，耗时 %.2f 秒。", name, outcome['status'], outcome['latency'])
+        metrics.observe('notify', outcome['latency'], channel=name)
+        metrics.inc('notifications_total', channel=name, success=outcome['success'])
 
-    if not push_success:
-        print("所有通知方式都推送失败。")
+    if not any(outcome['success'] for outcome in outcomes.values()):
+        logger.error("所有通知方式都推送失败。")
     else:
-        print("至少一种通知方式推送成功。")
+        logger.log(SUMMARY, "至少一种通知方式推送成功。")
+    return outcomes
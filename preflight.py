@@ -0,0 +1,52 @@
+# preflight.py
+# 启动预检：只依赖标准库，在导入 requests、各服务和通知模块之前判断是否还有需要执行的签到任务
+import os
+from typing import Dict, Any, Set, Tuple, Optional
+from account_registry import hash_account_id, shard_of
+from services.account_parsers import split_cookies, glados_account_id, ikuuu_account_id
+
+
+# (服务名称, cookie 环境变量, 账号标识提取函数)，新增服务时需同步在此登记
+ACCOUNT_SOURCES = [
+    ("GLaDOS", "GR_COOKIE", glados_account_id),
+    ("iKuuu", "IKUUU_COOKIE", ikuuu_account_id),
+]
+
+
+def configured_accounts() -> Dict[str, Tuple[str, str]]:
+    """
+    直接从环境变量解析所有已配置的账号，不实例化任何服务。
+
+    :return: 按配置顺序排列的 {账号哈希: (服务名称, 账号标识)}
+    """
+    accounts = {}
+    for service_name, env_var, account_id_func in ACCOUNT_SOURCES:
+        for cookie in split_cookies(os.environ.get(env_var, "")):
+            account_id = account_id_func(cookie)
+            accounts.setdefault(hash_account_id(account_id), (service_name, account_id))
+    return accounts
+
+
+def configured_account_hashes() -> Set[str]:
+    """直接从环境变量计算所有已配置账号的哈希，不实例化任何服务"""
+    return set(configured_accounts())
+
+
+def all_accounts_done(prior_status: Dict[str, Any], shard: Optional[Tuple[int, int]] = None) -> bool:
+    """
+    判断所有已配置账号是否均已在 prior_status 中记录为成功。
+    传入 shard=(i, N) 时只检查属于第 i 个分片的账号。
+    没有配置任何（属于该分片的）账号时返回 False，交由主流程处理。
+    """
+    if not prior_status:
+        return False
+    hashes = configured_account_hashes()
+    if shard is not None:
+        hashes = {hashed_id for hashed_id in hashes if shard_of(hashed_id, shard[1]) == shard[0]}
+    if not hashes:
+        return False
+    for hashed_id in hashes:
+        record = prior_status.get(hashed_id)
+        if not isinstance(record, dict) or record.get("success") is not True:
+            return False
+    return True
@@ -0,0 +1,148 @@
+# report_renderer.py
+# 签到报告渲染与消息分片：结果逐个加入时即更新列宽和统计，最后一次性输出；超长消息按渠道限制切分
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from services.base_service import CheckinResult
+
+# 各列最大显示宽度
+MAX_SERVICE_LEN = 10
+MAX_ACCOUNT_LEN = 10
+MAX_MESSAGE_LEN = 15
+# 渲染报告时用到的 data 字段，分片执行时报告分片只保存这些字段
+REPORT_DATA_KEYS = ('left_days',)
+
+
+class ReportRenderer:
+    """
+    极简对齐版签到报告渲染器。
+    add() 时只保存渲染所需的几个字段并同步更新列宽与成功/失败计数，
+    render() 按位置顺序一次性生成 (title, report)，无需多次遍历结果。
+    title格式: "自动签到 总数/成功/失败"，正文使用 ✓ 和 ✗ 符号
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, Tuple[str, str, str, str, str]] = {}
+        self.max_service_len = 0
+        self.max_account_len = 0
+        self.max_message_len = 0
+        self.total = 0
+        self.success = 0
+
+    def add(self, index: int, result: "CheckinResult"):
+        """加入一个结果，index 决定其在报告中的位置"""
+        # 计算各列最大宽度，分别限制最大10/10/15字符
+        self.max_service_len = max(self.max_service_len, min(MAX_SERVICE_LEN, len(result.service_name)))
+        self.max_account_len = max(self.max_account_len, min(MAX_ACCOUNT_LEN, len(result.account_id)))
+        self.max_message_len = max(self.max_message_len, min(MAX_MESSAGE_LEN, len(result.message)))
+
+        # 处理账号显示
+        account = (
+            (result.account_id[:10] + "..")
+            if len(result.account_id) > 10
+            else result.account_id
+        )
+        if result.service_name == "GLaDOS":
+            account = result.account_id[:10]  # GLaDOS只显示前10字符
+
+        # 处理service_name和message的长度限制
+        service_name = (
+            (result.service_name[:10] + "..")
+            if len(result.service_name) > 10
+            else result.service_name
+        )
+        message = (
+            (result.message[:15] + "..") if len(result.message) > 15 else result.message
+        )
+
+        # 构建状态和数据部分 - 使用 ✓ 和 ✗ 符号
+        status = "✓" if result.success else "✗"
+        data = ""
+        if result.data:
+            if result.service_name == "GLaDOS" and "left_days" in result.data:
+                data = f"{result.data['left_days']}天\n"
+            elif result.service_name == "iKuuu":
+                pass  # iKuuu用量信息已无法获取
+
+        self._rows[index] = (service_name, account, status, data, message)
+        self.total += 1
+        if result.success:
+            self.success += 1
+
+    def render(self) -> Tuple[str, str]:
+        """生成 (title, final_report)"""
+        if not self.total:
+            return "自动签到 0/0/0", "无签到任务"
+
+        lines = []
+        for index in sorted(self._rows):
+            service_name, account, status, data, message = self._rows[index]
+            # 对齐格式化
+            lines.append(
+                f"\n{service_name.ljust(self.max_service_len)} "
+                f"{account.ljust(self.max_account_len)} "
+                f"{status} {data} "
+                f"{message.ljust(self.max_message_len)}"
+            )
+
+        # 统计信息
+        fail = self.total - self.success
+        lines.append(f"\n统计: 总数 {self.total} | 成功 {self.success} | 失败 {fail}")
+
+        # 生成标题（格式：签到 总数/成功/失败）
+        title = f"自动签到 {self.total}/{self.success}/{fail}"
+        return title, "\n".join(lines)
+
+
+def _fits(text: str, max_chars: Optional[int], max_bytes: Optional[int]) -> bool:
+    if max_chars is not None and len(text) > max_chars:
+        return False
+    if max_bytes is not None and len(text.encode("utf-8")) > max_bytes:
+        return False
+    return True
+
+
+def _hard_split(line: str, max_chars: Optional[int], max_bytes: Optional[int]) -> List[str]:
+    """单行超过限制时按字符切分"""
+    pieces = []
+    current = ""
+    for char in line:
+        if current and not _fits(current + char, max_chars, max_bytes):
+            pieces.append(current)
+            current = ""
+        current += char
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_message(content: str, max_chars: Optional[int] = None, max_bytes: Optional[int] = None) -> List[str]:
+    """
+    按行将消息切分为不超过渠道限制的若干片，尽量不在行中间断开。
+
+    :param content: 原始消息
+    :param max_chars: 每片最大字符数
+    :param max_bytes: 每片最大 UTF-8 字节数
+    :return: 按顺序排列的消息分片
+    """
+    if _fits(content, max_chars, max_bytes):
+        return [content]
+
+    chunks = []
+    current = None
+    for line in content.split("\n"):
+        candidate = line if current is None else f"{current}\n{line}"
+        if _fits(candidate, max_chars, max_bytes):
+            current = candidate
+            continue
+        if current is not None:
+            chunks.append(current)
+        if _fits(line, max_chars, max_bytes):
+            current = line
+        else:
+            pieces = _hard_split(line, max_chars, max_bytes)
+            chunks.extend(pieces[:-1])
+            current = pieces[-1]
+    if current is not None:
+        chunks.append(current)
+    return chunks
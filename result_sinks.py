@@ -0,0 +1,160 @@
+# result_sinks.py
+# 签到结果的流式消费者：每个账号完成后立即交给各个 sink 处理，而不是在全部完成后再多次遍历结果列表
+from typing import List, Dict, Callable, Optional, TYPE_CHECKING
+from status_manager import STATUS_FILE_NAME, JOURNAL_FILE_NAME, append_status_record, write_current_status
+from report_renderer import ReportRenderer, REPORT_DATA_KEYS
+import metrics
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+if TYPE_CHECKING:
+    from services.base_service import CheckinResult
+
+
+def status_record(result: "CheckinResult") -> dict:
+    """生成写入 status.json 的单个账号状态记录"""
+    return {
+        "service_name": result.service_name,
+        "success": result.success,
+        "message": result.message,
+        "checkin_time": result.checkin_time,
+    }
+
+
+class ResultSink:
+    """结果消费者基类，on_result 在调度线程中串行调用"""
+
+    def on_result(self, index: int, result: "CheckinResult"):
+        """
+        处理一个已完成的结果。
+
+        :param index: 结果在报告中的位置，用于保证输出顺序稳定
+        :param result: 签到结果
+        """
+        pass
+
+    def close(self):
+        """所有结果处理完毕后调用"""
+        pass
+
+
+class StatusSink(ResultSink):
+    """
+    状态写入：新执行的账号立即追加到状态日志，结束时合并写出完整的 status.json。
+    只保留状态记录本身，不持有完整结果。
+    """
+
+    def __init__(self,
+                 hash_func: Callable[[str], str],
+                 status_file: str = STATUS_FILE_NAME,
+                 journal_file: str = JOURNAL_FILE_NAME):
+        self.hash_func = hash_func
+        self.status_file = status_file
+        self.journal_file = journal_file
+        self.status: Dict[str, dict] = {}
+
+    def on_result(self, index: int, result: "CheckinResult"):
+        # 确保 account_id 有效，避免为“服务异常”等情况生成哈希
+        if result.account_id == "服务异常":
+            return
+        hashed_id = self.hash_func(result.account_id)
+        record = status_record(result)
+        self.status[hashed_id] = record
+        if not result.data.get("skipped"):
+            append_status_record(hashed_id, record, self.journal_file)
+
+    def close(self):
+        logger.log(SUMMARY, "\n=== 更新当日签到状态 ===")
+        with metrics.timer('status_write'):
+            write_current_status(self.status, self.status_file, self.journal_file)
+
+
+class HistorySink(ResultSink):
+    """签到历史：收集本次执行的结果，结束时在一个事务中批量写入"""
+
+    def __init__(self, hash_func: Callable[[str], str]):
+        self.hash_func = hash_func
+        self.results: List["CheckinResult"] = []
+
+    def on_result(self, index: int, result: "CheckinResult"):
+        if result.account_id != "服务异常" and not result.data.get("skipped"):
+            self.results.append(result)
+
+    def close(self):
+        from history_store import record_results
+        with metrics.timer('history_write'):
+            record_results(self.results, self.hash_func)
+
+
+class ReportSink(ResultSink):
+    """报告生成：结果到达时即更新列宽和统计，结束时按原始顺序渲染通知标题和正文"""
+
+    def __init__(self):
+        self.renderer = ReportRenderer()
+        self.title: Optional[str] = None
+        self.report: Optional[str] = None
+
+    def on_result(self, index: int, result: "CheckinResult"):
+        self.renderer.add(index, result)
+
+    def close(self):
+        with metrics.timer('report_render'):
+            self.title, self.report = self.renderer.render()
+
+
+class ShardReportSink(ResultSink):
+    """
+    分片执行时的报告分片：只保存合并后渲染报告所需的字段，结束时写出到分片文件。
+    账号只以哈希记录，合并时再根据配置还原显示名称。
+    """
+
+    def __init__(self, hash_func: Callable[[str], str], report_file: str):
+        self.hash_func = hash_func
+        self.report_file = report_file
+        self.entries: List[dict] = []
+
+    def on_result(self, index: int, result: "CheckinResult"):
+        entry = {
+            "slot": index,
+            "service_name": result.service_name,
+            "success": result.success,
+            "message": result.message,
+            "checkin_time": result.checkin_time,
+            "data": {key: result.data[key] for key in REPORT_DATA_KEYS if key in result.data},
+        }
+        if result.account_id == "服务异常":
+            entry["account_id"] = result.account_id
+        else:
+            entry["hashed_id"] = self.hash_func(result.account_id)
+        self.entries.append(entry)
+
+    def close(self):
+        from shard import write_report_fragment
+        write_report_fragment(self.report_file, self.entries)
+
+
+class MetricsSink(ResultSink):
+    """运行指标：按服务统计签到结果，并记录每个账号的处理总耗时（包含重试等待）"""
+
+    def on_result(self, index: int, result: "CheckinResult"):
+        if result.data.get("skipped"):
+            return
+        metrics.inc('results_total', service=result.service_name, success=result.success)
+        if result.duration is not None:
+            metrics.observe('account', result.duration, service=result.service_name)
+
+
+class SinkFanout(ResultSink):
+    """将结果依次分发给多个 sink"""
+
+    def __init__(self, sinks: List[ResultSink]):
+        self.sinks = sinks
+
+    def on_result(self, index: int, result: "CheckinResult"):
+        for sink in self.sinks:
+            sink.on_result(index, result)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,241 @@
+# runner.py
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Tuple, Deque, Optional, Callable
+from services.base_service import CheckinService, CheckinResult, CheckinTask, configure_usage_executor
+from services.async_base_service import AsyncCheckinService, SyncServiceAdapter
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+
+# 全局并发上限，可通过环境变量 MAX_WORKERS 覆盖，设置为 1 即退化为串行执行
+DEFAULT_MAX_WORKERS = 4
+
+# 异步模式下同时在途的账号上限，可通过环境变量 MAX_IN_FLIGHT 覆盖
+DEFAULT_MAX_IN_FLIGHT = 100
+
+
+# 单个账号完成时的回调，参数为 (任务下标, 签到结果)
+ResultCallback = Callable[[int, CheckinResult], None]
+
+
+def get_execution_mode() -> str:
+    """读取执行模式：thread（默认，线程池）或 async（单事件循环）"""
+    mode = os.environ.get("EXECUTION_MODE", "thread").strip().lower()
+    return mode if mode in ("thread", "async") else "thread"
+
+
+def _get_positive_int_env(name: str, default: int) -> int:
+    """读取正整数类型的环境变量，无效时回退到默认值"""
+    raw = os.environ.get(name, "").strip()
+    try:
+        return max(1, int(raw)) if raw else default
+    except ValueError:
+        logger.warning("%s 配置无效: %s，使用默认值 %s", name, raw, default)
+        return default
+
+
+def get_max_workers() -> int:
+    """读取全局并发上限配置"""
+    return _get_positive_int_env("MAX_WORKERS", DEFAULT_MAX_WORKERS)
+
+
+def get_max_in_flight() -> int:
+    """读取异步模式下的在途账号上限配置"""
+    return _get_positive_int_env("MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)
+
+
+class AccountRunner:
+    """
+    账号级有界并发执行器。
+    - 全局并发上限由 max_workers 控制
+    - 单服务并发上限由各服务的 get_concurrency_config() 控制
+    - 签到失败需要重试的任务进入延迟队列，到期后重新排队，等待期间线程继续处理其他账号
+    - 返回结果的顺序与提交顺序一致，保证报告输出稳定
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or get_max_workers()
+        # 并行的用量请求与执行线程一一对应，等待用量时不会排在其他账号之后
+        configure_usage_executor(self.max_workers)
+
+    def run(self,
+            jobs: List[Tuple[CheckinService, Dict[str, Any]]],
+            on_result: Optional[ResultCallback] = None) -> List[CheckinResult]:
+        """
+        并发执行账号签到任务。
+
+        :param jobs: (服务实例, 账号配置) 列表
+        :param on_result: 每个账号完成时立即调用的回调，在调度线程中串行执行
+        :return: 与 jobs 顺序一致的签到结果列表
+        """
+        results: List[CheckinResult] = [None] * len(jobs)
+        if not jobs:
+            return results
+
+        # 按服务分组排队，保持各服务内部的原始顺序
+        tasks = [service.create_task(config) for service, config in jobs]
+        queues: Dict[str, Deque[int]] = {}
+        limits: Dict[str, int] = {}
+        for index, (service, _) in enumerate(jobs):
+            name = service.service_name
+            queues.setdefault(name, deque()).append(index)
+            if name not in limits:
+                limits[name] = max(1, service.get_concurrency_config().get("max_workers", 1))
+        running: Dict[str, int] = {name: 0 for name in queues}
+
+        logger.log(SUMMARY, "=== 并发执行 %d 个账号 (全局并发 %d, 单服务并发 %s) ===\n", len(jobs), self.max_workers, limits)
+
+        in_flight = {}
+        delayed: List[Tuple[float, int, int]] = []  # (到期时间, 序号, 任务下标) 组成的最小堆
+        sequence = itertools.count()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while in_flight or delayed or any(queues.values()):
+                # 到期的重试任务优先回到所属服务队列的队首
+                now = time.monotonic()
+                while delayed and delayed[0][0] <= now:
+                    _, _, index = heapq.heappop(delayed)
+                    queues[jobs[index][0].service_name].appendleft(index)
+
+                # 在全局和单服务上限允许的范围内尽量多地提交任务
+                for name, queue in queues.items():
+                    while queue and len(in_flight) < self.max_workers and running[name] < limits[name]:
+                        index = queue.popleft()
+                        service, _ = jobs[index]
+                        future = executor.submit(service.advance_task, tasks[index])
+                        in_flight[future] = index
+                        running[name] += 1
+
+                timeout = max(0.0, delayed[0][0] - time.monotonic()) if delayed else None
+                if not in_flight:
+                    # 只剩等待中的重试任务，休眠到最近一个到期
+                    time.sleep(timeout or 0)
+                    continue
+
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    service, config = jobs[index]
+                    running[service.service_name] -= 1
+                    retry_delay = self._collect(future, service, tasks[index])
+                    if retry_delay is None:
+                        results[index] = tasks[index].result
+                        if on_result is not None:
+                            on_result(index, results[index])
+                    else:
+                        heapq.heappush(delayed, (time.monotonic() + retry_delay, next(sequence), index))
+
+        return results
+
+    @staticmethod
+    def _collect(future, service: CheckinService, task: CheckinTask) -> Optional[float]:
+        """获取任务推进结果，advance_task 本身会捕获异常，这里仅作兜底"""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error("账号任务执行异常: %s", e)
+            task.result = CheckinResult(
+                service_name=service.service_name,
+                account_id=task.account_id,
+                success=False,
+                message=f"处理失败: {str(e)}",
+                checkin_time=task.checkin_time,
+            )
+            return None
+
+
+class AsyncAccountRunner:
+    """
+    基于单个事件循环的账号执行器。
+    AsyncCheckinService 直接以协程运行，同步服务通过 SyncServiceAdapter 在线程池中执行，
+    新旧服务可以混合在同一次运行中。
+    - 在途账号总数由 max_in_flight 控制
+    - 同步服务占用的线程数由 max_workers 控制
+    - 单服务并发上限由各服务的 get_concurrency_config() 控制
+    """
+
+    def __init__(self, max_workers: int = None, max_in_flight: int = None):
+        self.max_workers = max_workers or get_max_workers()
+        # 并行的用量请求与执行线程一一对应，等待用量时不会排在其他账号之后
+        configure_usage_executor(self.max_workers)
+        self.max_in_flight = max_in_flight or get_max_in_flight()
+
+    def run(self,
+            jobs: List[Tuple[CheckinService, Dict[str, Any]]],
+            on_result: Optional[ResultCallback] = None) -> List[CheckinResult]:
+        """
+        执行所有账号任务，返回与 jobs 顺序一致的结果列表。
+        on_result 在每个账号完成时于事件循环线程中调用。
+        """
+        if not jobs:
+            return []
+        return asyncio.run(self._run_all(jobs, on_result))
+
+    async def _run_all(self,
+                       jobs: List[Tuple[CheckinService, Dict[str, Any]]],
+                       on_result: Optional[ResultCallback]) -> List[CheckinResult]:
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        global_limit = asyncio.Semaphore(self.max_in_flight)
+        adapted = {}
+        service_limits = {}
+        for service, _ in jobs:
+            if id(service) in adapted:
+                continue
+            if isinstance(service, AsyncCheckinService):
+                adapted[id(service)] = service
+            else:
+                adapted[id(service)] = SyncServiceAdapter(service, executor)
+            service_limits[id(service)] = asyncio.Semaphore(
+                max(1, service.get_concurrency_config().get("max_workers", 1))
+            )
+
+        logger.log(SUMMARY, "=== 异步执行 %d 个账号 (在途上限 %d, 同步服务线程数 %d) ===\n",
+                   len(jobs), self.max_in_flight, self.max_workers)
+
+        async def _run_task(index, service, config):
+            result = await _advance_until_done(service, config)
+            if on_result is not None:
+                on_result(index, result)
+            return result
+
+        async def _advance_until_done(service, config):
+            runner = adapted[id(service)]
+            task = runner.create_task(config)
+            while True:
+                # 先获取服务级配额再占用全局配额，避免受限服务阻塞其他服务
+                async with service_limits[id(service)], global_limit:
+                    try:
+                        retry_delay = await runner.advance_task(task)
+                    except Exception as e:
+                        logger.error("账号任务执行异常: %s", e)
+                        return CheckinResult(
+                            service_name=service.service_name,
+                            account_id=task.account_id,
+                            success=False,
+                            message=f"处理失败: {str(e)}",
+                            checkin_time=task.checkin_time,
+                        )
+                if retry_delay is None:
+                    return task.result
+                # 重试等待期间释放配额，让其他账号继续执行
+                await asyncio.sleep(retry_delay)
+
+        try:
+            return list(await asyncio.gather(*(_run_task(i, s, c) for i, (s, c) in enumerate(jobs))))
+        finally:
+            for service in adapted.values():
+                await service.aclose()
+            executor.shutdown(wait=False)
+
+
+def create_runner(max_workers: int = None):
+    """根据 EXECUTION_MODE 创建对应的执行器"""
+    if get_execution_mode() == "async":
+        return AsyncAccountRunner(max_workers)
+    return AccountRunner(max_workers)
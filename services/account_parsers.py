@@ -0,0 +1,39 @@
+# services/account_parsers.py
+# 账号配置解析函数，仅依赖标准库，可在不导入 requests 等重量级依赖的情况下使用（见 preflight.py）
+from typing import List, Dict, Any
+
+
+def split_cookies(cookies_str: str) -> List[str]:
+    """按 || 拆分多账号 cookie 字符串，忽略空白项"""
+    return [cookie.strip() for cookie in cookies_str.split('||') if cookie.strip()]
+
+
+def glados_account_id(cookie: str) -> str:
+    """从 GLaDOS cookie 中提取用于展示和哈希的账号标识"""
+    # 查找koa:sess.sig=的位置
+    sig_prefix = "koa:sess.sig="
+    sig_index = cookie.find(sig_prefix)
+
+    if sig_index != -1:
+        # 找到了koa:sess.sig=，提取后面的10个字符
+        start_pos = sig_index + len(sig_prefix)
+        return cookie[start_pos:start_pos + 10] + '...'
+    # 如果没找到koa:sess.sig=，回退到原来的方法（前10个字符）
+    return cookie[:10] + '...'
+
+
+def ikuuu_account_id(cookie: str) -> str:
+    """从 iKuuu cookie 中提取用于展示和哈希的账号标识"""
+    return cookie[:10] + "..."
+
+
+def parse_cookie_accounts(cookies_str: str, base_url: str, account_id_func) -> List[Dict[str, Any]]:
+    """将多账号 cookie 字符串解析为账号配置列表"""
+    return [
+        {
+            'cookie': cookie,
+            'account_id': account_id_func(cookie),
+            'base_url': base_url,
+        }
+        for cookie in split_cookies(cookies_str)
+    ]
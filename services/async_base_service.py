@@ -0,0 +1,362 @@
+# services/async_base_service.py
+import asyncio
+import functools
+import json
+import time
+import requests
+from abc import abstractmethod
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+import metrics
+from logger import get_logger, SUMMARY
+from status_manager import beijing_now
+from .base_service import CheckinService, CheckinResult, CheckinTask
+from .request_hooks import RequestContext, account_context, run_before_request, run_after_response, run_on_error
+from .circuit_breaker import HostUnavailableError
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，缺失时回退到线程池执行 requests
+    aiohttp = None
+
+logger = get_logger(__name__)
+
+
+class AsyncResponse:
+    """异步请求的响应对象，提供与 requests.Response 一致的常用属性"""
+    def __init__(self,
+                 status_code: int,
+                 url: str,
+                 headers: Dict[str, str],
+                 text: str,
+                 history: List["AsyncResponse"] = None):
+        self.status_code = status_code
+        self.url = url
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.history = history or []
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+def _timing_trace_config() -> "aiohttp.TraceConfig":
+    """
+    aiohttp 请求追踪：请求带有 trace_request_ctx 时间点字典时，记录 DNS 解析、建立连接
+    （含 TLS 握手）、请求发出和收到响应头的时间点，字段与 http_transport.start_request_timing 一致
+    """
+    def _mark(*names):
+        async def callback(session, trace_config_ctx, params):
+            marks = trace_config_ctx.trace_request_ctx
+            if isinstance(marks, dict):
+                now = time.perf_counter()
+                for name in names:
+                    marks[name] = now
+        return callback
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(_mark('dns_start'))
+    trace_config.on_dns_resolvehost_end.append(_mark('dns_end'))
+    trace_config.on_connection_create_start.append(_mark('connect_start'))
+    trace_config.on_connection_create_end.append(_mark('connect_end'))
+    trace_config.on_request_headers_sent.append(_mark('request_start'))
+    trace_config.on_request_end.append(_mark('response_start'))
+    return trace_config
+
+
+class AsyncCheckinService(CheckinService):
+    """
+    异步签到服务的抽象基类。
+    make_request / do_checkin / get_usage_info / process_single_account / run 均为协程，
+    由同一个事件循环驱动，大量账号可同时在途而无需为每个账号占用一个线程。
+    安装 aiohttp 时使用原生异步 HTTP，否则回退为在线程池中执行 requests。
+    """
+    # 协程不占用线程，默认允许更高的单服务并发
+    _concurrency_config = {
+        'max_workers': 50
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._client_session = None
+
+    def _get_client_session(self):
+        """惰性创建 aiohttp 会话，必须在事件循环内调用"""
+        if self._client_session is None or self._client_session.closed:
+            self._client_session = aiohttp.ClientSession(trace_configs=[_timing_trace_config()])
+        return self._client_session
+
+    async def aclose(self):
+        """关闭底层 aiohttp 会话"""
+        if self._client_session is not None and not self._client_session.closed:
+            await self._client_session.close()
+        self._client_session = None
+
+    async def make_request(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        """统一的异步HTTP请求方法"""
+        if aiohttp is None:
+            loop = asyncio.get_running_loop()
+            sync_request = functools.partial(CheckinService.make_request, self, method, url, **kwargs)
+            return await loop.run_in_executor(None, sync_request)
+
+        # 设置默认headers
+        if 'headers' not in kwargs:
+            kwargs['headers'] = {}
+
+        if self.config.get('user_agent'):
+            kwargs['headers']['user-agent'] = self.config['user_agent']
+
+        # 设置超时
+        kwargs.pop('timeout', None)
+        timeout = aiohttp.ClientTimeout(total=self.config['timeout'])
+
+        # 主机熔断中时直接失败，不再等待连接超时
+        breaker = self.get_host_breaker(url)
+        if breaker is not None:
+            try:
+                breaker.before_request()
+            except HostUnavailableError as e:
+                if self.switch_mirror(url, force=True):
+                    raise requests.exceptions.ConnectionError(f"{e}，已切换镜像") from e
+                raise
+
+        # 按服务限流，令牌不足时在事件循环中等待
+        limiter = self.get_rate_limiter()
+        queued_at = time.perf_counter()
+        if limiter is not None:
+            wait = limiter.reserve()
+            if wait > 0:
+                try:
+                    await asyncio.sleep(wait)
+                except BaseException:
+                    if breaker is not None:
+                        breaker.release_probe()
+                    raise
+
+        # 注册了请求钩子时创建请求上下文，连接各阶段的时间点由 aiohttp 的追踪回调填写
+        hooks = self.get_request_hooks()
+        context = None
+        if hooks:
+            context = RequestContext(self.service_name, method, url, kwargs, time.perf_counter() - queued_at)
+            run_before_request(hooks, context)
+            context.start()
+            kwargs['trace_request_ctx'] = context.marks
+
+        host = urlparse(url).hostname or ''
+        started = time.perf_counter()
+        try:
+            try:
+                async with self._get_client_session().request(method, url, timeout=timeout, **kwargs) as resp:
+                    body = await resp.read()
+                    text = body.decode(resp.get_encoding(), errors='replace')
+                    history = [AsyncResponse(r.status, str(r.url), dict(r.headers), '') for r in resp.history]
+                    response = AsyncResponse(resp.status, str(resp.url), dict(resp.headers), text, history)
+            except asyncio.TimeoutError as e:
+                metrics.inc('http_errors_total', host=host, error='Timeout')
+                if breaker is not None:
+                    breaker.record_failure()
+                self.switch_mirror(url)
+                raise requests.exceptions.Timeout(f"请求超时: {url}") from e
+            except aiohttp.ClientConnectionError as e:
+                metrics.inc('http_errors_total', host=host, error='ConnectionError')
+                if breaker is not None:
+                    breaker.record_failure()
+                self.switch_mirror(url)
+                raise requests.exceptions.ConnectionError(f"{e}") from e
+            except BaseException:
+                if breaker is not None:
+                    breaker.release_probe()
+                raise
+        except Exception as e:
+            if context is not None:
+                context.finish(error=e)
+                run_on_error(hooks, context, e)
+            raise
+        metrics.record_http(host, response.status_code, time.perf_counter() - started, len(body))
+        if context is not None:
+            context.finish(response.status_code, len(body))
+            run_after_response(hooks, context, response)
+        if breaker is not None:
+            breaker.record_success()
+        if self.mirror_resolver is not None:
+            self.mirror_resolver.report_success(url)
+        self.observe_rate_limit(limiter, response.status_code, response.headers)
+
+        if response.status_code >= 400:
+            # 增强异常信息，附带响应体摘要
+            body_preview = response.text[:200].replace("\n", " ").strip()
+            raise requests.exceptions.HTTPError(
+                f"{response.status_code} Error for url: {url} | 响应内容: {body_preview}",
+                response=response
+            )
+        return response
+
+    @abstractmethod
+    async def login(self, account_config: Dict[str, Any]) -> bool:
+        """登录账号，返回是否成功。对于基于cookie的服务，此方法为空实现"""
+        pass
+
+    @abstractmethod
+    async def do_checkin(self, account_config: Dict[str, Any]) -> Dict[str, Any]:
+        """执行签到，返回签到结果数据"""
+        pass
+
+    @abstractmethod
+    async def get_usage_info(self, account_config: Dict[str, Any]) -> Dict[str, Any]:
+        """获取用量信息，返回用量数据"""
+        pass
+
+    async def advance_task(self, task: CheckinTask) -> Optional[float]:
+        """
+        推进一次签到任务（异步版本），语义与 CheckinService.advance_task 一致。
+        返回 None 表示流程结束，返回秒数表示需要在该时间后再次调用。
+        """
+        account_config = task.account_config
+        log = self._task_logger(task)
+        with account_context(task.account_id):
+            try:
+                if task.attempts == 0:
+                    log.info("  - 开始处理账号: %s", log.extra['account'])
+
+                    # 步骤1: 登录
+                    with metrics.timer('login', service=self.service_name):
+                        logged_in = await self.login(account_config)
+                    if not logged_in:
+                        task.result = CheckinResult(
+                            service_name=self.service_name,
+                            account_id=task.account_id,
+                            success=False,
+                            message="登录失败",
+                            checkin_time=task.checkin_time
+                        )
+                        return None
+
+                    # 用量信息与签到结果无关时，与签到请求并行获取
+                    if self.get_pipeline_config().get('concurrent_usage'):
+                        task.usage_future = asyncio.ensure_future(self.get_usage_info(account_config))
+
+                # 步骤2: 签到
+                try:
+                    with metrics.timer('checkin_attempt', service=self.service_name, attempt=task.attempts + 1):
+                        checkin_result = await self.do_checkin(account_config)
+                    retry_delay = self._record_attempt(task, checkin_result, None)
+                except Exception as e:
+                    retry_delay = self._record_attempt(task, None, e)
+                if retry_delay is not None:
+                    return retry_delay
+
+                # 步骤3: 获取用量信息
+                try:
+                    with metrics.timer('usage_fetch', service=self.service_name):
+                        usage_info = await self._collect_usage_info_async(task)
+                except Exception as e:
+                    log.warning("      获取用量信息失败: %s", e)
+                    usage_info = {'usage_error': f'获取用量信息失败: {str(e)}'}
+
+                task.result = self._build_task_result(task, usage_info)
+                return None
+
+            except Exception as e:
+                task.result = self._build_task_error(task, e)
+                return None
+
+    async def _collect_usage_info_async(self, task: CheckinTask) -> Optional[Dict[str, Any]]:
+        """获取用量信息（异步版本）：已与签到请求并行发起时等待其结果，否则单独请求"""
+        usage_future = task.usage_future
+        task.usage_future = None
+        if usage_future is not None:
+            return await usage_future
+        return await self.get_usage_info(task.account_config)
+
+    async def process_single_account(self, account_config: Dict[str, Any]) -> CheckinResult:
+        """处理单个账号的完整流程（异步版本），重试等待使用 asyncio.sleep，不阻塞其他账号"""
+        task = self.create_task(account_config)
+        while True:
+            retry_delay = await self.advance_task(task)
+            if retry_delay is None:
+                return task.result
+            await asyncio.sleep(retry_delay)
+
+    async def run(self) -> List[CheckinResult]:
+        """
+        异步执行完整的签到流程，服务内所有账号并发处理。
+        返回所有账号的处理结果列表。
+        """
+        logger.log(SUMMARY, "-" * 50)
+        logger.log(SUMMARY, "开始执行服务: 【%s】", self.service_name)
+
+        try:
+            account_configs = self.get_account_configs()
+            if not account_configs:
+                logger.warning("  - 未找到任何账号配置")
+                return []
+
+            logger.info("  - 找到 %d 个账号", len(account_configs))
+            limit = asyncio.Semaphore(max(1, self.get_concurrency_config().get('max_workers', 1)))
+
+            async def _bounded(config):
+                async with limit:
+                    return await self.process_single_account(config)
+
+            results = list(await asyncio.gather(*(_bounded(c) for c in account_configs)))
+
+            success_count = sum(1 for r in results if r.success)
+            logger.log(SUMMARY, "服务【%s】执行完成: %d/%d 个账号成功", self.service_name, success_count, len(results))
+
+        except Exception as e:
+            logger.error("服务【%s】执行失败: %s", self.service_name, e)
+            results = [CheckinResult(
+                service_name=self.service_name,
+                account_id="配置错误",
+                success=False,
+                message=f"服务配置错误: {str(e)}",
+                checkin_time=beijing_now().strftime('%Y-%m-%d %H:%M:%S')
+            )]
+        finally:
+            await self.aclose()
+
+        logger.log(SUMMARY, "-" * 50 + "\n")
+        return results
+
+
+class SyncServiceAdapter:
+    """
+    同步服务适配器。
+    将现有的 CheckinService 包装为协程接口，在线程池中执行阻塞调用，
+    使新旧服务可以在同一个事件循环中混合运行。
+    """
+
+    def __init__(self, service: CheckinService, executor: Optional[Executor] = None):
+        self.service = service
+        self.executor = executor
+
+    @property
+    def service_name(self) -> str:
+        return self.service.service_name
+
+    def get_concurrency_config(self) -> Dict[str, Any]:
+        return self.service.get_concurrency_config()
+
+    def get_account_configs(self) -> List[Dict[str, Any]]:
+        return self.service.get_account_configs()
+
+    def create_task(self, account_config: Dict[str, Any]) -> CheckinTask:
+        return self.service.create_task(account_config)
+
+    async def advance_task(self, task: CheckinTask) -> Optional[float]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.service.advance_task, task)
+
+    async def process_single_account(self, account_config: Dict[str, Any]) -> CheckinResult:
+        task = self.create_task(account_config)
+        while True:
+            retry_delay = await self.advance_task(task)
+            if retry_delay is None:
+                return task.result
+            await asyncio.sleep(retry_delay)
+
+    async def aclose(self):
+        """同步服务无需关闭异步资源"""
+        pass
@@ -1,33 +1,111 @@
 # services/base_service.py
+import contextvars
+import logging
 import os
+import random
 import requests
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+from .retry_policy import RetryPolicy, RetryDecision, parse_retry_after
+from .rate_limiter import TokenBucket, get_rate_limiter
+from .circuit_breaker import CircuitBreaker, HostUnavailableError, get_circuit_breaker
+from .mirror_resolver import MirrorResolver
+from .request_hooks import (RequestHook, RequestContext, account_context, get_request_hooks,
+                            run_before_request, run_after_response, run_on_error)
+from http_transport import get_session, start_request_timing, stop_request_timing
+from status_manager import beijing_now
+from logger import get_logger, SUMMARY
+import metrics
+
+logger = get_logger(__name__)
+
+
+# 签到/状态接口返回的原始响应，提取所需字段后默认不再保留在结果中，可通过 KEEP_RAW_PAYLOADS=1 保留
+RAW_PAYLOAD_KEYS = ('checkin_response', 'status_response')
+
+
+def _keep_raw_payloads() -> bool:
+    return os.environ.get('KEEP_RAW_PAYLOADS', '').strip().lower() in ('1', 'true', 'yes')
 
 
 class CheckinResult:
-    """签到结果类"""
+    """签到结果类，使用 __slots__ 以减少大量账号时的内存占用"""
+    __slots__ = ('service_name', 'account_id', 'success', 'message', 'checkin_time', 'data', 'duration')
+
     def __init__(self, 
                  service_name: str, 
                  account_id: str,
                  success: bool, 
                  message: str,
                  checkin_time: str,
-                 data: Dict[str, Any] = None):
+                 data: Dict[str, Any] = None,
+                 duration: float = None):
         self.service_name = service_name
         self.account_id = account_id
         self.success = success
         self.message = message
         self.checkin_time = checkin_time
         self.data = data or {}
+        self.duration = duration  # 账号处理总耗时（秒），包含重试等待
 
     def __str__(self):
         status = "成功" if self.success else "失败"
         return f"[{self.service_name}] {self.account_id} - {status}: {self.message}"
 
 
+class CheckinTask:
+    """
+    单个账号签到流程的执行状态。
+    调度器通过 CheckinService.advance_task 分步推进任务，
+    重试等待期间不占用执行线程，可先处理其他账号。
+    """
+    def __init__(self, account_config: Dict[str, Any]):
+        self.account_config = account_config
+        self.account_id = account_config.get('account_id', '未知账号')
+        self.checkin_time = beijing_now().strftime('%Y-%m-%d %H:%M:%S')
+        self.started_at = time.monotonic()
+        self.attempts = 0  # 已执行的签到尝试次数
+        self.checkin_result = None  # 最近一次签到尝试的结果
+        self.usage_future = None  # 与签到并行获取用量信息的 Future
+        self.result = None  # 流程结束后的 CheckinResult
+        self.log = None  # 带服务名和脱敏账号的日志适配器，见 CheckinService._task_logger
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+
+# 与签到请求并行获取用量信息的共享线程池，首次使用时创建。
+# 每个执行线程最多同时等待一个用量请求，线程池大小与执行器的并发数一致时用量请求不会排队，
+# 由 configure_usage_executor 按执行器的 max_workers 设置
+DEFAULT_USAGE_WORKERS = 4
+_usage_executor = None
+_usage_workers = DEFAULT_USAGE_WORKERS
+_usage_executor_lock = threading.Lock()
+
+
+def configure_usage_executor(max_workers: int):
+    """按执行器的并发数设置用量线程池大小，已创建的线程池大小不同时重新创建"""
+    global _usage_executor, _usage_workers
+    with _usage_executor_lock:
+        _usage_workers = max(1, max_workers)
+        if _usage_executor is not None and _usage_executor._max_workers != _usage_workers:
+            _usage_executor.shutdown(wait=False)
+            _usage_executor = None
+
+
+def _get_usage_executor() -> ThreadPoolExecutor:
+    global _usage_executor
+    with _usage_executor_lock:
+        if _usage_executor is None:
+            _usage_executor = ThreadPoolExecutor(max_workers=_usage_workers, thread_name_prefix="usage")
+        return _usage_executor
+
+
 class CheckinService(ABC):
     """
     签到服务的抽象基类。
@@ -36,16 +114,162 @@ class CheckinService(ABC):
     _retry_config = {
         'enabled': False,  # 默认不启用重试
         'max_retries': 3,  # 重试次数
-        'delay': 5  # 重试间隔，单位：秒
+        'delay': 5,  # 首次重试间隔，单位：秒
+        'backoff': 2,  # 指数退避倍数，每次重试间隔乘以该值
+        'max_delay': 60,  # 重试间隔上限，单位：秒
+        'jitter': 0.2,  # 随机抖动比例，避免大量账号同时重试
+        'max_retry_after': 300  # 服务端 Retry-After 超过该秒数时放弃本次重试
     }
 
+    # 默认失败分类策略，子类可替换为自定义的 RetryPolicy 子类实例
+    _retry_policy = RetryPolicy()
+
+    @classmethod
+    def get_retry_policy(cls) -> RetryPolicy:
+        """
+        获取失败分类策略
+        子类可以重写此方法或 _retry_policy 来区分可重试与永久失败
+        """
+        return cls._retry_policy
+
+    def classify_failure(self,
+                         checkin_result: Optional[Dict[str, Any]],
+                         error: Optional[Exception]) -> RetryDecision:
+        """对一次失败的签到尝试进行分类，判断是否值得重试"""
+        return self.get_retry_policy().classify(checkin_result, error)
+
     @classmethod
     def get_retry_config(cls) -> Dict[str, Any]:
         """
         获取重试配置
-        子类可以重写此方法来自定义重试配置
+        子类可以重写此方法来自定义重试配置，未指定的字段使用基类默认值
+        """
+        return {**CheckinService._retry_config, **cls._retry_config}
+
+    def get_retry_delay(self, attempt: int) -> float:
+        """
+        计算第 attempt 次失败后的重试等待时间：指数退避 + 随机抖动，并受 max_delay 限制
+        """
+        retry_config = self.get_retry_config()
+        delay = retry_config['delay'] * (retry_config['backoff'] ** max(0, attempt - 1))
+        jitter = retry_config['jitter']
+        if jitter:
+            delay *= random.uniform(1 - jitter, 1 + jitter)
+        return max(0.0, min(delay, retry_config['max_delay']))
+
+    def get_max_attempts(self) -> int:
+        """签到最多尝试的次数，未启用重试时只尝试一次"""
+        retry_config = self.get_retry_config()
+        if not retry_config.get('enabled', False):
+            return 1
+        return max(1, retry_config['max_retries'])
+
+    # 默认并发配置：单个服务同时处理的账号数上限
+    _concurrency_config = {
+        'max_workers': 2
+    }
+
+    # 默认流水线配置：用量信息是否与签到结果无关，可与签到请求并行获取
+    _pipeline_config = {
+        'concurrent_usage': False
+    }
+
+    @classmethod
+    def get_pipeline_config(cls) -> Dict[str, Any]:
+        """
+        获取流水线配置
+        子类可以重写此方法或 _pipeline_config 来声明可并行执行的阶段
+        """
+        return cls._pipeline_config
+
+    # 默认熔断配置：同一主机连续多次连接失败或超时后，冷却时间内的请求直接失败
+    _circuit_breaker_config = {
+        'enabled': True,
+        'failure_threshold': 3,  # 连续连接失败次数阈值
+        'reset_timeout': 30  # 熔断冷却时间，之后放行一个探测请求，单位：秒
+    }
+
+    @classmethod
+    def get_circuit_breaker_config(cls) -> Dict[str, Any]:
+        """
+        获取熔断配置
+        子类可以重写此方法或 _circuit_breaker_config 来自定义熔断行为，未指定的字段使用基类默认值
+        """
+        return {**CheckinService._circuit_breaker_config, **cls._circuit_breaker_config}
+
+    def get_host_breaker(self, url: str) -> Optional[CircuitBreaker]:
+        """获取请求地址所属主机的熔断器，未启用熔断时返回 None"""
+        breaker_config = self.get_circuit_breaker_config()
+        host = urlparse(url).netloc
+        if not breaker_config.get('enabled', False) or not host:
+            return None
+        return get_circuit_breaker(host, breaker_config['failure_threshold'], breaker_config['reset_timeout'])
+
+    # 默认限流配置：同一服务所有账号共用一个令牌桶，速率在 rate 和 max_rate 之间自适应
+    _rate_limit_config = {
+        'enabled': True,
+        'rate': 5,  # 初始每秒请求数
+        'max_rate': 100,  # 未遇到限流时逐步提高到的速率上限，单位：请求/秒
+        'burst': 10,  # 允许的突发请求数
+        'min_rate': 0.2,  # 触发限流后速率下限，单位：请求/秒
+        'backoff_factor': 0.5,  # 观察到 429 或 Retry-After 时速率乘以该值
+        'recovery_step': 0.5  # 每次成功请求增加的速率，单位：请求/秒
+    }
+
+    @classmethod
+    def get_rate_limit_config(cls) -> Dict[str, Any]:
+        """
+        获取限流配置
+        子类可以重写此方法或 _rate_limit_config 来自定义请求速率，未指定的字段使用基类默认值
         """
-        return cls._retry_config
+        return {**CheckinService._rate_limit_config, **cls._rate_limit_config}
+
+    def get_rate_limiter(self) -> Optional[TokenBucket]:
+        """获取本服务的限流器，未启用限流或设置了环境变量 RATE_LIMIT_ENABLED=0 时返回 None"""
+        rate_config = self.get_rate_limit_config()
+        if not rate_config.get('enabled', False) or rate_config['rate'] <= 0:
+            return None
+        if os.environ.get('RATE_LIMIT_ENABLED', '').strip().lower() in ('0', 'false', 'no'):
+            return None
+        return get_rate_limiter(self.service_name, rate_config)
+
+    def observe_rate_limit(self, limiter: Optional[TokenBucket], status_code: int, headers: Dict[str, str]):
+        """根据响应调整限流速率：429 或带 Retry-After 的错误响应降速，成功响应逐步恢复"""
+        if limiter is None:
+            return
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if status_code == 429 or (status_code >= 400 and retry_after is not None):
+            limiter.penalize(retry_after)
+        elif status_code < 400:
+            limiter.reward()
+
+    def get_request_hooks(self) -> List[RequestHook]:
+        """本服务生效的请求钩子，见 services.request_hooks.register_request_hook"""
+        return get_request_hooks(self.service_name)
+
+    def get_base_url(self, account_config: Dict[str, Any]) -> str:
+        """请求使用的基础地址：配置了镜像选择器时使用当前镜像，否则使用账号配置中的地址"""
+        if self.mirror_resolver is not None:
+            return self.mirror_resolver.current()
+        return account_config['base_url']
+
+    def switch_mirror(self, url: str, force: bool = False) -> bool:
+        """
+        报告请求地址连接失败，由镜像选择器决定是否切换镜像
+
+        :return: 重试时是否会使用其他镜像
+        """
+        if self.mirror_resolver is None:
+            return False
+        return self.mirror_resolver.report_failure(url, force)
+
+    @classmethod
+    def get_concurrency_config(cls) -> Dict[str, Any]:
+        """
+        获取并发配置
+        子类可以重写此方法或 _concurrency_config 来自定义单服务并发上限
+        """
+        return cls._concurrency_config
 
     def _is_already_checked_in(self, result: Dict[str, Any]) -> bool:
         """
@@ -55,7 +279,10 @@ class CheckinService(ABC):
         raise NotImplementedError("子类必须实现此方法")
 
     def __init__(self):
-        self.session = requests.Session()
+        # 所有服务共用进程级连接池会话，同一主机的连接在服务和线程间复用
+        self.session = get_session()
+        # 多镜像服务在子类中设置，为 None 时使用账号配置中的 base_url
+        self.mirror_resolver: Optional[MirrorResolver] = None
         self.config = self.load_config()
 
     def load_config(self) -> Dict[str, str]:
@@ -78,8 +305,55 @@ class CheckinService(ABC):
         # 设置超时
         kwargs['timeout'] = self.config['timeout']
         
+        # 主机熔断中时直接失败，不再等待连接超时；配置了多个镜像时切换镜像后按可重试失败处理
+        breaker = self.get_host_breaker(url)
+        if breaker is not None:
+            try:
+                breaker.before_request()
+            except HostUnavailableError as e:
+                if self.switch_mirror(url, force=True):
+                    raise requests.exceptions.ConnectionError(f"{e}，已切换镜像") from e
+                raise
+
+        # 按服务限流，令牌不足时等待
+        limiter = self.get_rate_limiter()
+        queued_at = time.perf_counter()
+        if limiter is not None:
+            limiter.acquire()
+
+        # 注册了请求钩子时创建请求上下文，并开启连接层计时
+        hooks = self.get_request_hooks()
+        context = None
+        if hooks:
+            context = RequestContext(self.service_name, method, url, kwargs, time.perf_counter() - queued_at)
+            run_before_request(hooks, context)
+            context.start(start_request_timing())
+
         # 发起请求
-        response = self.session.request(method, url, **kwargs)
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception as e:
+            if context is not None:
+                stop_request_timing()
+                context.finish(error=e)
+                run_on_error(hooks, context, e)
+            if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                if breaker is not None:
+                    breaker.record_failure()
+                self.switch_mirror(url)
+            elif breaker is not None:
+                breaker.release_probe()
+            raise
+        if context is not None:
+            stop_request_timing()
+            context.finish(response.status_code, len(response.content or b''))
+            run_after_response(hooks, context, response)
+        if breaker is not None:
+            breaker.record_success()
+        if self.mirror_resolver is not None:
+            self.mirror_resolver.report_success(url)
+        self.observe_rate_limit(limiter, response.status_code, response.headers)
+
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -122,137 +396,231 @@ class CheckinService(ABC):
             return account_id  # 太短的账号不做处理
         return account_id[:3] + '*' * (len(account_id) - 6) + account_id[-3:]
 
-    def process_single_account(self, account_config: Dict[str, Any]) -> CheckinResult:
-        """处理单个账号的完整流程"""
-        account_id = account_config.get('account_id', '未知账号')
-        checkin_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        retry_config = self.get_retry_config()
-        
-        try:
-            print(f"  - 开始处理账号: {self._desensitize_account_id(account_id)}")
-            
-            # 步骤1: 登录
-            print(f"    * 正在登录...")
-            login_success = self.login(account_config)
-            if not login_success:
-                return CheckinResult(
-                    service_name=self.service_name,
-                    account_id=account_id,
-                    success=False,
-                    message="登录失败",
-                    checkin_time=checkin_time
-                )
-            
-            # 步骤2: 签到
-            print(f"    * 正在执行签到...")
-            checkin_result = None
-            retries = 0
-            while retries < retry_config['max_retries']:
+    def _task_logger(self, task: CheckinTask) -> logging.LoggerAdapter:
+        """任务的日志适配器，JSON 日志中附带服务名和脱敏后的账号"""
+        if task.log is None:
+            task.log = logging.LoggerAdapter(logger, {
+                'service': self.service_name,
+                'account': self._desensitize_account_id(task.account_id),
+            })
+        return task.log
+
+    def create_task(self, account_config: Dict[str, Any]) -> CheckinTask:
+        """为单个账号创建签到任务"""
+        return CheckinTask(account_config)
+
+    def advance_task(self, task: CheckinTask) -> Optional[float]:
+        """
+        推进一次签到任务：首次调用时执行登录，每次调用执行一次签到尝试。
+        返回 None 表示流程结束（结果见 task.result），返回秒数表示需要在该时间后再次调用。
+        """
+        account_config = task.account_config
+        log = self._task_logger(task)
+        with account_context(task.account_id):
+            try:
+                if task.attempts == 0:
+                    log.info("  - 开始处理账号: %s", log.extra['account'])
+
+                    # 步骤1: 登录
+                    log.debug("    * 正在登录...")
+                    with metrics.timer('login', service=self.service_name):
+                        logged_in = self.login(account_config)
+                    if not logged_in:
+                        task.result = CheckinResult(
+                            service_name=self.service_name,
+                            account_id=task.account_id,
+                            success=False,
+                            message="登录失败",
+                            checkin_time=task.checkin_time
+                        )
+                        return None
+
+                    # 用量信息与签到结果无关时，与签到请求并行获取
+                    if self.get_pipeline_config().get('concurrent_usage'):
+                        task.usage_future = _get_usage_executor().submit(
+                            contextvars.copy_context().run, self.get_usage_info, account_config)
+
+                    # 步骤2: 签到
+                    log.debug("    * 正在执行签到...")
+
                 try:
-                    checkin_result = self.do_checkin(account_config)
-                    
-                    # 如果已经签到过，直接返回结果
-                    if self._is_already_checked_in(checkin_result):
-                        print(f"      已签到过，无需重试，视为处理成功")
-                        checkin_result['success'] = True
-                        checkin_result['message'] = checkin_result.get('message', '已签到过')
-                        break
-                    
-                    # 如果签到成功，直接返回
-                    if checkin_result.get('success', False):
-                        print(f"      签到成功")
-                        break
-                    
-                    # 需要重试的情况
-                    retries += 1
-                    if retries < retry_config['max_retries']:
-                        print(f"      第 {retries} 次重试，等待 {retry_config['delay']} 秒...")
-                        time.sleep(retry_config['delay'])
-                    else:
-                        print(f"      达到最大重试次数")
-                        
+                    with metrics.timer('checkin_attempt', service=self.service_name, attempt=task.attempts + 1):
+                        checkin_result = self.do_checkin(account_config)
+                    retry_delay = self._record_attempt(task, checkin_result, None)
                 except Exception as e:
-                    retries += 1
-                    if retries < retry_config['max_retries']:
-                        print(f"      发生异常: {str(e)}，第 {retries} 次重试，等待 {retry_config['delay']} 秒...")
-                        time.sleep(retry_config['delay'])
-                    else:
-                        print(f"      达到最大重试次数，签到失败: {str(e)}")
-                        checkin_result = {
-                            'success': False,
-                            'message': f'{str(e)}'
-                        }
-                        break
-            
-            # 步骤3: 获取用量信息
-            print(f"    * 正在获取用量信息...")
-            try:
-                usage_info = self.get_usage_info(account_config)
-                if usage_info is None:
-                    usage_info = {'usage_error': '获取用量信息失败'}
+                    retry_delay = self._record_attempt(task, None, e)
+                if retry_delay is not None:
+                    return retry_delay
+
+                # 步骤3: 获取用量信息
+                log.debug("    * 正在获取用量信息...")
+                try:
+                    with metrics.timer('usage_fetch', service=self.service_name):
+                        usage_info = self._collect_usage_info(task)
+                except Exception as e:
+                    log.warning("      获取用量信息失败: %s", e)
+                    usage_info = {'usage_error': f'获取用量信息失败: {str(e)}'}
+
+                task.result = self._build_task_result(task, usage_info)
+                return None
+
             except Exception as e:
-                print(f"      获取用量信息失败: {str(e)}")
-                usage_info = {'usage_error': f'获取用量信息失败: {str(e)}'}
-            
-            # 合并数据
-            result_data = {**(checkin_result or {}), **usage_info}
-            
-            print(f"    * 账号 {self._desensitize_account_id(account_id)} 处理完成")
-            return CheckinResult(
-                service_name=self.service_name,
-                account_id=account_id,
-                success=checkin_result.get('success', False) if checkin_result else False,
-                message=checkin_result.get('message', '签到完成') if checkin_result else '签到失败',
-                checkin_time=checkin_time,
-                data=result_data
-            )
-            
-        except Exception as e:
-            print(f"    * 账号 {self._desensitize_account_id(account_id)} 处理失败: {str(e)}")
-            return CheckinResult(
-                service_name=self.service_name,
-                account_id=account_id,
-                success=False,
-                message=f"处理失败: {str(e)}",
-                checkin_time=checkin_time
-            )
+                task.result = self._build_task_error(task, e)
+                return None
+
+    def _collect_usage_info(self, task: CheckinTask) -> Optional[Dict[str, Any]]:
+        """
+        获取用量信息：已与签到请求并行发起时等待其结果，否则单独请求
+        """
+        usage_future: Optional[Future] = task.usage_future
+        task.usage_future = None
+        if usage_future is not None:
+            return usage_future.result()
+        return self.get_usage_info(task.account_config)
+
+    def _record_attempt(self,
+                        task: CheckinTask,
+                        checkin_result: Optional[Dict[str, Any]],
+                        error: Optional[Exception]) -> Optional[float]:
+        """
+        记录一次签到尝试的结果，返回需要等待的重试秒数；无需重试时返回 None
+        """
+        task.attempts += 1
+        max_attempts = self.get_max_attempts()
+        log = self._task_logger(task)
+
+        if error is None:
+            task.checkin_result = checkin_result
+
+            # 如果已经签到过，直接返回结果
+            if self._is_already_checked_in(checkin_result):
+                log.info("      已签到过，无需重试，视为处理成功")
+                checkin_result['success'] = True
+                checkin_result['message'] = checkin_result.get('message', '已签到过')
+                return None
+
+            # 如果签到成功，直接返回
+            if checkin_result.get('success', False):
+                log.info("      签到成功")
+                return None
+        else:
+            task.checkin_result = {
+                'success': False,
+                'message': f'{str(error)}'
+            }
+
+        # 永久性失败（cookie 过期、认证失败等）不再重试
+        decision = self.classify_failure(checkin_result, error)
+        if not decision.retryable:
+            log.warning("      检测到不可重试的失败: %s，停止重试", decision.reason)
+            return None
+
+        if task.attempts >= max_attempts:
+            if error is None:
+                log.warning("      达到最大重试次数")
+            else:
+                log.warning("      达到最大重试次数，签到失败: %s", error)
+            return None
+
+        # 需要重试的情况：交由调度器在等待时间后重新排队，服务端指定的 Retry-After 优先
+        retry_delay = self.get_retry_delay(task.attempts)
+        if decision.retry_after is not None:
+            if decision.retry_after > self.get_retry_config()['max_retry_after']:
+                log.warning("      服务端要求等待 %.0f 秒，超过上限，停止重试", decision.retry_after)
+                return None
+            retry_delay = max(retry_delay, decision.retry_after)
+        if error is None:
+            log.info("      第 %d 次重试，等待 %.1f 秒...", task.attempts, retry_delay)
+        else:
+            log.info("      发生异常: %s，第 %d 次重试，等待 %.1f 秒...", error, task.attempts, retry_delay)
+        metrics.inc('retries_total', service=self.service_name)
+        return retry_delay
+
+    def _build_task_result(self, task: CheckinTask, usage_info: Optional[Dict[str, Any]]) -> CheckinResult:
+        """合并签到结果与用量信息，生成最终结果"""
+        if usage_info is None:
+            usage_info = {'usage_error': '获取用量信息失败'}
+        checkin_result = task.checkin_result
+
+        # 合并数据，原始响应在提取完字段后丢弃
+        result_data = {**(checkin_result or {}), **usage_info}
+        if not _keep_raw_payloads():
+            for key in RAW_PAYLOAD_KEYS:
+                result_data.pop(key, None)
+
+        log = self._task_logger(task)
+        log.info("    * 账号 %s 处理完成", log.extra['account'])
+        return CheckinResult(
+            service_name=self.service_name,
+            account_id=task.account_id,
+            success=checkin_result.get('success', False) if checkin_result else False,
+            message=checkin_result.get('message', '签到完成') if checkin_result else '签到失败',
+            checkin_time=task.checkin_time,
+            data=result_data,
+            duration=time.monotonic() - task.started_at
+        )
+
+    def _build_task_error(self, task: CheckinTask, error: Exception) -> CheckinResult:
+        """流程中出现未预期异常时生成失败结果"""
+        log = self._task_logger(task)
+        log.error("    * 账号 %s 处理失败: %s", log.extra['account'], error)
+        return CheckinResult(
+            service_name=self.service_name,
+            account_id=task.account_id,
+            success=False,
+            message=f"处理失败: {str(error)}",
+            checkin_time=task.checkin_time,
+            duration=time.monotonic() - task.started_at
+        )
+
+    def process_single_account(self, account_config: Dict[str, Any]) -> CheckinResult:
+        """
+        处理单个账号的完整流程。
+        在当前线程中顺序推进任务，重试等待期间阻塞；并发执行时由调度器直接调用 advance_task。
+        """
+        task = self.create_task(account_config)
+        while True:
+            retry_delay = self.advance_task(task)
+            if retry_delay is None:
+                return task.result
+            time.sleep(retry_delay)
 
     def run(self) -> List[CheckinResult]:
         """
         执行完整的签到流程。
         返回所有账号的处理结果列表。
         """
-        print("-" * 50)
-        print(f"开始执行服务: 【{self.service_name}】")
+        logger.log(SUMMARY, "-" * 50)
+        logger.log(SUMMARY, "开始执行服务: 【%s】", self.service_name)
         
         try:
             # 获取所有账号配置
             account_configs = self.get_account_configs()
             if not account_configs:
-                print(f"  - 未找到任何账号配置")
+                logger.warning("  - 未找到任何账号配置")
                 return []
             
-            print(f"  - 找到 {len(account_configs)} 个账号")
+            logger.info("  - 找到 %d 个账号", len(account_configs))
             
             # 处理每个账号
             results = []
             for i, account_config in enumerate(account_configs, 1):
-                print(f"  - 处理第 {i}/{len(account_configs)} 个账号")
+                logger.debug("  - 处理第 %d/%d 个账号", i, len(account_configs))
                 result = self.process_single_account(account_config)
                 results.append(result)
             
             success_count = sum(1 for r in results if r.success)
-            print(f"服务【{self.service_name}】执行完成: {success_count}/{len(results)} 个账号成功")
+            logger.log(SUMMARY, "服务【%s】执行完成: %d/%d 个账号成功", self.service_name, success_count, len(results))
             
         except Exception as e:
-            print(f"服务【{self.service_name}】执行失败: {str(e)}")
+            logger.error("服务【%s】执行失败: %s", self.service_name, e)
             results = [CheckinResult(
                 service_name=self.service_name,
                 account_id="配置错误",
                 success=False,
                 message=f"服务配置错误: {str(e)}",
-                checkin_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                checkin_time=beijing_now().strftime('%Y-%m-%d %H:%M:%S')
             )]
         
-        print("-" * 50 + "\n")
+        logger.log(SUMMARY, "-" * 50 + "\n")
         return results
@@ -0,0 +1,90 @@
+# services/circuit_breaker.py
+# 按主机的熔断器：连续多次连接失败或超时后，同一主机的后续请求直接失败，
+# 冷却时间过后放行一个探测请求（半开状态），探测成功才恢复正常请求。
+import threading
+import time
+from typing import Dict
+from .retry_policy import PermanentCheckinError
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class HostUnavailableError(PermanentCheckinError):
+    """主机处于熔断状态，请求未发出即失败，不再重试"""
+    pass
+
+
+class CircuitBreaker:
+    """单个主机的熔断器，线程安全"""
+
+    def __init__(self, host: str, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.host = host
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0  # 连续连接失败次数
+        self.opened_at = 0.0
+        self._probing = False  # 半开状态下是否已有探测请求在途
+        self._lock = threading.Lock()
+
+    def before_request(self) -> bool:
+        """
+        请求前检查，熔断中直接抛出 HostUnavailableError。
+
+        :return: 本次请求是否为半开状态下的探测请求
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                logger.info("      主机 %s 熔断冷却结束，发送探测请求...", self.host)
+                return True
+            raise HostUnavailableError(f"主机不可用: {self.host}（连续 {self.failures} 次连接失败，熔断中）")
+
+    def record_success(self):
+        """收到任意 HTTP 响应即视为主机可达"""
+        with self._lock:
+            if self.state != CLOSED:
+                logger.warning("      主机 %s 探测成功，恢复请求", self.host)
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """记录一次连接失败或超时，达到阈值或探测失败时打开熔断"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning("      主机 %s 连续 %d 次连接失败，%.0f 秒内的请求将直接失败",
+                                   self.host, self.failures, self.reset_timeout)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """探测请求因与连接无关的原因结束时，允许下一个请求继续探测"""
+        with self._lock:
+            self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(host: str, failure_threshold: int = 3, reset_timeout: float = 30) -> CircuitBreaker:
+    """获取进程级共享的主机熔断器，首次获取时按给定参数创建"""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host, failure_threshold, reset_timeout)
+            _breakers[host] = breaker
+        return breaker
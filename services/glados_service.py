@@ -3,6 +3,11 @@ import os
 import json
 from typing import List, Dict, Any
 from .base_service import CheckinService
+from .account_parsers import parse_cookie_accounts, glados_account_id
+from .mirror_resolver import MirrorResolver, parse_base_urls
+from logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class GLaDOSService(CheckinService):
@@ -15,9 +20,25 @@ class GLaDOSService(CheckinService):
         'delay': 10  # 重试间隔，单位：秒
     }
 
+    # 站点对同一出口 IP 的请求频率敏感，速率只在配置值附近探测
+    _rate_limit_config = {
+        'max_rate': 10
+    }
+
+    # 用户状态接口与签到结果无关，可与签到请求并行获取
+    _pipeline_config = {
+        'concurrent_usage': True
+    }
+
     def __init__(self):
         super().__init__()
-        self.base_url = os.environ.get('GLADOS_BASE_URL', 'https://glados.cloud')
+        # GLADOS_BASE_URL 可配置多个以逗号分隔的镜像地址，启动时选用最快的可用镜像
+        candidates = parse_base_urls(os.environ.get('GLADOS_BASE_URL', '')) or ['https://glados.cloud']
+        self.mirror_resolver = MirrorResolver(self.service_name, candidates)
+
+    @property
+    def base_url(self) -> str:
+        return self.mirror_resolver.current()
 
     @property
     def service_name(self) -> str:
@@ -29,31 +50,11 @@ class GLaDOSService(CheckinService):
         if not cookies_str:
             raise ValueError("GLaDOS cookie (GR_COOKIE) 未配置！")
         
-        cookies = [cookie.strip() for cookie in cookies_str.split('||') if cookie.strip()]
-        if not cookies:
+        # 账号配置中只记录首选地址，实际请求地址由 get_base_url 在首次请求时探测选择
+        configs = parse_cookie_accounts(cookies_str, self.mirror_resolver.candidates[0], glados_account_id)
+        if not configs:
             raise ValueError("GLaDOS cookie 解析失败，请检查 GR_COOKIE 格式！")
-        
-        configs = []
-        for cookie in cookies:
-            # 查找koa:sess.sig=的位置
-            sig_prefix = "koa:sess.sig="
-            sig_index = cookie.find(sig_prefix)
-            
-            if sig_index != -1:
-                # 找到了koa:sess.sig=，提取后面的10个字符
-                start_pos = sig_index + len(sig_prefix)
-                account_id = cookie[start_pos:start_pos + 10] + '...'
-            else:
-                # 如果没找到koa:sess.sig=，回退到原来的方法（前10个字符）
-                account_id = cookie[:10] + '...'
-    
-            config = {
-                'cookie': cookie,
-                'account_id': account_id,
-                'base_url': self.base_url
-            }
-            configs.append(config)
-        
+
         return configs
     
     def _is_already_checked_in(self, result: Dict[str, Any]) -> bool:
@@ -76,13 +77,14 @@ class GLaDOSService(CheckinService):
 
     def do_checkin(self, account_config: Dict[str, Any]) -> Dict[str, Any]:
         """执行GLaDOS签到"""
-        checkin_url = f"{account_config['base_url']}/api/user/checkin"
-        print(f"      checkin_url = {checkin_url}")
+        base_url = self.get_base_url(account_config)
+        checkin_url = f"{base_url}/api/user/checkin"
+        logger.debug("      checkin_url = %s", checkin_url)
         
         headers = {
             'cookie': account_config['cookie'],
-            'referer': os.environ.get('GLADOS_REFERER', f"{account_config['base_url']}/console/checkin"),
-            'origin': account_config['base_url'],
+            'referer': os.environ.get('GLADOS_REFERER', f"{base_url}/console/checkin"),
+            'origin': base_url,
             'content-type': 'application/json;charset=UTF-8'
         }
         
@@ -97,8 +99,8 @@ class GLaDOSService(CheckinService):
         checkin_data = response.json()
         code = checkin_data.get('code', -1)        
         message = checkin_data.get('message', '未知结果')
-        print(f"      code = {code}{'-成功' if code == 0 else '-失败'}")
-        print(f"      message = {message}")
+        logger.debug("      code = %s%s", code, '-成功' if code == 0 else '-失败')
+        logger.debug("      message = %s", message)
         
         return {
             'success': (code == 0),
@@ -109,29 +111,32 @@ class GLaDOSService(CheckinService):
     def get_usage_info(self, account_config: Dict[str, Any]) -> Dict[str, Any]:
         """获取GLaDOS用量信息"""
         try:
-            status_url = f"{account_config['base_url']}/api/user/status"
-            print(f"      status_url = {status_url}")
+            base_url = self.get_base_url(account_config)
+            status_url = f"{base_url}/api/user/status"
+            logger.debug("      status_url = %s", status_url)
 
             headers = {
                 'cookie': account_config['cookie'],
-                'referer': os.environ.get('GLADOS_REFERER', f"{account_config['base_url']}/console/checkin"),
-                'origin': account_config['base_url']
+                'referer': os.environ.get('GLADOS_REFERER', f"{base_url}/console/checkin"),
+                'origin': base_url
             }
 
             # 获取用户状态
             response = self.make_request('GET', status_url, headers=headers)
-            status_data = response.json().get('data', {})
-
-            email = status_data.get('email', '未知邮箱')
-            left_days = status_data.get('leftDays', '未知')
-            if isinstance(left_days, str) and '.' in left_days:
-                left_days = left_days.split('.')[0]
-
-            return {
-                'email': email,
-                'left_days': left_days,
-                'status_response': status_data
-            }
+            return self._parse_status_data(response.json().get('data', {}))
         except Exception as e:
-            print(f"      获取用量信息异常: {str(e)}")
+            logger.warning("      获取用量信息异常: %s", e)
             return None
+
+    def _parse_status_data(self, status_data: Dict[str, Any]) -> Dict[str, Any]:
+        """从用户状态数据中提取邮箱和剩余天数"""
+        email = status_data.get('email', '未知邮箱')
+        left_days = status_data.get('leftDays', '未知')
+        if isinstance(left_days, str) and '.' in left_days:
+            left_days = left_days.split('.')[0]
+
+        return {
+            'email': email,
+            'left_days': left_days,
+            'status_response': status_data
+        }
@@ -4,6 +4,12 @@ import os
 from typing import Any, Dict, List
 
 from .base_service import CheckinService
+from .retry_policy import PermanentCheckinError
+from .account_parsers import parse_cookie_accounts, ikuuu_account_id
+from .mirror_resolver import MirrorResolver, parse_base_urls
+from logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class IkuuuService(CheckinService):
@@ -15,10 +21,22 @@ class IkuuuService(CheckinService):
         "delay": 5,
     }
 
+    # 站点对同一出口 IP 的请求频率敏感，速率只在配置值附近探测
+    _rate_limit_config = {
+        "max_rate": 10,
+    }
+
     def __init__(self):
         super().__init__()
-        self.base_url = os.environ.get("IKUUU_BASE_URL", "https://ikuuu.org").rstrip("/")
-        print(f"ikuuu baseurl = {self.base_url}")
+        # IKUUU_BASE_URL 可配置多个以逗号分隔的镜像地址，启动时选用最快的可用镜像
+        candidates = parse_base_urls(os.environ.get("IKUUU_BASE_URL", "")) or ["https://ikuuu.org"]
+        self.mirror_resolver = MirrorResolver(self.service_name, candidates)
+        # 镜像在首次请求时才探测，这里只输出候选地址
+        logger.debug("ikuuu 候选镜像 = %s", candidates)
+
+    @property
+    def base_url(self) -> str:
+        return self.mirror_resolver.current()
 
     @property
     def service_name(self) -> str:
@@ -30,20 +48,10 @@ class IkuuuService(CheckinService):
         if not cookies_str:
             raise ValueError("iKuuu cookie (IKUUU_COOKIE) 未配置！")
 
-        cookies = [cookie.strip() for cookie in cookies_str.split("||") if cookie.strip()]
-        if not cookies:
+        # 账号配置中只记录首选地址，实际请求地址由 get_base_url 在首次请求时探测选择
+        configs = parse_cookie_accounts(cookies_str, self.mirror_resolver.candidates[0], ikuuu_account_id)
+        if not configs:
             raise ValueError("iKuuu cookie 解析失败，请检查 IKUUU_COOKIE 格式！")
-
-        configs: List[Dict[str, Any]] = []
-        for cookie in cookies:
-            account_id = cookie[:10] + "..."
-            configs.append(
-                {
-                    "cookie": cookie,
-                    "account_id": account_id,
-                    "base_url": self.base_url,
-                }
-            )
         return configs
 
     def _is_already_checked_in(self, result: Dict[str, Any]) -> bool:
@@ -69,7 +77,10 @@ class IkuuuService(CheckinService):
         return True
 
     def _parse_checkin_json(self, response: Any, content_type: str) -> Dict[str, Any]:
-        """容错解析签到响应：优先按 JSON 解析正文，不只依赖 Content-Type。"""
+        """
+        容错解析签到响应：优先按 JSON 解析正文，不只依赖 Content-Type。
+        登录页或重定向后无法解析的响应说明 cookie 已失效，抛出 PermanentCheckinError 以跳过重试。
+        """
         try:
             checkin_data = response.json()
         except ValueError:
@@ -77,9 +88,14 @@ class IkuuuService(CheckinService):
                 checkin_data = json.loads(response.text)
             except ValueError as exc:
                 if response.status_code == 200 and "<html" in response.text.lower():
-                    raise ValueError(
+                    raise PermanentCheckinError(
                         "服务端返回HTML页面而非JSON，cookie可能已过期，请更新 IKUUU_COOKIE"
                     ) from exc
+                if response.history:
+                    raise PermanentCheckinError(
+                        f"签到请求被重定向到 {response.url} 且响应无法解析，"
+                        "请检查 IKUUU_COOKIE 和 IKUUU_BASE_URL"
+                    ) from exc
                 raise ValueError(
                     f"服务端返回无法解析的响应(status={response.status_code}, type={content_type})，"
                     "请检查 IKUUU_BASE_URL 和 IKUUU_COOKIE 配置"
@@ -92,28 +108,29 @@ class IkuuuService(CheckinService):
 
     def do_checkin(self, account_config: Dict[str, Any]) -> Dict[str, Any]:
         """执行 iKuuu 签到，通过 POST 请求并附带 Cookie。"""
-        checkin_url = f"{account_config['base_url']}/user/checkin"
-        print(f"      checkin_url = {checkin_url}")
+        base_url = self.get_base_url(account_config)
+        checkin_url = f"{base_url}/user/checkin"
+        logger.debug("      checkin_url = %s", checkin_url)
 
         headers = {
             "cookie": account_config["cookie"],
-            "referer": f"{account_config['base_url']}/user",
-            "origin": account_config["base_url"],
+            "referer": f"{base_url}/user",
+            "origin": base_url,
         }
 
         response = self.make_request("POST", checkin_url, headers=headers)
 
         if response.history:
             redirect_chain = " -> ".join(f"{r.status_code}({r.url})" for r in response.history)
-            print(f"      [诊断] 发生重定向: {redirect_chain} -> {response.url}")
-            print("      [诊断] 重定向通常意味着 cookie 过期或域名变化，请检查 IKUUU_COOKIE 和 IKUUU_BASE_URL")
+            logger.warning("      [诊断] 发生重定向: %s -> %s", redirect_chain, response.url)
+            logger.warning("      [诊断] 重定向通常意味着 cookie 过期或域名变化，请检查 IKUUU_COOKIE 和 IKUUU_BASE_URL")
 
         content_type = response.headers.get("Content-Type", "")
         if "application/json" not in content_type:
             body_preview = response.text[:300].replace("\n", " ").strip()
-            print(f"      [诊断] 响应状态码: {response.status_code}")
-            print(f"      [诊断] Content-Type: {content_type}")
-            print(f"      [诊断] 响应内容前300字符: {body_preview}")
+            logger.warning("      [诊断] 响应状态码: %s", response.status_code)
+            logger.warning("      [诊断] Content-Type: %s", content_type)
+            logger.warning("      [诊断] 响应内容前300字符: %s", body_preview)
 
         checkin_data = self._parse_checkin_json(response, content_type)
 
@@ -127,11 +144,11 @@ class IkuuuService(CheckinService):
         already_checked = "\u5df2\u7ecf\u7b7e\u5230" in message or "\u5df2\u7b7e\u5230\u8fc7" in message
         success = (ret == 1) or already_checked
 
-        print(f"      ret = {ret}{'-成功' if success else '-失败'}")
-        print(f"      msg = {message}")
+        logger.debug("      ret = %s%s", ret, '-成功' if success else '-失败')
+        logger.debug("      msg = %s", message)
 
         if already_checked and ret != 1:
-            print("      [处理] 检测到已签到，按成功处理并停止重试")
+            logger.info("      [处理] 检测到已签到，按成功处理并停止重试")
 
         return {
             "success": success,
@@ -0,0 +1,183 @@
+# services/mirror_resolver.py
+# 镜像地址选择：BASE_URL 可配置多个以逗号分隔的候选地址，启动时并发探测并选用最快的可用镜像，
+# 选择结果带有效期缓存到 mirror_cache.json，有效期内的后续运行无需再次探测；
+# 运行中当前镜像连续连接失败时自动切换到下一个可用镜像。
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+from http_transport import get_session
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+MIRROR_CACHE_FILE_NAME = "mirror_cache.json"
+# 探测结果缓存有效期，可通过环境变量 MIRROR_CACHE_TTL 覆盖，单位：秒
+DEFAULT_CACHE_TTL = 12 * 3600
+# 单个镜像的探测超时，单位：秒
+PROBE_TIMEOUT = 10
+
+_cache_lock = threading.Lock()
+
+
+def parse_base_urls(raw: str) -> List[str]:
+    """解析逗号分隔的候选地址列表，去除空白、末尾斜杠和重复项"""
+    urls = []
+    for url in raw.split(','):
+        url = url.strip().rstrip('/')
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def _get_cache_ttl() -> float:
+    raw = os.environ.get('MIRROR_CACHE_TTL', '').strip()
+    try:
+        return float(raw) if raw else DEFAULT_CACHE_TTL
+    except ValueError:
+        logger.warning("MIRROR_CACHE_TTL 配置无效: %s，使用默认值 %s", raw, DEFAULT_CACHE_TTL)
+        return DEFAULT_CACHE_TTL
+
+
+def _read_cache() -> Dict[str, Any]:
+    if not os.path.exists(MIRROR_CACHE_FILE_NAME):
+        return {}
+    try:
+        with open(MIRROR_CACHE_FILE_NAME, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error("Error reading '%s': %s", MIRROR_CACHE_FILE_NAME, e)
+        return {}
+
+
+def _write_cache_entry(service_name: str, entry: Dict[str, Any]):
+    """更新单个服务的缓存记录，原子写入"""
+    with _cache_lock:
+        data = _read_cache()
+        data[service_name] = entry
+        try:
+            tmp_name = MIRROR_CACHE_FILE_NAME + ".tmp"
+            with open(tmp_name, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_name, MIRROR_CACHE_FILE_NAME)
+        except IOError as e:
+            logger.error("Error writing '%s': %s", MIRROR_CACHE_FILE_NAME, e)
+
+
+def _same_host(url: str, base_url: str) -> bool:
+    """请求地址是否属于该镜像：比较协议和主机（含端口），避免 https://a.one 误匹配 https://a.one.example"""
+    request, mirror = urlparse(url), urlparse(base_url)
+    return (request.scheme, request.netloc) == (mirror.scheme, mirror.netloc)
+
+
+class MirrorResolver:
+    """
+    单个服务的镜像选择器，线程安全。
+    只有一个候选地址时直接使用，不探测也不缓存。
+    """
+
+    def __init__(self,
+                 service_name: str,
+                 candidates: List[str],
+                 probe_path: str = '/',
+                 failover_threshold: int = 2):
+        self.service_name = service_name
+        self.candidates = candidates
+        self.probe_path = probe_path
+        self.failover_threshold = max(1, failover_threshold)
+        self._order: Optional[List[str]] = None  # 按探测延迟排序的可用镜像，首个为当前镜像
+        self._failures = 0  # 当前镜像的连续连接失败次数
+        self._lock = threading.Lock()
+
+    def current(self) -> str:
+        """当前使用的镜像地址，首次调用时完成选择"""
+        with self._lock:
+            if self._order is None:
+                self._order = self._resolve()
+            return self._order[0]
+
+    def _resolve(self) -> List[str]:
+        if len(self.candidates) <= 1:
+            return list(self.candidates)
+
+        cached = _read_cache().get(self.service_name)
+        if (isinstance(cached, dict)
+                and cached.get('candidates') == self.candidates
+                and time.time() - cached.get('selected_at', 0) < _get_cache_ttl()
+                and cached.get('order')):
+            logger.info("%s 使用缓存的镜像: %s", self.service_name, cached['order'][0])
+            return cached['order']
+
+        order = self._probe()
+        _write_cache_entry(self.service_name, {
+            'candidates': self.candidates,
+            'order': order,
+            'selected_at': time.time(),
+        })
+        return order
+
+    def _probe_one(self, base_url: str) -> float:
+        """探测单个镜像，返回延迟秒数；5xx 或连接失败时抛出异常"""
+        started = time.monotonic()
+        response = get_session().get(base_url + self.probe_path, timeout=PROBE_TIMEOUT, allow_redirects=False)
+        if response.status_code >= 500:
+            raise ValueError(f"HTTP {response.status_code}")
+        return time.monotonic() - started
+
+    def _probe(self) -> List[str]:
+        """并发探测所有候选镜像，按响应先后排序，不可用的镜像排在最后"""
+        logger.info("%s 正在探测 %d 个候选镜像...", self.service_name, len(self.candidates))
+        healthy = []
+        with ThreadPoolExecutor(max_workers=len(self.candidates), thread_name_prefix="mirror") as executor:
+            futures = {executor.submit(self._probe_one, url): url for url in self.candidates}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    latency = future.result()
+                    logger.info("  - %s 可用，延迟 %.2f 秒", url, latency)
+                    healthy.append(url)
+                except Exception as e:
+                    logger.warning("  - %s 不可用: %s", url, e)
+        if not healthy:
+            logger.warning("%s 所有镜像均不可用，按配置顺序使用", self.service_name)
+            return list(self.candidates)
+        order = healthy + [url for url in self.candidates if url not in healthy]
+        logger.log(SUMMARY, "%s 选用镜像: %s", self.service_name, order[0])
+        return order
+
+    def report_success(self, url: str):
+        """当前镜像请求成功，清零连续失败计数"""
+        with self._lock:
+            if self._order and _same_host(url, self._order[0]):
+                self._failures = 0
+
+    def report_failure(self, url: str, force: bool = False) -> bool:
+        """
+        记录一次连接失败，当前镜像连续失败达到阈值（或 force=True）时切换到下一个镜像。
+
+        :return: 重试时是否会使用与 url 不同的镜像
+        """
+        with self._lock:
+            if not self._order or len(self._order) <= 1:
+                return False
+            current = self._order[0]
+            if not _same_host(url, current):
+                # 其他线程已切换过镜像
+                return True
+            self._failures += 1
+            if not force and self._failures < self.failover_threshold:
+                return False
+            self._order = self._order[1:] + [current]
+            self._failures = 0
+            logger.warning("%s 镜像 %s 连续请求失败，切换到 %s", self.service_name, current, self._order[0])
+            order = list(self._order)
+        _write_cache_entry(self.service_name, {
+            'candidates': self.candidates,
+            'order': order,
+            'selected_at': time.time(),
+        })
+        return True
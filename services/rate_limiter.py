@@ -0,0 +1,110 @@
+# services/rate_limiter.py
+# 按服务的令牌桶限流器：在 make_request 中发起请求前领取令牌，控制同一服务的请求速率和突发量；
+# 速率按加性增、乘性减（AIMD）自适应：每次成功请求提高速率，逐步探测站点能承受的上限；
+# 遇到 429 或 Retry-After 时成倍降低速率并暂停发送。
+import threading
+import time
+from typing import Dict, Any, Optional
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶。
+    reserve() 采用预约方式：令牌不足时记为欠账并返回需要等待的秒数，
+    并发调用者按顺序错开等待时间，而不是同时醒来争抢。
+    """
+
+    def __init__(self,
+                 name: str,
+                 rate: float,
+                 burst: int,
+                 min_rate: float = 0.2,
+                 backoff_factor: float = 0.5,
+                 recovery_step: float = 0.5,
+                 max_rate: Optional[float] = None):
+        self.name = name
+        self.max_rate = max(rate, max_rate or rate)  # 探测的速率上限，单位：请求/秒
+        self.rate = rate  # 当前速率，成功时增加，触发限流后降低
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, rate)
+        self.backoff_factor = backoff_factor
+        self.recovery_step = recovery_step
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0  # 服务端要求的暂停截止时间
+        self._penalty_until = 0.0  # 在此之前观察到的限流视为同一次，不再重复降速
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """领取一个令牌，返回发送请求前需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """领取令牌，必要时阻塞等待"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float] = None) -> bool:
+        """
+        观察到 429 或 Retry-After：速率乘以 backoff_factor，并在 retry_after 秒内暂停发送。
+        同一次限流会让所有在途请求都收到 429，降速后的一个惩罚窗口内（暂停时间，
+        没有 Retry-After 时为新速率下的一个令牌间隔）只延长暂停，不再重复降速。
+
+        :return: 本次是否降低了速率
+        """
+        with self._lock:
+            now = time.monotonic()
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            if now < self._penalty_until:
+                return False
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+            self._tokens = min(self._tokens, 0.0)
+            self._penalty_until = max(self._blocked_until, now + 1 / self.rate)
+            pause = f"，暂停 {retry_after:.0f} 秒" if retry_after else ""
+            logger.warning("      %s 触发限流，请求速率降至 %.2f 次/秒%s", self.name, self.rate, pause)
+            return True
+
+    def reward(self):
+        """请求成功：速率按 recovery_step 增加，直到 max_rate"""
+        with self._lock:
+            if self.rate >= self.max_rate:
+                return
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, config: Dict[str, Any]) -> TokenBucket:
+    """获取进程级共享的限流器，同名服务的所有实例共用一个令牌桶"""
+    with _buckets_lock:
+        bucket = _buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(
+                name,
+                rate=config['rate'],
+                burst=config['burst'],
+                min_rate=config['min_rate'],
+                backoff_factor=config['backoff_factor'],
+                recovery_step=config['recovery_step'],
+                max_rate=config.get('max_rate'),
+            )
+            _buckets[name] = bucket
+        return bucket
@@ -0,0 +1,149 @@
+# services/request_hooks.py
+# make_request 的请求生命周期钩子：发起请求前（before_request）、收到响应后（after_response）
+# 和请求异常时（on_error）依次调用已注册的钩子，可全局注册或只对某个服务注册，
+# 用于在不修改服务代码的情况下对请求进行性能分析和追踪。
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+
+from account_registry import hash_account_id
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 当前正在处理的账号，由 advance_task 设置，钩子中以哈希形式提供
+_current_account: contextvars.ContextVar = contextvars.ContextVar('current_account', default=None)
+
+
+@contextmanager
+def account_context(account_id: str):
+    """在代码块内将 account_id 标记为当前账号，线程和协程之间互不影响"""
+    token = _current_account.set(account_id)
+    try:
+        yield
+    finally:
+        _current_account.reset(token)
+
+
+class RequestContext:
+    """
+    一次 HTTP 请求的上下文，在各钩子之间传递。
+    before_request 中可修改 kwargs（例如添加请求头），其余字段在请求结束后填写。
+    """
+
+    def __init__(self, service_name: str, method: str, url: str, kwargs: Dict[str, Any], queue_time: float = 0.0):
+        account_id = _current_account.get()
+        self.service_name = service_name
+        self.account_hash = hash_account_id(account_id) if account_id is not None else None
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.started_at = time.time()  # 请求开始的墙钟时间
+        self.marks: Dict[str, float] = {}  # 各阶段时间点（time.perf_counter），由传输层填写
+        self.status: Optional[int] = None
+        self.response_bytes: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.timings: Dict[str, float] = {'queue': queue_time}  # 各阶段耗时，单位：秒
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).hostname or ''
+
+    @property
+    def path(self) -> str:
+        """请求路径，不含查询参数，避免记录其中的敏感信息"""
+        return urlparse(self.url).path or '/'
+
+    def start(self, marks: Optional[Dict[str, float]] = None):
+        """请求即将发出时调用，marks 为传输层填写的时间点字典"""
+        if marks is not None:
+            self.marks = marks
+        self.marks['start'] = time.perf_counter()
+
+    def finish(self, status: Optional[int] = None, response_bytes: Optional[int] = None,
+               error: Optional[BaseException] = None):
+        """请求结束时调用，根据时间点计算 DNS、连接、TLS、首字节和总耗时"""
+        marks = self.marks
+        marks['end'] = time.perf_counter()
+        self.status = status
+        self.response_bytes = response_bytes
+        self.error = error
+
+        timings = self.timings
+        timings['total'] = marks['end'] - marks['start']
+        if 'dns_end' in marks:
+            timings['dns'] = marks['dns_end'] - marks['dns_start']
+        if 'connect_end' in marks:
+            # aiohttp 在建立连接的过程中解析主机名，连接耗时不重复计入 DNS 耗时
+            timings['connect'] = marks['connect_end'] - max(marks['connect_start'], marks.get('dns_end', 0.0))
+        if 'tls_end' in marks:
+            timings['tls'] = marks['tls_end'] - marks['connect_end']
+        if 'response_start' in marks:
+            # 首字节时间从连接就绪、请求发出时算起
+            ready = max(marks.get(key, marks['start']) for key in ('request_start', 'connect_end', 'tls_end'))
+            timings['ttfb'] = marks['response_start'] - ready
+            timings['download'] = marks['end'] - marks['response_start']
+
+    def offset(self, mark: str) -> float:
+        """时间点相对请求开始的秒数"""
+        return self.marks[mark] - self.marks['start']
+
+
+class RequestHook:
+    """请求钩子基类，子类按需重写以下方法；钩子抛出的异常只打印，不影响请求本身"""
+
+    def before_request(self, context: RequestContext):
+        """请求发出前调用"""
+        pass
+
+    def after_response(self, context: RequestContext, response):
+        """收到响应后调用（包括 4xx/5xx 响应）"""
+        pass
+
+    def on_error(self, context: RequestContext, error: BaseException):
+        """连接失败、超时等未收到响应的异常时调用"""
+        pass
+
+
+_hooks: Dict[Optional[str], List[RequestHook]] = {}
+_hooks_lock = threading.Lock()
+
+
+def register_request_hook(hook: RequestHook, service_name: Optional[str] = None):
+    """注册请求钩子，service_name 为 None 时对所有服务生效"""
+    with _hooks_lock:
+        _hooks[service_name] = _hooks.get(service_name, []) + [hook]
+
+
+def unregister_request_hook(hook: RequestHook, service_name: Optional[str] = None):
+    """移除已注册的请求钩子"""
+    with _hooks_lock:
+        _hooks[service_name] = [item for item in _hooks.get(service_name, []) if item is not hook]
+
+
+def get_request_hooks(service_name: str) -> List[RequestHook]:
+    """服务生效的钩子：全局钩子在前，服务钩子在后"""
+    return _hooks.get(None, []) + _hooks.get(service_name, [])
+
+
+def _call_hooks(hooks: List[RequestHook], method: str, *args):
+    for hook in hooks:
+        try:
+            getattr(hook, method)(*args)
+        except Exception as e:
+            logger.warning("      请求钩子 %s.%s 执行失败: %s", type(hook).__name__, method, e)
+
+
+def run_before_request(hooks: List[RequestHook], context: RequestContext):
+    _call_hooks(hooks, 'before_request', context)
+
+
+def run_after_response(hooks: List[RequestHook], context: RequestContext, response):
+    _call_hooks(hooks, 'after_response', context, response)
+
+
+def run_on_error(hooks: List[RequestHook], context: RequestContext, error: BaseException):
+    _call_hooks(hooks, 'on_error', context, error)
@@ -0,0 +1,147 @@
+# services/request_tracer.py
+# 内置的请求追踪钩子：将每次请求记录为 Chrome Trace Event 格式的时间片段，
+# 运行结束时写入本地文件，可在 chrome://tracing 或 https://ui.perfetto.dev 中打开查看。
+# 设置环境变量 REQUEST_TRACE_FILE=trace.json 即可启用。
+import atexit
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from .request_hooks import RequestHook, RequestContext, register_request_hook
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+# 请求内各阶段：(名称, 开始时间点, 结束时间点)
+_PHASES = (
+    ('dns', 'dns_start', 'dns_end'),
+    ('connect', 'connect_start', 'connect_end'),
+    ('tls', 'connect_end', 'tls_end'),
+    ('waiting (TTFB)', None, 'response_start'),
+    ('download', 'response_start', 'end'),
+)
+
+
+class ChromeTraceHook(RequestHook):
+    """
+    将请求记录为 Chrome Trace Event。每个服务显示为一个进程，每个账号显示为一条或多条轨道
+    （同一账号并行的请求分到不同轨道），请求内按 DNS、连接、TLS、等待首字节、下载拆分为子片段。
+    账号只以哈希前缀标识，URL 只记录路径。
+    """
+
+    def __init__(self, trace_file: str):
+        self.trace_file = trace_file
+        self._events: List[Dict[str, Any]] = []
+        self._pids: Dict[str, int] = {}
+        self._lanes: Dict[Tuple[str, str], List[List[Tuple[float, float]]]] = {}
+        self._tids: Dict[Tuple[str, str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def after_response(self, context: RequestContext, response):
+        self._record(context)
+
+    def on_error(self, context: RequestContext, error: BaseException):
+        self._record(context)
+
+    def _track(self, context: RequestContext, start: float, end: float) -> Tuple[int, int]:
+        """分配 (pid, tid)：选择该账号第一条与本次请求时间不重叠的轨道"""
+        service = context.service_name
+        account = (context.account_hash or 'unknown')[:8]
+        pid = self._pids.get(service)
+        if pid is None:
+            pid = self._pids[service] = len(self._pids) + 1
+            self._events.append({'ph': 'M', 'name': 'process_name', 'pid': pid, 'args': {'name': service}})
+
+        lanes = self._lanes.setdefault((service, account), [])
+        for index, spans in enumerate(lanes):
+            if all(end <= span_start or start >= span_end for span_start, span_end in spans):
+                spans.append((start, end))
+                break
+        else:
+            index = len(lanes)
+            lanes.append([(start, end)])
+
+        key = (service, account, index)
+        tid = self._tids.get(key)
+        if tid is None:
+            tid = self._tids[key] = len(self._tids) + 1
+            name = f"account {account}" + (f" #{index + 1}" if index else "")
+            self._events.append({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        return pid, tid
+
+    def _record(self, context: RequestContext):
+        marks = context.marks
+        if 'start' not in marks or 'end' not in marks:
+            return
+        # 时间点换算为微秒级的墙钟时间戳
+        base = context.started_at * 1e6
+
+        def ts(mark: str) -> float:
+            return base + context.offset(mark) * 1e6
+
+        queue = context.timings.get('queue', 0.0)
+        start = ts('start') - queue * 1e6
+        end = ts('end')
+        args = {
+            'account': context.account_hash[:16] if context.account_hash else None,
+            'method': context.method,
+            'host': context.host,
+            'path': context.path,
+            'status': context.status,
+            'bytes': context.response_bytes,
+            'timings_ms': {name: round(value * 1000, 3) for name, value in context.timings.items()},
+        }
+        if context.error is not None:
+            args['error'] = f"{type(context.error).__name__}: {context.error}"
+
+        with self._lock:
+            pid, tid = self._track(context, start, end)
+            if queue >= 0.001:
+                self._events.append({'ph': 'X', 'cat': 'rate_limit', 'name': 'rate limit wait',
+                                     'pid': pid, 'tid': tid, 'ts': start, 'dur': queue * 1e6})
+            self._events.append({'ph': 'X', 'cat': 'request', 'name': f"{context.method} {context.path}",
+                                 'pid': pid, 'tid': tid, 'ts': ts('start'), 'dur': end - ts('start'), 'args': args})
+            for name, begin, finish in _PHASES:
+                if finish not in marks:
+                    continue
+                if begin is None:
+                    # 等待首字节从连接就绪、请求发出时算起
+                    begin = max((mark for mark in ('start', 'request_start', 'connect_end', 'tls_end') if mark in marks),
+                                key=marks.get)
+                elif begin not in marks:
+                    continue
+                phase_start = ts(begin)
+                if name == 'connect' and 'dns_end' in marks:
+                    phase_start = max(phase_start, ts('dns_end'))
+                self._events.append({'ph': 'X', 'cat': 'phase', 'name': name, 'pid': pid, 'tid': tid,
+                                     'ts': phase_start, 'dur': max(0.0, ts(finish) - phase_start)})
+
+    def write(self):
+        """写出追踪文件"""
+        with self._lock:
+            events = list(self._events)
+        if not any(event['ph'] == 'X' for event in events):
+            return
+        try:
+            with open(self.trace_file, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+            logger.log(SUMMARY, "请求追踪已写入 '%s'，可在 chrome://tracing 或 https://ui.perfetto.dev 中打开。", self.trace_file)
+        except IOError as e:
+            logger.error("Error writing request trace: %s", e)
+
+
+_tracer: Optional[ChromeTraceHook] = None
+
+
+def install_tracer_from_env() -> Optional[ChromeTraceHook]:
+    """设置了环境变量 REQUEST_TRACE_FILE 时全局注册追踪钩子，并在进程退出时写出追踪文件"""
+    global _tracer
+    trace_file = os.environ.get('REQUEST_TRACE_FILE', '').strip()
+    if not trace_file or _tracer is not None:
+        return _tracer
+    _tracer = ChromeTraceHook(trace_file)
+    register_request_hook(_tracer)
+    atexit.register(_tracer.write)
+    logger.log(SUMMARY, "已启用请求追踪，结果将写入 '%s'。", trace_file)
+    return _tracer
@@ -0,0 +1,90 @@
+# services/retry_policy.py
+import time
+import requests
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+
+class PermanentCheckinError(ValueError):
+    """
+    不可通过重试恢复的签到错误，例如 cookie 过期被重定向到登录页。
+    继承 ValueError 以兼容原有的异常处理逻辑。
+    """
+    pass
+
+
+class RetryDecision:
+    """一次失败的分类结果"""
+    def __init__(self, retryable: bool, reason: str = "", retry_after: Optional[float] = None):
+        self.retryable = retryable
+        self.reason = reason
+        self.retry_after = retry_after  # 服务端要求的最短等待秒数
+
+    def __repr__(self):
+        kind = "retryable" if self.retryable else "permanent"
+        return f"RetryDecision({kind}, reason={self.reason!r}, retry_after={self.retry_after})"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头，支持秒数和 HTTP 日期两种格式"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    默认的失败分类策略。
+    - 超时、连接错误、5xx、408、429 视为临时故障，可重试，并读取 Retry-After
+    - 401/403 及其他 4xx、PermanentCheckinError 视为永久故障，不再重试
+    - 其他异常和 success=False 的签到结果保持原有行为，视为可重试
+    子类可以重写 classify_error / classify_result 来定制服务特有的判断。
+    """
+
+    retryable_status_codes = {408, 425, 429, 500, 502, 503, 504}
+
+    def classify(self,
+                 checkin_result: Optional[Dict[str, Any]],
+                 error: Optional[Exception]) -> RetryDecision:
+        """对一次失败的签到尝试进行分类"""
+        if error is not None:
+            return self.classify_error(error)
+        return self.classify_result(checkin_result or {})
+
+    def classify_error(self, error: Exception) -> RetryDecision:
+        if isinstance(error, PermanentCheckinError):
+            return RetryDecision(False, str(error))
+
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return self.classify_status(error.response.status_code, error.response.headers)
+
+        if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+            return RetryDecision(True, "网络超时或连接中断")
+
+        if isinstance(error, requests.exceptions.TooManyRedirects):
+            return RetryDecision(False, "重定向次数过多")
+
+        return RetryDecision(True, str(error))
+
+    def classify_status(self, status_code: int, headers: Dict[str, str] = None) -> RetryDecision:
+        retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+        if status_code in self.retryable_status_codes or status_code >= 500:
+            return RetryDecision(True, f"HTTP {status_code}", retry_after)
+        if status_code in (401, 403):
+            return RetryDecision(False, f"HTTP {status_code}，认证失败，cookie 可能已过期")
+        return RetryDecision(False, f"HTTP {status_code}")
+
+    def classify_result(self, checkin_result: Dict[str, Any]) -> RetryDecision:
+        return RetryDecision(True, str(checkin_result.get("message", "")))
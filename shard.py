@@ -0,0 +1,131 @@
+# shard.py
+# 分片执行：按账号哈希将账号确定性地划分到 N 个分片，每个分片写出独立的状态分片和报告分片，
+# 再由合并步骤汇总为一个 status.json 和一条通知。可用于 GitHub Actions matrix 或本地多进程并行。
+import argparse
+import json
+import os
+import re
+from typing import List, Dict, Any, Tuple, Optional
+from status_manager import STATUS_FILE_NAME, read_prior_status, write_current_status
+from preflight import configured_accounts
+from account_registry import shard_of
+from report_renderer import ReportRenderer
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
+
+_SHARD_DIR = os.path.dirname(STATUS_FILE_NAME)
+_STATUS_FRAGMENT_RE = re.compile(r"^status\.shard-(\d+)-of-(\d+)\.json$")
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """解析命令行的 i/N 分片参数，i 从 1 开始"""
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片格式应为 i/N，例如 1/4，实际为: {value}")
+    if total < 1 or not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"分片序号应在 1 到 N 之间，实际为: {value}")
+    return index, total
+
+
+def shard_file_names(index: int, total: int) -> Dict[str, str]:
+    """分片的状态文件、状态日志和报告分片文件名"""
+    suffix = f"shard-{index}-of-{total}"
+    return {
+        'status': os.path.join(_SHARD_DIR, f"status.{suffix}.json"),
+        'journal': os.path.join(_SHARD_DIR, f"status.{suffix}.journal"),
+        'report': os.path.join(_SHARD_DIR, f"report.{suffix}.json"),
+    }
+
+
+def write_report_fragment(report_file: str, entries: List[Dict[str, Any]]):
+    """原子写入报告分片"""
+    tmp_name = report_file + ".tmp"
+    try:
+        with open(tmp_name, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_name, report_file)
+        logger.info("Report fragment written to '%s'.", report_file)
+    except IOError as e:
+        logger.error("Error writing '%s': %s", report_file, e)
+
+
+def _read_report_fragment(report_file: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(report_file):
+        logger.warning("警告：未找到报告分片 '%s'，该分片可能执行中断，其账号不会出现在报告中。", report_file)
+        return []
+    try:
+        with open(report_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        return entries if isinstance(entries, list) else []
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error("Error reading '%s': %s", report_file, e)
+        return []
+
+
+def _find_shards() -> List[Tuple[int, int]]:
+    """查找当前目录下所有分片的 (序号, 总数)，状态文件或状态日志存在即视为有结果"""
+    shards = set()
+    for name in os.listdir(_SHARD_DIR or '.'):
+        match = _STATUS_FRAGMENT_RE.match(name.replace('.journal', '.json'))
+        if match:
+            shards.add((int(match.group(1)), int(match.group(2))))
+    return sorted(shards)
+
+
+def merge_shards() -> Optional[Tuple[str, str]]:
+    """
+    合并所有分片：状态分片合并进 status.json，报告分片按原始顺序渲染为一份报告，合并后删除分片文件。
+
+    :return: (通知标题, 报告正文)；没有找到任何分片时返回 None
+    """
+    from services.base_service import CheckinResult
+
+    shards = _find_shards()
+    if not shards:
+        logger.log(SUMMARY, "未找到任何分片结果，无需合并。")
+        return None
+
+    totals = {total for _, total in shards}
+    if len(totals) > 1:
+        logger.warning("警告：发现不同分片总数的结果 %s，将全部合并。", sorted(totals))
+    for total in totals:
+        missing = [i for i in range(1, total + 1) if (i, total) not in shards]
+        if missing:
+            logger.warning("警告：分片 %s/%s 没有结果，对应账号不会出现在本次报告中。", missing, total)
+
+    status_data = read_prior_status()
+    if not isinstance(status_data, dict):
+        status_data = {}
+    entries = []
+    for index, total in shards:
+        names = shard_file_names(index, total)
+        # 分片中断时状态日志中仍有已完成的记录，读取时一并回放
+        status_data.update(read_prior_status(names['status'], names['journal']))
+        entries.extend(_read_report_fragment(names['report']))
+
+    logger.log(SUMMARY, "\n=== 合并分片签到状态 ===")
+    write_current_status(status_data)
+    for index, total in shards:
+        for path in shard_file_names(index, total).values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    # 报告分片中账号以哈希标识，根据当前环境变量中的配置还原账号显示名称
+    accounts = configured_accounts()
+    renderer = ReportRenderer()
+    for entry in sorted(entries, key=lambda item: item['slot']):
+        hashed_id = entry.get('hashed_id')
+        account_id = entry.get('account_id')
+        if hashed_id is not None:
+            account_id = accounts.get(hashed_id, (None, hashed_id[:10] + '..'))[1]
+        renderer.add(entry['slot'], CheckinResult(
+            service_name=entry['service_name'],
+            account_id=account_id,
+            success=entry['success'],
+            message=entry['message'],
+            checkin_time=entry['checkin_time'],
+            data=entry.get('data'),
+        ))
+    return renderer.render()
@@ -1,41 +1,156 @@
 import json
 import os
+import threading
+from datetime import datetime, timedelta
+from logger import get_logger, SUMMARY
+
+logger = get_logger(__name__)
 
 STATUS_FILE_NAME = "status.json"
+# 追加写入的状态日志，每完成一个账号追加一行，进程中断后可据此恢复进度
+JOURNAL_FILE_NAME = "status.journal"
+
+_journal_lock = threading.Lock()
+# 已打开的状态日志，按文件名区分（分片执行时每个分片使用独立的日志）
+_journal_files = {}
+
+
+def beijing_now() -> datetime:
+    """当前北京时间（不带时区信息），签到时间和“今天”的判断统一使用北京时间，与运行环境的时区无关"""
+    return datetime.utcnow() + timedelta(hours=8)
+
+
+def _replay_journal(status_data: dict, journal_file: str = JOURNAL_FILE_NAME) -> int:
+    """
+    将状态日志中的记录按顺序合并到 status_data 中。
 
-def read_prior_status() -> dict:
+    :return: 成功回放的记录数。最后一行可能因进程中断而不完整，解析失败的行会被忽略。
     """
-    读取由 GitHub Action 下载到本地的先前状态文件 (status.json)。
+    if not os.path.exists(journal_file):
+        return 0
+
+    replayed = 0
+    try:
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    status_data[entry['id']] = entry['record']
+                    replayed += 1
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logger.warning("Skipping corrupted journal line in '%s'.", journal_file)
+    except IOError as e:
+        logger.error("Error reading '%s': %s", journal_file, e)
+    return replayed
+
+
+def _write_status_file(data: dict, status_file: str = STATUS_FILE_NAME):
+    """先写临时文件再原子替换，避免写入过程中断导致 status.json 损坏"""
+    tmp_name = status_file + ".tmp"
+    with open(tmp_name, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, status_file)
+
+
+def _truncate_journal(journal_file: str = JOURNAL_FILE_NAME):
+    """关闭并删除状态日志，其内容已合并进 status.json"""
+    with _journal_lock:
+        handle = _journal_files.pop(journal_file, None)
+        if handle is not None:
+            handle.close()
+        if os.path.exists(journal_file):
+            os.remove(journal_file)
 
+
+def read_prior_status(status_file: str = STATUS_FILE_NAME, journal_file: str = JOURNAL_FILE_NAME,
+                      compact: bool = True) -> dict:
+    """
+    读取由 GitHub Action 下载到本地的先前状态文件 (status.json)，并回放状态日志 (status.journal)。
+    如果日志中有记录，会将其压缩合并进 status.json 并清空日志。
+
+    :param status_file: 状态文件名，分片执行时为分片状态文件。
+    :param journal_file: 对应的状态日志文件名。
+    :param compact: 为 False 时只在内存中回放日志，不改写任何文件；多个分片进程同时读取共享的
+                    status.json 时使用，压缩交由合并步骤完成。
     :return: 一个包含已成功服务状态的字典，例如 {'GLaDOS': True}。如果文件不存在或为空，则返回空字典。
     """
-    if not os.path.exists(STATUS_FILE_NAME):
-        print(f"'{STATUS_FILE_NAME}' not found. Assuming first run of the day.")
-        return {}
-    
+    status_data = {}
+    if not os.path.exists(status_file):
+        logger.info("'%s' not found. Assuming first run of the day.", status_file)
+    else:
+        try:
+            with open(status_file, 'r', encoding='utf-8') as f:
+                # 处理文件可能为空的情况
+                content = f.read()
+                if not content:
+                    logger.info("'%s' is empty. Assuming first run of the day.", status_file)
+                else:
+                    status_data = json.loads(content)
+                    # 完整的状态内容只在调试日志中输出，账号数量较多时避免大量日志
+                    logger.info("Successfully read prior status from '%s': %d record(s).", status_file,
+                                len(status_data) if isinstance(status_data, dict) else 0)
+                    logger.debug("Prior status: %s", status_data)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error("Error reading or parsing '%s': %s", status_file, e)
+            status_data = {}  # 出错时使用空字典，确保主流程能继续
+
+    if not isinstance(status_data, dict):
+        return status_data
+
+    replayed = _replay_journal(status_data, journal_file)
+    if replayed and not compact:
+        logger.info("Replayed %d record(s) from '%s' without compacting.", replayed, journal_file)
+    elif replayed:
+        logger.info("Replayed %d record(s) from '%s', compacting into '%s'.", replayed, journal_file, status_file)
+        try:
+            _write_status_file(status_data, status_file)
+            _truncate_journal(journal_file)
+        except IOError as e:
+            logger.error("Error compacting '%s': %s", journal_file, e)
+    return status_data
+
+
+def append_status_record(hashed_id: str, record: dict, journal_file: str = JOURNAL_FILE_NAME):
+    """
+    将单个账号的状态追加写入状态日志，并立即 flush + fsync。
+    每个账号完成后调用一次，写入开销为 O(1)，进程中途退出也不会丢失已完成的进度。
+
+    :param hashed_id: 账号哈希。
+    :param record: 该账号的状态记录。
+    :param journal_file: 状态日志文件名。
+    """
+    line = json.dumps({'id': hashed_id, 'record': record}, ensure_ascii=False)
     try:
-        with open(STATUS_FILE_NAME, 'r', encoding='utf-8') as f:
-            # 处理文件可能为空的情况
-            content = f.read()
-            if not content:
-                print(f"'{STATUS_FILE_NAME}' is empty. Assuming first run of the day.")
-                return {}
-            status_data = json.loads(content)
-            print(f"Successfully read prior status: {status_data}")
-            return status_data
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error reading or parsing '{STATUS_FILE_NAME}': {e}")
-        return {} # 出错时返回空字典，确保主流程能继续
-
-def write_current_status(data: dict):
+        with _journal_lock:
+            handle = _journal_files.get(journal_file)
+            if handle is None:
+                handle = open(journal_file, 'a', encoding='utf-8')
+                _journal_files[journal_file] = handle
+            handle.write(line + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+    except IOError as e:
+        logger.error("Error appending to '%s': %s", journal_file, e)
+
+
+def write_current_status(data: dict, status_file: str = STATUS_FILE_NAME, journal_file: str = JOURNAL_FILE_NAME):
     """
     将当前成功状态写入本地的 status.json 文件，以便 GitHub Action 后续上传。
+    写入成功后清空状态日志。
 
     :param data: 要写入的状态字典。
+    :param status_file: 状态文件名，分片执行时为分片状态文件。
+    :param journal_file: 对应的状态日志文件名。
     """
     try:
-        with open(STATUS_FILE_NAME, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        print(f"Current status written to '{STATUS_FILE_NAME}': {data}")
+        _write_status_file(data, status_file)
+        logger.log(SUMMARY, "Current status written to '%s': %d record(s).", status_file, len(data))
+        logger.debug("Current status: %s", data)
+        _truncate_journal(journal_file)
     except IOError as e:
-        print(f"Error writing to '{STATUS_FILE_NAME}': {e}")
\ No newline at end of file
+        logger.error("Error writing to '%s': %s", status_file, e)
@@ -0,0 +1,56 @@
+# tests/conftest.py
+# 各模块位于仓库根目录并以顶层模块导入，测试时将仓库根目录和 bench/ 加入 sys.path，
+# 需要模拟服务端的用例复用 bench/ 中的桩服务器
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(1, os.path.join(ROOT_DIR, 'bench'))
+
+from logger import flush_logs  # noqa: E402
+from stub_server import StubConfig, start_stub_server  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _flush_buffered_logs():
+    """每个用例结束时写出缓冲的日志，避免在 pytest 关闭输出捕获后才写出"""
+    yield
+    flush_logs()
+
+
+@pytest.fixture(autouse=True)
+def _close_status_journals():
+    """状态日志句柄按（相对）文件名缓存，用例切换工作目录后需关闭，避免写入上一个用例的目录"""
+    yield
+    import status_manager
+    with status_manager._journal_lock:
+        for handle in status_manager._journal_files.values():
+            handle.close()
+        status_manager._journal_files.clear()
+
+
+@pytest.fixture
+def stub_server():
+    """无延迟、全部成功的签到桩服务器，返回其 base URL"""
+    server = start_stub_server(StubConfig(latency=0, seed=1))
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_accounts(stub_server, tmp_path, monkeypatch):
+    """
+    在临时目录中运行，GLaDOS 和 iKuuu 各配置两个指向桩服务器的合成账号；
+    关闭限流器，避免用例之间共享的令牌桶影响耗时。
+    """
+    from gen_accounts import account_env
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', '0')
+    for key, value in account_env(2, 2, stub_server).items():
+        monkeypatch.setenv(key, value)
+    return stub_server
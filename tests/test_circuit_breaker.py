@@ -0,0 +1,122 @@
+# tests/test_circuit_breaker.py
+import socket
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from services import circuit_breaker
+from services.circuit_breaker import CircuitBreaker, HostUnavailableError, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的单调时钟"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(circuit_breaker, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('host', failure_threshold=3, reset_timeout=30)
+
+    for _ in range(2):
+        assert breaker.before_request() is False
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(HostUnavailableError):
+        breaker.before_request()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker('host', failure_threshold=3)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+    assert breaker.failures == 1
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = CircuitBreaker('host', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock.value += 29
+    with pytest.raises(HostUnavailableError):
+        breaker.before_request()
+
+    clock.value += 1
+    assert breaker.before_request() is True
+    assert breaker.state == HALF_OPEN
+    # 探测请求在途时其他请求仍直接失败
+    with pytest.raises(HostUnavailableError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.before_request() is False
+
+
+def test_failed_probe_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker('host', failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.value += 30
+    assert breaker.before_request() is True
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert breaker.opened_at == clock.value
+    with pytest.raises(HostUnavailableError):
+        breaker.before_request()
+
+
+def test_released_probe_allows_the_next_request_to_probe(clock):
+    breaker = CircuitBreaker('host', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.value += 30
+
+    assert breaker.before_request() is True
+    breaker.release_probe()
+
+    assert breaker.before_request() is True
+    assert breaker.state == HALF_OPEN
+
+
+@pytest.fixture
+def unreachable_glados(tmp_path, monkeypatch):
+    """指向一个没有监听的本地端口的 GLaDOS 服务，连接立即被拒绝"""
+    from gen_accounts import account_env
+    from services.glados_service import GLaDOSService
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    monkeypatch.setattr(circuit_breaker, '_breakers', {})
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', '0')
+    for key, value in account_env(1, 0, base_url).items():
+        monkeypatch.setenv(key, value)
+    return GLaDOSService(), base_url
+
+
+def test_make_request_fails_fast_once_the_host_is_open(unreachable_glados):
+    service, base_url = unreachable_glados
+    threshold = service.get_circuit_breaker_config()['failure_threshold']
+
+    for _ in range(threshold):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            service.make_request('GET', base_url + '/api/user/status')
+
+    with pytest.raises(HostUnavailableError):
+        service.make_request('GET', base_url + '/api/user/status')
+    assert service.get_host_breaker(base_url).state == OPEN
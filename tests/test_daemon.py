@@ -0,0 +1,127 @@
+# tests/test_daemon.py
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import daemon
+import notifications
+from services.base_service import CheckinTask
+
+
+def _fixed_clock(monkeypatch, value: datetime):
+    """将签到时间戳和调度器共用的北京时间固定为 value"""
+    monkeypatch.setattr(daemon, 'beijing_now', lambda: value)
+    monkeypatch.setattr('services.base_service.beijing_now', lambda: value)
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    reports = []
+
+    def send_notification(title, content):
+        reports.append((title, content))
+        return {'Stub': {'success': True, 'latency': 0.0, 'status': '成功'}}
+
+    monkeypatch.setattr(notifications, 'send_notification', send_notification)
+    return reports
+
+
+def _daemon(window=(0, 24 * 60)) -> daemon.CheckinDaemon:
+    return daemon.CheckinDaemon(window, retry_interval=3600, max_daily_runs=2)
+
+
+def test_checkin_time_is_stamped_in_beijing_time(monkeypatch):
+    # 北京时间 10:14 时运行环境（UTC）为 02:14，签到时间应记录北京时间
+    _fixed_clock(monkeypatch, datetime(2026, 10, 17, 10, 14))
+    assert CheckinTask({'account_id': 'a'}).checkin_time == '2026-10-17 10:14:00'
+
+
+def test_restart_in_early_beijing_morning_keeps_todays_results(stub_accounts, monkeypatch, sent):
+    # 北京时间 02:14（UTC 前一天 18:14）重启：当日已成功的账号不再签到，前一天的记录不计入
+    _fixed_clock(monkeypatch, datetime(2026, 10, 17, 2, 14))
+    first = _daemon()
+    entries = first.registry.entries
+    with open('status.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            entries[0].hashed_id: {'success': True, 'checkin_time': '2026-10-17 01:30:00'},
+            entries[1].hashed_id: {'success': True, 'checkin_time': '2026-10-16 23:50:00'},
+        }, f)
+
+    first._roll_day()
+
+    assert first.day == '2026-10-17'
+    pending = {hashed_id for _, _, hashed_id in first.schedule}
+    assert entries[0].hashed_id not in pending
+    assert pending == {entry.hashed_id for entry in entries[1:]}
+
+
+def test_records_written_before_restart_are_recognised(stub_accounts, monkeypatch, sent):
+    _fixed_clock(monkeypatch, datetime(2026, 10, 17, 2, 14))
+    first = _daemon()
+    first._roll_day()
+    first.trigger()
+    first._run_batch(first._pop_due())
+    assert all(record['checkin_time'].startswith('2026-10-17') for record in first.status_sink.status.values())
+
+    restarted = _daemon()
+    restarted._roll_day()
+    assert restarted.schedule == []
+
+
+def _at(monkeypatch, now: datetime):
+    """固定北京时间，并让调度器的 time.time() 与之一致"""
+    _fixed_clock(monkeypatch, now)
+    timestamp = daemon._beijing_timestamp(now, now.hour * 60 + now.minute)
+    monkeypatch.setattr(daemon, 'time', SimpleNamespace(time=lambda: timestamp))
+    return timestamp
+
+
+def test_accounts_are_spread_over_the_window(stub_accounts, monkeypatch):
+    # 北京时间 06:00 启动，窗口 08:00-12:00，所有账号都安排在窗口内，此时没有到期的账号
+    now = datetime(2026, 10, 17, 6, 0)
+    _at(monkeypatch, now)
+    scheduler = _daemon(window=(8 * 60, 12 * 60))
+    scheduler._roll_day()
+
+    start, end = daemon._beijing_timestamp(now, 8 * 60), daemon._beijing_timestamp(now, 12 * 60)
+    assert len(scheduler.schedule) == len(scheduler.registry.entries)
+    assert all(start <= due <= end for due, _, _ in scheduler.schedule)
+    assert scheduler._pop_due() == []
+
+
+def test_late_start_runs_accounts_soon(stub_accounts, monkeypatch):
+    # 北京时间 13:00 启动时窗口已过，待签到账号在 LATE_START_JITTER 秒内执行
+    timestamp = _at(monkeypatch, datetime(2026, 10, 17, 13, 0))
+    scheduler = _daemon(window=(8 * 60, 12 * 60))
+    scheduler._roll_day()
+
+    assert len(scheduler.schedule) == len(scheduler.registry.entries)
+    assert all(timestamp <= due <= timestamp + daemon.LATE_START_JITTER for due, _, _ in scheduler.schedule)
+
+
+def test_one_report_per_day_after_the_schedule_drains(stub_accounts, sent):
+    scheduler = _daemon()
+    scheduler._roll_day()
+    entries = scheduler.registry.entries
+
+    # 前两个账号先到期，其余账号一小时后到期：第一批结束后不发送报告
+    scheduler.schedule = []
+    for index, entry in enumerate(entries):
+        scheduler._push(0 if index < 2 else time.time() + 3600, entry.hashed_id)
+    scheduler._run_batch(scheduler._pop_due())
+    assert sent == []
+    assert len(scheduler.schedule) == len(entries) - 2
+
+    # 其余账号执行完后调度清空，发送一份包含所有账号的报告
+    scheduler.trigger()
+    scheduler._run_batch(scheduler._pop_due())
+    assert scheduler.schedule == []
+    scheduler._notify_day()
+    scheduler._notify_day()
+
+    assert len(sent) == 1
+    title, _ = sent[0]
+    assert title == f"自动签到 {len(entries)}/{len(entries)}/0"
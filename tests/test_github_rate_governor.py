@@ -0,0 +1,88 @@
+# tests/test_github_rate_governor.py
+import json
+import time
+import urllib.request
+from argparse import Namespace
+from types import SimpleNamespace
+
+import pytest
+
+import batch_del_workflows
+from batch_del_workflows import GitHubRateGovernor, SECONDARY_LIMIT_PAUSE
+from github_stub import start_github_stub
+
+
+def fake_response(status_code: int, text: str = '', **headers):
+    return SimpleNamespace(status_code=status_code, ok=200 <= status_code < 300, text=text,
+                           headers={name.replace('_', '-'): str(value) for name, value in headers.items()})
+
+
+def test_secondary_limit_penalizes_once_per_pause():
+    governor = GitHubRateGovernor(rate=8, burst=1, pending=100)
+    limited = fake_response(403, 'You have exceeded a secondary rate limit.', Retry_After=2)
+
+    # 同一次限流中所有在途请求都会收到 403，只降速一次
+    assert [governor.observe(limited) for _ in range(4)] == [2, 2, 2, 2]
+    assert governor.bucket.rate == 4
+    assert governor._blocked_until == pytest.approx(time.monotonic() + 2, abs=0.1)
+
+
+def test_secondary_limit_without_retry_after_pauses_a_minute():
+    governor = GitHubRateGovernor(rate=2, burst=1, pending=10)
+
+    assert governor.observe(fake_response(429)) == SECONDARY_LIMIT_PAUSE
+    assert governor.observe(fake_response(403, 'secondary rate limit')) == SECONDARY_LIMIT_PAUSE
+    assert governor.observe(fake_response(403, 'Resource not accessible by integration')) is None
+
+
+def test_exhausted_primary_limit_blocks_until_reset():
+    governor = GitHubRateGovernor(rate=2, burst=1, pending=10)
+    reset = int(time.time()) + 30
+
+    retry_after = governor.observe(fake_response(403, 'API rate limit exceeded',
+                                                 X_RateLimit_Remaining=0, X_RateLimit_Reset=reset))
+
+    assert 29 <= retry_after <= 32
+    assert governor._blocked_until == pytest.approx(time.monotonic() + retry_after, abs=0.1)
+    # 主限流按重置时间等待，不降低速率
+    assert governor.bucket.rate == 2
+
+
+def test_low_remaining_quota_is_spread_until_reset():
+    governor = GitHubRateGovernor(rate=2, burst=1, pending=100)
+    reset = int(time.time()) + 49
+
+    assert governor.observe(fake_response(204, X_RateLimit_Remaining=10, X_RateLimit_Reset=reset)) is None
+    assert governor._spacing == pytest.approx(5, abs=0.2)
+
+    # 额度足够完成剩余删除后不再额外限制
+    governor.pending = 5
+    governor.observe(fake_response(204, X_RateLimit_Remaining=10, X_RateLimit_Reset=reset))
+    assert governor._spacing == 0
+
+
+def stub_stats(server) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/__stats") as response:
+        return json.load(response)
+
+
+@pytest.fixture
+def github_stub():
+    server = start_github_stub(runs=40, latency=0.005, rate_limit=5000, rate_window=3600,
+                               secondary_rate=10, retry_after=1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_delete_survives_secondary_limits(github_stub):
+    args = Namespace(owner='o', repo='r', count=None, gh_token='x', force=True, delay=0, workers=4, rate=20.0,
+                     api_url=f"http://127.0.0.1:{github_stub.server_address[1]}")
+
+    batch_del_workflows.main(args)
+
+    stats = stub_stats(github_stub)
+    assert stats['runs_left'] == 0
+    assert stats['deleted'] == 40
+    assert stats['secondary_limited'] > 0
+    assert 'delete_missing' not in stats
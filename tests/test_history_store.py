@@ -0,0 +1,62 @@
+# tests/test_history_store.py
+import pytest
+
+import history_store
+from history_store import HistoryStore
+from services.base_service import CheckinResult
+
+
+def _result(account: str, day: str, success: bool, left_days=None, **data) -> CheckinResult:
+    if left_days is not None:
+        data['left_days'] = left_days
+    return CheckinResult('GLaDOS', account, success, 'ok' if success else 'fail', f"{day} 09:00:00",
+                         data=data, duration=1.0)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path)
+    try:
+        store.record_run([_result('a', '2026-10-14', False), _result('b', '2026-10-14', True, 30)], str)
+        store.record_run([_result('a', '2026-10-15', True), _result('b', '2026-10-15', True, 28)], str)
+        store.record_run([
+            _result('a', '2026-10-16', False),
+            _result('a', '2026-10-17', False),
+            _result('b', '2026-10-17', True, 26),
+            _result('c', '2026-10-17', True, skipped=True),  # 从 status.json 跳过的账号不写入
+        ], str)
+    finally:
+        store.close()
+    return path
+
+
+def test_failure_streaks_stop_at_the_last_successful_day(db_path):
+    store = HistoryStore(db_path)
+    try:
+        assert [(row['account_hash'], row['streak']) for row in store.failure_streaks()] == [('a', 2)]
+        assert store.failure_streaks(min_streak=3) == []
+    finally:
+        store.close()
+
+
+def test_days_remaining_projects_expiry(db_path):
+    store = HistoryStore(db_path)
+    try:
+        (row,) = store.days_remaining()
+    finally:
+        store.close()
+    assert row['left_days'] == 26
+    assert row['burn_rate'] == pytest.approx(4 / 3)
+    assert row['projected_expiry'] == '2026-11-12'
+
+
+def test_cli_reads_argv(db_path, capsys):
+    history_store.main(['--db', db_path, 'streaks', '-m', '2'])
+    assert '连续失败 2 天' in capsys.readouterr().out
+
+
+def test_cli_requires_an_existing_database(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        history_store.main(['--db', str(tmp_path / 'missing.db'), 'rates'])
+    assert '未找到历史数据库' in capsys.readouterr().out
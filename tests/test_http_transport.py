@@ -0,0 +1,55 @@
+# tests/test_http_transport.py
+import socket
+
+import pytest
+import requests
+
+import http_transport
+
+
+@pytest.fixture
+def timing():
+    marks = http_transport.start_request_timing()
+    yield marks
+    http_transport.stop_request_timing()
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_new_connection_records_every_phase(stub_server, timing):
+    session = http_transport.create_session()
+    assert session.get(stub_server + '/').status_code == 200
+
+    for key in ('dns_start', 'dns_end', 'connect_start', 'connect_end', 'request_start', 'response_start'):
+        assert key in timing
+    assert timing['dns_start'] <= timing['connect_end'] <= timing['response_start']
+
+
+def test_without_timing_support_falls_back_to_urllib3(stub_server, timing, monkeypatch):
+    # urllib3 1.x 没有 NameResolutionError，连接阶段不计时但请求照常完成
+    monkeypatch.setattr(http_transport, 'NameResolutionError', None)
+    session = http_transport.create_session()
+    assert session.get(stub_server + '/').status_code == 200
+
+    assert 'connect_end' not in timing
+    assert 'response_start' in timing
+
+
+def test_failed_connect_is_attempted_once_per_address(timing, monkeypatch):
+    attempts = []
+    original = http_transport.HTTPConnection._new_conn
+
+    def counting_new_conn(self):
+        attempts.append(self._dns_host)
+        return original(self)
+
+    monkeypatch.setattr(http_transport.HTTPConnection, '_new_conn', counting_new_conn)
+    session = http_transport.create_session()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get(f"http://127.0.0.1:{_closed_port()}/", timeout=1)
+
+    assert attempts == ['127.0.0.1']
@@ -0,0 +1,120 @@
+# tests/test_mirror_resolver.py
+import json
+import socket
+
+import pytest
+
+from account_registry import AccountRegistry
+from services.mirror_resolver import MirrorResolver, parse_base_urls, MIRROR_CACHE_FILE_NAME
+
+
+def _dead_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """记录实际发出的探测"""
+    calls = []
+    original = MirrorResolver._probe_one
+
+    def probe_one(self, base_url):
+        calls.append(base_url)
+        return original(self, base_url)
+
+    monkeypatch.setattr(MirrorResolver, '_probe_one', probe_one)
+    return calls
+
+
+def test_parse_base_urls():
+    assert parse_base_urls(" https://a.com/, https://b.com ,https://a.com,") == ['https://a.com', 'https://b.com']
+
+
+def test_single_candidate_is_used_without_probing(cache_dir, probes):
+    assert MirrorResolver('svc', ['https://only.example']).current() == 'https://only.example'
+    assert probes == []
+
+
+def test_fastest_healthy_mirror_is_selected_and_cached(stub_server, cache_dir, probes):
+    dead = _dead_url()
+    resolver = MirrorResolver('svc', [dead, stub_server])
+
+    assert resolver.current() == stub_server
+    assert sorted(probes) == sorted([dead, stub_server])
+    with open(MIRROR_CACHE_FILE_NAME, encoding='utf-8') as f:
+        assert json.load(f)['svc']['order'] == [stub_server, dead]
+
+    # 有效期内的后续运行直接使用缓存，不再探测
+    probes.clear()
+    assert MirrorResolver('svc', [dead, stub_server]).current() == stub_server
+    assert probes == []
+
+
+def test_cache_is_ignored_when_candidates_change_or_expire(stub_server, cache_dir, probes, monkeypatch):
+    dead = _dead_url()
+    MirrorResolver('svc', [dead, stub_server]).current()
+
+    probes.clear()
+    MirrorResolver('svc', [stub_server, dead]).current()
+    assert probes
+
+    probes.clear()
+    monkeypatch.setenv('MIRROR_CACHE_TTL', '0')
+    MirrorResolver('svc', [stub_server, dead]).current()
+    assert probes
+
+
+def test_consecutive_failures_switch_to_next_mirror(cache_dir):
+    resolver = MirrorResolver('svc', ['https://a.example', 'https://b.example'], failover_threshold=2)
+    resolver._order = ['https://a.example', 'https://b.example']
+
+    assert not resolver.report_failure('https://a.example/api')
+    resolver.report_success('https://a.example/api')  # 成功后重新计数
+    assert not resolver.report_failure('https://a.example/api')
+    assert resolver.report_failure('https://a.example/api')
+    assert resolver.current() == 'https://b.example'
+    # 其他线程仍在使用旧镜像的失败不会重复计数，提示调用方重试即可换用新镜像
+    assert resolver.report_failure('https://a.example/api')
+    assert resolver.current() == 'https://b.example'
+    assert resolver.report_failure('https://b.example/api', force=True)
+    assert resolver.current() == 'https://a.example'
+
+
+def test_account_configs_do_not_probe_mirrors(stub_server, cache_dir, probes, monkeypatch):
+    from services.glados_service import GLaDOSService
+    from services.ikuuu_service import IkuuuService
+    from gen_accounts import account_env
+
+    dead = _dead_url()
+    for key, value in account_env(2, 2, f"{dead},{stub_server}").items():
+        monkeypatch.setenv(key, value)
+
+    services = [GLaDOSService(), IkuuuService()]
+    registry = AccountRegistry.build(services)
+    assert len(registry.entries) == 4
+    assert probes == []
+
+    # 首次请求时才探测，之后同一服务的账号复用选择结果
+    entry = registry.entries[0]
+    assert entry.service.get_base_url(entry.config) == stub_server
+    assert entry.service.get_base_url(entry.config) == stub_server
+    assert sorted(probes) == sorted([dead, stub_server])
+
+
+def test_mirror_whose_url_is_a_prefix_of_another_is_matched_by_host(cache_dir):
+    resolver = MirrorResolver('svc', ['https://ikuuu.one', 'https://ikuuu.one.example'], failover_threshold=1)
+    resolver._order = ['https://ikuuu.one', 'https://ikuuu.one.example']
+
+    # 当前镜像是另一镜像的字符串前缀时，另一镜像的失败不应计到当前镜像上
+    assert resolver.report_failure('https://ikuuu.one.example/user/checkin')
+    assert resolver.current() == 'https://ikuuu.one'
+    assert resolver.report_failure('https://ikuuu.one/user/checkin')
+    assert resolver.current() == 'https://ikuuu.one.example'
@@ -0,0 +1,103 @@
+# tests/test_notification_outbox.py
+import json
+import os
+
+import pytest
+
+import notification_outbox
+from notification_outbox import NotificationOutbox, deliver, has_pending_notifications, OUTBOX_FILE_NAME
+
+OK = {'Stub': {'success': True}}
+FAILED = {'Stub': {'success': False}}
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+class Sender:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.sent = []
+
+    def __call__(self, title, content):
+        self.sent.append((title, content))
+        return self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+
+
+def _load() -> dict:
+    with open(OUTBOX_FILE_NAME, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_report_is_persisted_before_sending():
+    def send(title, content):
+        # 推送开始时报告已写入文件，进程在此中断也能在下次运行补发
+        assert [item['title'] for item in _load()['pending']] == ['t']
+        raise SystemExit
+
+    with pytest.raises(SystemExit):
+        deliver('t', 'c', send, run_key='run-1')
+
+    assert has_pending_notifications()
+    sender = Sender(OK)
+    NotificationOutbox().flush(sender)
+    assert sender.sent == [('t', 'c')]
+    assert not has_pending_notifications()
+
+
+def test_same_report_of_same_run_is_sent_once():
+    sender = Sender(OK)
+    deliver('t', 'c', sender, run_key='run-1')
+    deliver('t', 'c', sender, run_key='run-1')
+    assert sender.sent == [('t', 'c')]
+
+    # 之后运行的报告即使内容相同也会发送
+    deliver('t', 'c', sender, run_key='run-2')
+    assert len(sender.sent) == 2
+
+
+def test_failed_report_is_retried_with_backoff(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(notification_outbox.time, 'time', lambda: now[0])
+    sender = Sender(FAILED, FAILED, OK)
+
+    deliver('t', 'c', sender, run_key='run-1')
+    item = _load()['pending'][0]
+    assert item['attempts'] == 1
+    assert item['next_attempt_at'] == now[0] + notification_outbox.RETRY_BASE_DELAY
+
+    # 未到重试时间不发送
+    NotificationOutbox().flush(sender)
+    assert len(sender.sent) == 1
+
+    now[0] += notification_outbox.RETRY_BASE_DELAY
+    NotificationOutbox().flush(sender)
+    assert _load()['pending'][0]['next_attempt_at'] == now[0] + 2 * notification_outbox.RETRY_BASE_DELAY
+
+    now[0] += 2 * notification_outbox.RETRY_BASE_DELAY
+    NotificationOutbox().flush(sender)
+    assert len(sender.sent) == 3
+    assert _load()['pending'] == []
+
+
+@pytest.mark.parametrize('field, value', [
+    ('created_at', -notification_outbox.MAX_AGE - 1),
+    ('attempts', notification_outbox.MAX_ATTEMPTS),
+])
+def test_expired_reports_are_dropped(field, value):
+    outbox = NotificationOutbox()
+    outbox.enqueue('t', 'c', run_key='run-1')
+    outbox.pending[0][field] += value
+    sender = Sender(OK)
+
+    outbox.flush(sender)
+
+    assert sender.sent == []
+    assert not os.path.exists(OUTBOX_FILE_NAME) or _load()['pending'] == []
+
+
+def test_report_is_dropped_when_no_channel_is_configured():
+    deliver('t', 'c', lambda title, content: {}, run_key='run-1')
+    assert not os.path.exists(OUTBOX_FILE_NAME)
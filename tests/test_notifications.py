@@ -0,0 +1,121 @@
+# tests/test_notifications.py
+import time
+
+import pytest
+
+import notifications
+
+
+@pytest.fixture
+def channels(monkeypatch):
+    for name in ('SERVERCHAN_KEY', 'PUSHPLUS_TOKEN', 'TG_BOT_TOKEN', 'TG_CHAT_ID'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('PUSHPLUS_TOKEN', 'token')
+    monkeypatch.setenv('TG_BOT_TOKEN', 'bot')
+    monkeypatch.setenv('TG_CHAT_ID', '1')
+    monkeypatch.setenv('NOTIFY_DEADLINE', '0.3')
+
+
+def test_no_channel_configured(monkeypatch):
+    for name in ('SERVERCHAN_KEY', 'PUSHPLUS_TOKEN', 'TG_BOT_TOKEN', 'TG_CHAT_ID'):
+        monkeypatch.delenv(name, raising=False)
+    assert notifications.send_notification('t', 'c') == {}
+
+
+def test_slow_channel_times_out_at_the_deadline(channels, monkeypatch):
+    timeouts = []
+
+    def slow_tg(bot_token, chat_id, content, timeout):
+        timeouts.append(timeout)
+        time.sleep(2)
+        return True
+
+    monkeypatch.setattr(notifications, '_push_tg', slow_tg)
+    monkeypatch.setattr(notifications, '_push_plus', lambda token, title, content, timeout: True)
+
+    started = time.monotonic()
+    outcomes = notifications.send_notification('t', 'c')
+
+    assert time.monotonic() - started < 0.6
+    assert outcomes['PushPlus']['success']
+    assert outcomes['Telegram'] == {'success': False, 'latency': pytest.approx(0.3, abs=0.1), 'status': '超时'}
+    # 单次请求超时不超过剩余的总时限
+    assert timeouts and timeouts[0] <= 0.3
+
+
+def test_no_chunks_are_sent_after_the_deadline(channels, monkeypatch):
+    sent = []
+
+    def push_plus(token, title, content, timeout):
+        sent.append(timeout)
+        time.sleep(0.2)
+        return True
+
+    monkeypatch.setattr(notifications, '_push_plus', push_plus)
+    monkeypatch.setattr(notifications, '_push_tg', lambda *args: True)
+    monkeypatch.setitem(notifications._CHANNEL_LIMITS, 'PushPlus', {'max_chars': 100})
+    monkeypatch.setenv('NOTIFY_DEADLINE', '0.5')
+
+    outcomes = notifications.send_notification('t', "\n".join("x" * 60 for _ in range(10)))
+    time.sleep(0.3)  # 等待后台线程发送完当前分片
+
+    assert not outcomes['PushPlus']['success']
+    assert len(sent) == 3
+    assert all(timeout <= 0.5 for timeout in sent)
+
+
+def test_channel_exception_is_reported_as_failure(channels, monkeypatch):
+    def broken(*args):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(notifications, '_push_plus', broken)
+    monkeypatch.setattr(notifications, '_push_tg', lambda *args: True)
+
+    outcomes = notifications.send_notification('t', 'c')
+
+    assert outcomes['PushPlus']['status'] == '异常: boom'
+    assert outcomes['Telegram']['success']
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = ''):
+        self.status_code = status_code
+        self.text = text
+
+
+class FakeSession:
+    """按顺序返回预设响应并记录请求体"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.payloads = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.payloads.append(dict(json))
+        return self.responses.pop(0)
+
+
+def test_telegram_resends_rejected_markdown_as_plain_text(monkeypatch):
+    session = FakeSession(FakeResponse(400, "can't parse entities"), FakeResponse(200))
+    monkeypatch.setattr(notifications, 'get_session', lambda: session)
+
+    assert notifications._push_tg('bot', '1', '*unterminated', timeout=1)
+    assert session.payloads[0]['parse_mode'] == 'Markdown'
+    assert 'parse_mode' not in session.payloads[1]
+    assert session.payloads[1]['text'] == '*unterminated'
+
+
+def test_telegram_plain_text_failure_is_reported(monkeypatch):
+    session = FakeSession(FakeResponse(400), FakeResponse(400))
+    monkeypatch.setattr(notifications, 'get_session', lambda: session)
+
+    assert not notifications._push_tg('bot', '1', 'text', timeout=1)
+    assert len(session.payloads) == 2
+
+
+def test_long_report_is_split_with_chunk_headers():
+    chunks = notifications._split_for_channel('Telegram', "\n".join("y" * 1000 for _ in range(10)))
+
+    assert len(chunks) == 3
+    assert [chunk.split("\n")[0] for chunk in chunks] == ['(1/3)', '(2/3)', '(3/3)']
+    assert all(len(chunk) <= 4096 for chunk in chunks)
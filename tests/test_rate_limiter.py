@@ -0,0 +1,82 @@
+# tests/test_rate_limiter.py
+import time
+
+import pytest
+
+from services import rate_limiter
+from services.rate_limiter import TokenBucket
+
+
+def test_burst_is_free_then_reservations_are_staggered():
+    bucket = TokenBucket("test", rate=10, burst=2)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    waits = [bucket.reserve() for _ in range(3)]
+    assert waits == sorted(waits)
+    assert waits[0] == pytest.approx(0.1, abs=0.02)
+    assert waits[2] == pytest.approx(0.3, abs=0.02)
+
+
+def test_penalize_halves_rate_and_honours_retry_after():
+    bucket = TokenBucket("test", rate=4, burst=5, min_rate=1, backoff_factor=0.5)
+
+    assert bucket.penalize(retry_after=30)
+    assert bucket.rate == 2
+    assert bucket.reserve() >= 29
+
+
+def test_concurrent_429s_penalize_once_per_window(monkeypatch):
+    now = [time.monotonic()]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    bucket = TokenBucket("test", rate=8, burst=5, min_rate=1, backoff_factor=0.5)
+
+    # 同一次限流中在途请求先后收到 429：只降速一次，但暂停时间取最长的 Retry-After
+    assert bucket.penalize(retry_after=2)
+    assert not bucket.penalize(retry_after=5)
+    assert not bucket.penalize()
+    assert bucket.rate == 4
+    assert bucket.reserve() == pytest.approx(5)
+
+    # 暂停结束后再次限流才继续降速，且不低于 min_rate
+    now[0] += 6
+    assert bucket.penalize()
+    assert bucket.rate == 2
+    now[0] += 1
+    bucket.penalize()
+    now[0] += 1
+    bucket.penalize()
+    assert bucket.rate == 1
+
+
+def test_reward_probes_up_to_max_rate():
+    bucket = TokenBucket("test", rate=5, burst=5, recovery_step=2, max_rate=10)
+    for _ in range(10):
+        bucket.reward()
+
+    assert bucket.rate == 10
+
+
+def test_max_rate_defaults_to_rate():
+    bucket = TokenBucket("test", rate=5, burst=5)
+    bucket.reward()
+
+    assert bucket.rate == 5
+
+
+def test_bucket_defaults_match_base_service_config():
+    from services.base_service import CheckinService
+    config = CheckinService.get_rate_limit_config()
+    bucket = TokenBucket("test", rate=config['rate'], burst=config['burst'])
+
+    for key in ('min_rate', 'backoff_factor', 'recovery_step'):
+        assert getattr(bucket, key) == config[key]
+
+
+def test_checkin_services_probe_only_near_the_configured_rate():
+    from services.glados_service import GLaDOSService
+    from services.ikuuu_service import IkuuuService
+
+    for service_cls in (GLaDOSService, IkuuuService):
+        config = service_cls.get_rate_limit_config()
+        assert config['rate'] <= config['max_rate'] <= 2 * config['rate']
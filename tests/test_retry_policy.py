@@ -0,0 +1,76 @@
+# tests/test_retry_policy.py
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from services.retry_policy import RetryPolicy, PermanentCheckinError, parse_retry_after
+
+
+def _http_error(status_code: int, headers=None) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return requests.exceptions.HTTPError(response=response)
+
+
+@pytest.mark.parametrize("status_code", [408, 425, 429, 500, 502, 503, 504, 599])
+def test_transient_status_codes_are_retryable(status_code):
+    assert RetryPolicy().classify_status(status_code).retryable
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 403, 404])
+def test_client_errors_are_permanent(status_code):
+    assert not RetryPolicy().classify_status(status_code).retryable
+
+
+@pytest.mark.parametrize("status_code", [401, 403])
+def test_auth_failures_mention_cookie(status_code):
+    assert "cookie" in RetryPolicy().classify_status(status_code).reason
+
+
+def test_http_error_is_classified_by_status_and_reads_retry_after():
+    decision = RetryPolicy().classify(None, _http_error(429, {'Retry-After': '7'}))
+    assert decision.retryable
+    assert decision.retry_after == 7.0
+    assert not RetryPolicy().classify(None, _http_error(403)).retryable
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (requests.exceptions.ConnectTimeout(), True),
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.TooManyRedirects(), False),
+    (PermanentCheckinError("cookie 已过期"), False),
+    (RuntimeError("unexpected"), True),
+])
+def test_errors(error, retryable):
+    assert RetryPolicy().classify(None, error).retryable is retryable
+
+
+def test_unsuccessful_result_is_retryable():
+    decision = RetryPolicy().classify({'message': '签到失败'}, None)
+    assert decision.retryable
+    assert decision.reason == '签到失败'
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("0", 0.0),
+    (" 12 ", 12.0),
+    ("1.5", 1.5),
+    ("-3", 0.0),
+    ("soon", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    value = formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= parse_retry_after(value) <= 60
+
+
+def test_parse_retry_after_past_http_date_is_zero():
+    assert parse_retry_after(formatdate(time.time() - 3600, usegmt=True)) == 0.0
@@ -0,0 +1,82 @@
+# tests/test_retry_scheduler.py
+import time
+
+import pytest
+
+from runner import AccountRunner
+from services.glados_service import GLaDOSService
+from stub_server import StubConfig, start_stub_server
+from test_runner import Concurrency, FakeService
+
+
+def test_retry_wait_does_not_block_other_accounts():
+    service = FakeService('a', 1, Concurrency())
+    jobs = [(service, {'account_id': 'retry', 'failures': 1, 'retry_delay': 0.3})]
+    jobs += [(service, {'account_id': f'ok{i}'}) for i in range(5)]
+
+    started = time.monotonic()
+    results = AccountRunner(max_workers=1).run(jobs)
+    elapsed = time.monotonic() - started
+
+    assert [result.message for result in results] == ['attempts=2'] + ['attempts=1'] * 5
+    # 单线程下其他账号在重试等待期间执行完毕，总耗时接近重试间隔而不是两者之和
+    calls = [account for account, _ in service.calls]
+    assert calls == ['retry', 'ok0', 'ok1', 'ok2', 'ok3', 'ok4', 'retry']
+    assert elapsed < 0.3 + 6 * 0.02 + 0.15
+
+
+def test_due_retries_run_in_deadline_order_and_after_their_delay():
+    service = FakeService('a', 2, Concurrency())
+    jobs = [(service, {'account_id': 'late', 'failures': 1, 'retry_delay': 0.25, 'sleep': 0}),
+            (service, {'account_id': 'early', 'failures': 2, 'retry_delay': 0.05, 'sleep': 0})]
+
+    AccountRunner(max_workers=2).run(jobs)
+
+    starts = {}
+    for account, at in service.calls:
+        starts.setdefault(account, []).append(at)
+    assert len(starts['early']) == 3 and len(starts['late']) == 2
+    assert starts['late'][1] - starts['late'][0] >= 0.25
+    assert all(b - a >= 0.05 for a, b in zip(starts['early'], starts['early'][1:]))
+    assert starts['early'][-1] < starts['late'][-1]
+
+
+@pytest.fixture
+def failing_glados(tmp_path, monkeypatch):
+    """所有签到请求都返回 500 的 GLaDOS 桩服务"""
+    from gen_accounts import account_env
+
+    server = start_stub_server(StubConfig(latency=0, error_rate=1.0, seed=1))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', '0')
+    for key, value in account_env(1, 0, f"http://127.0.0.1:{server.server_address[1]}").items():
+        monkeypatch.setenv(key, value)
+    yield GLaDOSService()
+    server.shutdown()
+    server.server_close()
+
+
+def test_advance_task_returns_backoff_delay_instead_of_sleeping(failing_glados):
+    service = failing_glados
+    config = service.get_retry_config()
+    task = service.create_task(service.get_account_configs()[0])
+
+    delays = []
+    started = time.monotonic()
+    while True:
+        delay = service.advance_task(task)
+        if delay is None:
+            break
+        delays.append(delay)
+    elapsed = time.monotonic() - started
+
+    # 每次失败后返回退避间隔，由调度器安排重试，advance_task 本身不等待
+    max_attempts = service.get_max_attempts()
+    assert len(delays) == max_attempts - 1
+    assert elapsed < 2
+    for attempt, delay in enumerate(delays):
+        expected = config['delay'] * config['backoff'] ** attempt
+        jitter, max_delay = config['jitter'], config['max_delay']
+        assert min(expected * (1 - jitter), max_delay) <= delay <= min(expected * (1 + jitter), max_delay)
+    assert not task.result.success
+    assert task.attempts == max_attempts
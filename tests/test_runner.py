@@ -0,0 +1,100 @@
+# tests/test_runner.py
+import threading
+import time
+
+from runner import AccountRunner
+from services.base_service import CheckinResult, CheckinTask
+
+
+class Concurrency:
+    """统计同时执行的任务数峰值，全局和按服务分别统计"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = {}
+        self.peak = {}
+
+    def enter(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.current[key] = self.current.get(key, 0) + 1
+                self.peak[key] = max(self.peak.get(key, 0), self.current[key])
+
+    def leave(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.current[key] -= 1
+
+
+class FakeService:
+    """
+    只实现执行器所需接口的服务：每次推进耗时 config['sleep'] 秒，
+    前 config['failures'] 次尝试返回 config['retry_delay'] 要求稍后重试。
+    """
+
+    def __init__(self, name: str, max_workers: int, concurrency: Concurrency):
+        self.service_name = name
+        self.max_workers = max_workers
+        self.concurrency = concurrency
+        self.calls = []  # (账号, 开始时间)
+
+    def get_concurrency_config(self):
+        return {'max_workers': self.max_workers}
+
+    def create_task(self, config):
+        return CheckinTask(config)
+
+    def advance_task(self, task: CheckinTask):
+        config = task.account_config
+        self.concurrency.enter('all', self.service_name)
+        try:
+            self.calls.append((task.account_id, time.monotonic()))
+            time.sleep(config.get('sleep', 0.02))
+            task.attempts += 1
+            if task.attempts <= config.get('failures', 0):
+                return config['retry_delay']
+            task.result = CheckinResult(self.service_name, task.account_id, True, f"attempts={task.attempts}",
+                                        task.checkin_time)
+            return None
+        finally:
+            self.concurrency.leave('all', self.service_name)
+
+
+def test_results_keep_submission_order_and_stream_to_callback():
+    concurrency = Concurrency()
+    fast, slow = FakeService('fast', 4, concurrency), FakeService('slow', 4, concurrency)
+    jobs = [(slow, {'account_id': 's0', 'sleep': 0.1}), (fast, {'account_id': 'f0'}),
+            (slow, {'account_id': 's1', 'sleep': 0.05}), (fast, {'account_id': 'f1'})]
+    streamed = []
+
+    results = AccountRunner(max_workers=4).run(jobs, on_result=lambda index, result: streamed.append(index))
+
+    assert [result.account_id for result in results] == ['s0', 'f0', 's1', 'f1']
+    # 回调按完成顺序调用，快的账号先交给 sink
+    assert sorted(streamed) == [0, 1, 2, 3]
+    assert streamed[-1] == 0
+
+
+def test_global_and_per_service_limits():
+    concurrency = Concurrency()
+    a, b = FakeService('a', 2, concurrency), FakeService('b', 1, concurrency)
+    jobs = [(a, {'account_id': f'a{i}'}) for i in range(6)] + [(b, {'account_id': f'b{i}'}) for i in range(3)]
+
+    results = AccountRunner(max_workers=3).run(jobs)
+
+    assert all(result.success for result in results)
+    assert concurrency.peak == {'all': 3, 'a': 2, 'b': 1}
+
+
+def test_single_worker_runs_serially():
+    concurrency = Concurrency()
+    service = FakeService('a', 4, concurrency)
+
+    AccountRunner(max_workers=1).run([(service, {'account_id': str(i)}) for i in range(4)])
+
+    assert concurrency.peak['all'] == 1
+    assert [account for account, _ in service.calls] == ['0', '1', '2', '3']
+
+
+def test_empty_job_list():
+    assert AccountRunner(max_workers=2).run([]) == []
@@ -0,0 +1,69 @@
+# tests/test_shard.py
+import argparse
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from account_registry import hash_account_id
+from shard import shard_of, parse_shard, shard_file_names, write_report_fragment, merge_shards
+from status_manager import (STATUS_FILE_NAME, JOURNAL_FILE_NAME, append_status_record, read_prior_status)
+
+
+def test_shard_of_is_stable():
+    # 分片结果只由账号哈希决定，改变算法会让已有分片的状态文件失效
+    hashed_id = hash_account_id("user@example.com")
+    assert shard_of(hashed_id, 1) == 1
+    assert shard_of(hashed_id, 4) == int(hashed_id[:16], 16) % 4 + 1
+    assert [shard_of(hashed_id, 4) for _ in range(5)] == [shard_of(hashed_id, 4)] * 5
+
+
+@pytest.mark.parametrize("total", [1, 2, 3, 8])
+def test_shard_of_covers_every_shard(total):
+    counts = Counter(shard_of(hash_account_id(f"user{i}"), total) for i in range(400))
+
+    assert set(counts) == set(range(1, total + 1))
+    # 哈希分布足够均匀，没有明显偏斜的分片
+    assert min(counts.values()) > 400 / total / 2
+
+
+@pytest.mark.parametrize("value, expected", [("1/1", (1, 1)), ("2/4", (2, 4)), ("4/4", (4, 4))])
+def test_parse_shard(value, expected):
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "1", "a/b", "1/2/3"])
+def test_parse_shard_rejects_invalid(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(value)
+
+
+def test_shard_processes_read_shared_status_without_compacting(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(STATUS_FILE_NAME, 'w', encoding='utf-8') as f:
+        json.dump({'a': {'success': False}}, f)
+    append_status_record('a', {'success': True})
+    with open(STATUS_FILE_NAME, encoding='utf-8') as f:
+        before = f.read()
+
+    assert read_prior_status(compact=False) == {'a': {'success': True}}
+    # 共享的 status.json 和状态日志保持原样，由合并步骤统一压缩
+    with open(STATUS_FILE_NAME, encoding='utf-8') as f:
+        assert f.read() == before
+    assert os.path.exists(JOURNAL_FILE_NAME)
+    assert not os.path.exists(STATUS_FILE_NAME + '.tmp')
+
+
+def test_merge_compacts_shared_journal_and_shard_fragments(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    append_status_record('a', {'success': True})
+    names = shard_file_names(2, 2)
+    append_status_record('b', {'success': True}, names['journal'])
+    write_report_fragment(names['report'], [])
+
+    merge_shards()
+
+    assert not os.path.exists(JOURNAL_FILE_NAME)
+    assert not any(os.path.exists(path) for path in names.values())
+    assert read_prior_status() == {'a': {'success': True}, 'b': {'success': True}}
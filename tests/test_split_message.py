@@ -0,0 +1,50 @@
+# tests/test_split_message.py
+import pytest
+
+from report_renderer import split_message
+
+
+def test_short_message_is_not_split():
+    assert split_message("a\nb", max_chars=10) == ["a\nb"]
+
+
+def test_splits_on_line_boundaries():
+    content = "\n".join(f"line{i}" for i in range(10))
+    chunks = split_message(content, max_chars=12)
+
+    assert "\n".join(chunks) == content
+    assert all(len(chunk) <= 12 for chunk in chunks)
+    # 每一行都完整地出现在某一片中
+    assert all(line.startswith("line") for chunk in chunks for line in chunk.split("\n"))
+
+
+def test_line_exactly_at_limit_stays_whole():
+    chunks = split_message("12345\n67890", max_chars=5)
+    assert chunks == ["12345", "67890"]
+
+
+def test_overlong_line_is_hard_split():
+    chunks = split_message("short\n" + "x" * 25, max_chars=10)
+
+    assert chunks == ["short", "x" * 10, "x" * 10, "x" * 5]
+
+
+def test_byte_limit_counts_utf8_and_never_splits_a_character():
+    content = "签到" * 10  # 每个汉字 3 字节
+    chunks = split_message(content, max_bytes=7)
+
+    assert "".join(chunks) == content
+    assert all(len(chunk.encode("utf-8")) <= 7 for chunk in chunks)
+    assert [len(chunk) for chunk in chunks] == [2] * 10
+
+
+@pytest.mark.parametrize("max_chars, max_bytes", [(50, None), (None, 60), (40, 45)])
+def test_chunks_respect_both_limits_and_preserve_content(max_chars, max_bytes):
+    content = "\n".join(f"GLaDOS 账号{i} 成功 {'.' * (i % 7)}" for i in range(40))
+    chunks = split_message(content, max_chars=max_chars, max_bytes=max_bytes)
+
+    assert len(chunks) > 1
+    assert "\n".join(chunks) == content
+    for chunk in chunks:
+        assert max_chars is None or len(chunk) <= max_chars
+        assert max_bytes is None or len(chunk.encode("utf-8")) <= max_bytes
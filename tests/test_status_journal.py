@@ -0,0 +1,52 @@
+# tests/test_status_journal.py
+import json
+import os
+
+import pytest
+
+from status_manager import append_status_record, read_prior_status, write_current_status
+
+
+@pytest.fixture
+def files(tmp_path):
+    return str(tmp_path / "status.json"), str(tmp_path / "status.journal")
+
+
+def test_missing_files_give_empty_status(files):
+    assert read_prior_status(*files) == {}
+
+
+def test_journal_is_replayed_and_compacted(files):
+    status_file, journal_file = files
+    with open(status_file, 'w', encoding='utf-8') as f:
+        json.dump({'a': {'success': False}, 'b': {'success': True}}, f)
+    append_status_record('a', {'success': True}, journal_file)
+    append_status_record('c', {'success': False}, journal_file)
+    append_status_record('c', {'success': True}, journal_file)
+
+    expected = {'a': {'success': True}, 'b': {'success': True}, 'c': {'success': True}}
+    assert read_prior_status(status_file, journal_file) == expected
+
+    # 回放后日志已合并进状态文件并删除，再次读取结果不变
+    with open(status_file, encoding='utf-8') as f:
+        assert json.load(f) == expected
+    assert not os.path.exists(journal_file)
+    assert read_prior_status(status_file, journal_file) == expected
+
+
+def test_truncated_last_line_is_skipped(files):
+    status_file, journal_file = files
+    append_status_record('a', {'success': True}, journal_file)
+    with open(journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"id": "b", "rec')
+
+    assert read_prior_status(status_file, journal_file) == {'a': {'success': True}}
+
+
+def test_write_current_status_clears_journal(files):
+    status_file, journal_file = files
+    append_status_record('a', {'success': True}, journal_file)
+    write_current_status({'a': {'success': True}}, status_file, journal_file)
+
+    assert not os.path.exists(journal_file)
+    assert read_prior_status(status_file, journal_file) == {'a': {'success': True}}
@@ -0,0 +1,75 @@
+# tests/test_workflow_run_stream.py
+from argparse import Namespace
+
+import pytest
+
+import batch_del_workflows
+from batch_del_workflows import WorkflowRunStream
+from github_stub import start_github_stub
+
+
+@pytest.fixture
+def github_stub():
+    servers = []
+
+    def start(runs: int = 250, rate_limit: int = 5000):
+        server = start_github_stub(runs=runs, latency=0, rate_limit=rate_limit, rate_window=3600,
+                                   secondary_rate=0, retry_after=1)
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_yields_every_run_once_across_shared_created_at(github_stub):
+    server, api_url = github_stub(runs=250)
+
+    stream = WorkflowRunStream('o', 'r', 'x', api_url=api_url)
+    ids = [run['id'] for run in stream]
+
+    # 每三个运行共用一个创建时间，页边界上的运行会被再次返回，按 id 去重
+    assert stream.total_count == stream.expected == 250
+    assert ids == [run['id'] for run in server.runs]
+    assert stream.pages == 3
+    assert not stream.failed
+
+
+def test_deleting_while_streaming_does_not_skip_runs(github_stub):
+    server, api_url = github_stub(runs=250)
+    args = Namespace(owner='o', repo='r', count=None, gh_token='x', force=True, delay=0, workers=1, rate=2.0,
+                     api_url=api_url)
+
+    batch_del_workflows.main(args)
+
+    assert server.runs == []
+    assert server.stats['deleted'] == 250
+    assert 'delete_missing' not in server.stats
+
+
+def test_count_stops_paging_once_filled(github_stub):
+    server, api_url = github_stub(runs=250)
+    newest = [run['id'] for run in server.runs[:150]]
+
+    stream = WorkflowRunStream('o', 'r', 'x', count=150, api_url=api_url)
+
+    assert stream.expected == 150
+    assert [run['id'] for run in stream] == newest
+    assert stream.pages == 2
+
+    small = WorkflowRunStream('o', 'r', 'x', count=7, api_url=api_url)
+    assert [run['id'] for run in small] == newest[:7]
+    assert small.pages == 1
+
+
+def test_page_failure_stops_streaming_and_is_reported(github_stub):
+    server, api_url = github_stub(runs=250, rate_limit=2)
+
+    stream = WorkflowRunStream('o', 'r', 'x', api_url=api_url)
+    ids = [run['id'] for run in stream]
+
+    assert stream.failed
+    assert len(ids) == len(set(ids)) < 250
+    assert ids == [run['id'] for run in server.runs[:len(ids)]]